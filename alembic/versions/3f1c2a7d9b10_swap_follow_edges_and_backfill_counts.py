@@ -0,0 +1,72 @@
+"""swap follow edges and backfill follow counts
+
+The followings relationship used to store 'a follows b' as follower_id=b,
+followed_id=a. This flips the rows written that way to match the column
+names, then fills follower_count/following_count from them.
+
+Databases created by `Base.metadata.create_all` after the mapping fix
+already store edges the right way, stamp them instead of upgrading:
+`alembic stamp head`.
+
+Revision ID: 3f1c2a7d9b10
+Revises:
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def swap_edges() -> None:
+    # through a copy, swapping in place would hit the primary key on the
+    # pairs following each other
+    op.execute(
+        "CREATE TEMPORARY TABLE user_interaction_swap AS "
+        "SELECT followed_id AS follower_id, follower_id AS followed_id "
+        "FROM user_interaction"
+    )
+    op.execute("DELETE FROM user_interaction")
+    op.execute(
+        "INSERT INTO user_interaction (follower_id, followed_id) "
+        "SELECT follower_id, followed_id FROM user_interaction_swap"
+    )
+    op.execute("DROP TABLE user_interaction_swap")
+
+
+def backfill_counts() -> None:
+    op.execute(
+        'UPDATE "user" SET '
+        "follower_count = (SELECT count(*) FROM user_interaction "
+        'WHERE user_interaction.followed_id = "user".id), '
+        "following_count = (SELECT count(*) FROM user_interaction "
+        'WHERE user_interaction.follower_id = "user".id)'
+    )
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("user")}
+
+    for name in ("follower_count", "following_count"):
+        if name not in columns:
+            op.add_column(
+                "user",
+                sa.Column(name, sa.Integer(), server_default="0", nullable=True),
+            )
+
+    swap_edges()
+    backfill_counts()
+
+
+def downgrade() -> None:
+    swap_edges()
+    op.drop_column("user", "following_count")
+    op.drop_column("user", "follower_count")
@@ -0,0 +1,105 @@
+"""add notification groups
+
+Notifications of one kind on one target are grouped: a group carries its
+type, target, actor count and latest actors. Grouped notifications used to
+be bumped by rewriting created_at; they keep created_at now and the inbox
+orders by last_actor_at, filled here from created_at. The unread badge reads
+user.unread_notification_count, filled from the unread notifications.
+
+Existing notifications have no type and are never grouped.
+
+Revision ID: 8a4e6c0b2d57
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-16 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e6c0b2d57'
+down_revision: Union[str, None] = '3f1c2a7d9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+notification_type = sa.Enum(
+    "like", "unlike", "comment", "repost", "follow", "unfollow", name="notificationtype"
+)
+
+
+def upgrade() -> None:
+    columns = {
+        column["name"] for column in sa.inspect(op.get_bind()).get_columns("notification")
+    }
+
+    # add_column does not create the type of an enum column on postgres
+    notification_type.create(op.get_bind(), checkfirst=True)
+
+    new_columns = [
+        sa.Column("type", notification_type, nullable=True),
+        sa.Column("target_id", sa.String(), nullable=True),
+        sa.Column("actor_count", sa.Integer(), server_default="1", nullable=True),
+        sa.Column("actors", sa.JSON(), nullable=True),
+    ]
+
+    for column in new_columns:
+        if column.name not in columns:
+            op.add_column("notification", column)
+
+    if "last_actor_at" not in columns:
+        op.add_column(
+            "notification",
+            sa.Column(
+                "last_actor_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=True,
+            ),
+        )
+        op.execute("UPDATE notification SET last_actor_at = created_at")
+
+    op.create_index(
+        "ix_notification_user_last_actor_at",
+        "notification",
+        ["user_id", "last_actor_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_notification_group",
+        "notification",
+        ["user_id", "type", "target_id"],
+        if_not_exists=True,
+    )
+    op.drop_index(
+        "ix_notification_user_created_at", table_name="notification", if_exists=True
+    )
+
+    user_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("user")}
+
+    if "unread_notification_count" not in user_columns:
+        op.add_column(
+            "user",
+            sa.Column("unread_notification_count", sa.Integer(), server_default="0", nullable=True),
+        )
+
+    op.execute(
+        'UPDATE "user" SET unread_notification_count = ('
+        "SELECT count(*) FROM notification "
+        'WHERE notification.user_id = "user".id '
+        "AND notification.status = 'unread')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user", "unread_notification_count")
+    op.drop_index("ix_notification_group", table_name="notification")
+    op.drop_index("ix_notification_user_last_actor_at", table_name="notification")
+
+    for name in ("last_actor_at", "actors", "actor_count", "target_id", "type"):
+        op.drop_column("notification", name)
+
+    notification_type.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,42 @@
+"""backfill user avatar_url
+
+User summaries read the avatar from user.avatar_url, which is only set when
+a profile picture is uploaded. This fills it from the latest profile
+picture of the users who uploaded one before the column existed.
+
+Revision ID: c5d19e3f7a21
+Revises: 8a4e6c0b2d57
+Create Date: 2026-10-16 21:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d19e3f7a21'
+down_revision: Union[str, None] = '8a4e6c0b2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("user")}
+
+    if "avatar_url" not in columns:
+        op.add_column("user", sa.Column("avatar_url", sa.String(1024), nullable=True))
+
+    op.execute(
+        'UPDATE "user" SET avatar_url = ('
+        "SELECT profile_picture.image FROM profile_picture "
+        'WHERE profile_picture.user_id = "user".id '
+        "ORDER BY profile_picture.created_at DESC, profile_picture.id DESC "
+        "LIMIT 1"
+        ") WHERE avatar_url IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user", "avatar_url")
@@ -0,0 +1,93 @@
+"""store access token digests
+
+Access tokens were stored as the raw jwt in access_token.token. They are
+looked up by their sha256 digest now, in a unique indexed column filled here
+from the stored tokens; the tokens themselves are dropped. Expired rows are
+deleted first, nothing looks them up anymore.
+
+Revision ID: d2b7e4a9c613
+Revises: c5d19e3f7a21
+Create Date: 2026-10-16 23:40:00.000000
+
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b7e4a9c613'
+down_revision: Union[str, None] = 'c5d19e3f7a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+access_token = sa.table(
+    "access_token",
+    sa.column("id", sa.String),
+    sa.column("token", sa.String),
+    sa.column("token_digest", sa.String),
+    sa.column("expiry_time", sa.DateTime(timezone=True)),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("access_token")}
+
+    if "token_digest" not in columns:
+        op.add_column("access_token", sa.Column("token_digest", sa.String(64), nullable=True))
+
+    if "token" in columns:
+        bind.execute(
+            access_token.delete().where(
+                access_token.c.expiry_time < datetime.now(timezone.utc)
+            )
+        )
+        seen = set()
+
+        for row in bind.execute(sa.select(access_token.c.id, access_token.c.token)).all():
+            digest = hashlib.sha256(row.token.encode()).hexdigest()
+
+            # the same jwt issued twice within a second, before tokens had a jti
+            if digest in seen:
+                bind.execute(access_token.delete().where(access_token.c.id == row.id))
+                continue
+
+            seen.add(digest)
+            bind.execute(
+                access_token.update()
+                .where(access_token.c.id == row.id)
+                .values(token_digest=digest)
+            )
+
+        with op.batch_alter_table("access_token") as batch_op:
+            batch_op.drop_column("token")
+
+    with op.batch_alter_table("access_token") as batch_op:
+        batch_op.alter_column("token_digest", existing_type=sa.String(64), nullable=False)
+
+    op.create_index(
+        "ix_access_token_token_digest",
+        "access_token",
+        ["token_digest"],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_access_token_expiry_time", "access_token", ["expiry_time"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    # the tokens can't be recovered from their digests, everyone logs in again
+    op.execute("DELETE FROM access_token")
+    op.drop_index("ix_access_token_expiry_time", table_name="access_token")
+    op.drop_index("ix_access_token_token_digest", table_name="access_token")
+
+    with op.batch_alter_table("access_token") as batch_op:
+        batch_op.drop_column("token_digest")
+        batch_op.add_column(sa.Column("token", sa.String(500), nullable=False))
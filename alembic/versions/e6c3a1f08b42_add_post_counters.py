@@ -0,0 +1,52 @@
+"""add post counters
+
+Adds the like, comment, repost and bookmark counters of a post and fills
+them from the rows they count. Duplicate like and bookmark rows, removed by
+the next revision, are counted once.
+
+Revision ID: e6c3a1f08b42
+Revises: d2b7e4a9c613
+Create Date: 2026-10-16 23:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c3a1f08b42'
+down_revision: Union[str, None] = 'd2b7e4a9c613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COUNTERS = ("like_count", "comment_count", "repost_count", "bookmark_count")
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("post")}
+
+    for name in COUNTERS:
+        if name not in columns:
+            op.add_column(
+                "post", sa.Column(name, sa.Integer(), server_default="0", nullable=True)
+            )
+
+    op.execute(
+        "UPDATE post SET "
+        'like_count = (SELECT count(DISTINCT "like".user_id) FROM "like" '
+        'WHERE "like".post_id = post.id), '
+        "comment_count = (SELECT count(*) FROM post_comment "
+        "WHERE post_comment.post_id = post.id), "
+        "repost_count = (SELECT count(*) FROM post AS repost "
+        "WHERE repost.original_post_id = post.id), "
+        "bookmark_count = (SELECT count(DISTINCT bookmark.user_id) FROM bookmark "
+        "WHERE bookmark.post_id = post.id)"
+    )
+
+
+def downgrade() -> None:
+    for name in reversed(COUNTERS):
+        op.drop_column("post", name)
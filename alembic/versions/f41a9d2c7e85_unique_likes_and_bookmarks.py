@@ -0,0 +1,47 @@
+"""unique likes and bookmarks
+
+A user likes or bookmarks a post at most once. Duplicate rows left by
+concurrent taps are removed, keeping one per user and post, before the
+unique constraints are added.
+
+Revision ID: f41a9d2c7e85
+Revises: e6c3a1f08b42
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f41a9d2c7e85'
+down_revision: Union[str, None] = 'e6c3a1f08b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CONSTRAINTS = {"like": "unique_like", "bookmark": "unique_bookmark"}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    for table, name in CONSTRAINTS.items():
+        if name in {constraint["name"] for constraint in inspector.get_unique_constraints(table)}:
+            continue
+
+        op.execute(
+            f'DELETE FROM "{table}" WHERE id NOT IN '
+            f'(SELECT min(id) FROM "{table}" GROUP BY user_id, post_id)'
+        )
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_unique_constraint(name, ["user_id", "post_id"])
+
+
+def downgrade() -> None:
+    for table, name in CONSTRAINTS.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(name, type_="unique")
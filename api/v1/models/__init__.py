@@ -6,6 +6,7 @@ from api.v1.models.post_comment import PostComment
 from api.v1.models.profile_picture import ProfilePicture
 from api.v1.models.social_link import SocialLink
 from api.v1.models.notification import Notification
-from api.v1.models.hashtag import Hashtag
+from api.v1.models.hashtag import Hashtag, PostHashtag, HashtagUsage
 from api.v1.models.block import Block
 from api.v1.models.activity import Activity
+from api.v1.models.timeline import TimelineEntry
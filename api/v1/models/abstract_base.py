@@ -1,5 +1,5 @@
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlalchemy import DateTime, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 from api.v1.utils.database import Base
@@ -11,6 +11,10 @@ class AbstractBaseModel(Base):
     id: Mapped[str] = mapped_column(
         String, primary_key=True, index=True, default=lambda: str(uuid4())
     )
+    # also set client side so every backend stores sub-second precision in the
+    # same format keyset cursors are compared with
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True),
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
     )
@@ -9,13 +9,16 @@ class AccessToken(AbstractBaseModel):
 
     user_id: Mapped[str] = mapped_column(ForeignKey("user.id"))
     user = relationship("User", back_populates="access_tokens")
-    token: Mapped[str] = mapped_column(String(500), nullable=False)
+    # sha256 hex digest of the jwt, the token itself is never stored
+    token_digest: Mapped[str] = mapped_column(
+        String(64), nullable=False, unique=True, index=True
+    )
     expiry_time: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False
+        DateTime(timezone=True), nullable=False, index=True
     )
     blacklisted: Mapped[bool] = mapped_column(
         Boolean(), server_default="false", default=False
     )
 
     def __str__(self) -> str:
-        return self.token
+        return self.token_digest
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, String, Table, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Index, String, Table, UniqueConstraint
 from api.v1.models.abstract_base import AbstractBaseModel
 from api.v1.utils.database import Base
 
@@ -10,4 +10,6 @@ class Block(AbstractBaseModel):
 
     __table_args__ = (
         UniqueConstraint("blocker_id", "blocked_id", name="unique_block"),
+        # the reverse lookup of block sets
+        Index("ix_block_blocked_id", "blocked_id"),
     )
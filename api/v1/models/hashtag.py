@@ -1,5 +1,6 @@
+from datetime import datetime
 from sqlalchemy.orm import mapped_column, Mapped
-from sqlalchemy import Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
 
 from api.v1.models.abstract_base import AbstractBaseModel
 
@@ -8,7 +9,40 @@ class Hashtag(AbstractBaseModel):
     __tablename__ = "hashtag"
 
     tag: Mapped[str] = mapped_column(String(55), nullable=False, unique=True)
+    # number of posts currently tagged, maintained by the hashtag service
     usage: Mapped[int] = mapped_column(Integer, default=1)
 
     def __str__(self):
         return self.tag
+
+
+class PostHashtag(AbstractBaseModel):
+    """A hashtag used in a post"""
+
+    __tablename__ = "post_hashtag"
+
+    hashtag_id: Mapped[str] = mapped_column(ForeignKey("hashtag.id"), nullable=False)
+    post_id: Mapped[str] = mapped_column(ForeignKey("post.id"), nullable=False)
+    # copied from the post so a tag's posts sort the same way the feed does
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("hashtag_id", "post_id", name="unique_post_hashtag"),
+        Index("ix_post_hashtag_tag_created_at", "hashtag_id", "created_at", "post_id"),
+        Index("ix_post_hashtag_post_id", "post_id"),
+    )
+
+
+class HashtagUsage(AbstractBaseModel):
+    """Times a hashtag was used within one time bucket, feeds trending scores"""
+
+    __tablename__ = "hashtag_usage"
+
+    hashtag_id: Mapped[str] = mapped_column(ForeignKey("hashtag.id"), nullable=False)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    __table_args__ = (
+        UniqueConstraint("hashtag_id", "bucket_start", name="unique_hashtag_usage"),
+        Index("ix_hashtag_usage_bucket_start", "bucket_start"),
+    )
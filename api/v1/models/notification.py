@@ -1,5 +1,7 @@
+from datetime import datetime, timezone
 from enum import Enum
-from sqlalchemy import String, ForeignKey, Enum as SQLAlchemyEnum
+from typing import Optional
+from sqlalchemy import JSON, DateTime, Index, Integer, String, ForeignKey, func, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from api.v1.models.abstract_base import AbstractBaseModel
 
@@ -9,6 +11,15 @@ class NotificationStatus(Enum):
     unread = "unread"
 
 
+class NotificationType(Enum):
+    like = "like"
+    unlike = "unlike"
+    comment = "comment"
+    repost = "repost"
+    follow = "follow"
+    unfollow = "unfollow"
+
+
 class Notification(AbstractBaseModel):
     __tablename__ = "notification"
 
@@ -17,8 +28,31 @@ class Notification(AbstractBaseModel):
     status: Mapped[str] = mapped_column(
         SQLAlchemyEnum(NotificationStatus), server_default="unread"
     )
+    # set on notifications grouped by (user_id, type, target_id), None for
+    # account notifications which are never grouped
+    type: Mapped[Optional[NotificationType]] = mapped_column(
+        SQLAlchemyEnum(NotificationType), nullable=True
+    )
+    target_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    actor_count: Mapped[int] = mapped_column(Integer, server_default="1", default=1)
+    # most recent actors first, as {"id", "username"} dicts
+    actors: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # when the latest actor was folded in, orders the inbox and sse replays
+    # while created_at keeps when the group started
+    last_actor_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        default=lambda: datetime.now(timezone.utc),
+    )
 
     user = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        # the inbox pages and reconnecting sse clients replay in this order
+        Index("ix_notification_user_last_actor_at", "user_id", "last_actor_at", "id"),
+        # lookup of the open group a new notification is folded into
+        Index("ix_notification_group", "user_id", "type", "target_id"),
+    )
+
     def __str__(self):
         return self.message
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import mapped_column, Mapped, relationship
-from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, UniqueConstraint, func, text
 from api.v1.models.abstract_base import AbstractBaseModel
 from pydantic import UUID4
 from sqlalchemy.orm import remote
@@ -33,11 +33,35 @@ class Post(AbstractBaseModel):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+    # maintained by the post/comment services, repaired by reconcile_counters
+    like_count: Mapped[int] = mapped_column(Integer, server_default="0", default=0)
+    comment_count: Mapped[int] = mapped_column(Integer, server_default="0", default=0)
+    repost_count: Mapped[int] = mapped_column(Integer, server_default="0", default=0)
+    bookmark_count: Mapped[int] = mapped_column(Integer, server_default="0", default=0)
+
+    __table_args__ = (
+        # keyset pagination of the feed orders by (created_at, id)
+        Index("ix_post_created_at_id", "created_at", "id"),
+    )
 
     def __str__(self) -> str:
         return self.content or self.image or self.video
 
 
+# text search configuration of the post search index
+POST_SEARCH_CONFIG = "english"
+
+# literals rather than bound parameters, so queries match the index expression
+post_search_vector = func.to_tsvector(
+    text(f"'{POST_SEARCH_CONFIG}'"),
+    func.coalesce(Post.content, text("''")),
+)
+
+Index(
+    "ix_post_search_vector", post_search_vector, postgresql_using="gin"
+).ddl_if(dialect="postgresql")
+
+
 class Like(AbstractBaseModel):
     __tablename__ = "like"
 
@@ -47,6 +71,11 @@ class Like(AbstractBaseModel):
     post = relationship("Post", backref="likes")
     liked: Mapped[bool] = mapped_column(default=False)
 
+    __table_args__ = (
+        # also serves the liked_by_me lookup of feed pages
+        UniqueConstraint("user_id", "post_id", name="unique_like"),
+    )
+
     def __repr__(self):
         return self.user
 
@@ -61,3 +90,8 @@ class Bookmark(AbstractBaseModel):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     user = relationship("User", backref="bookmarks")
     post = relationship("Post", backref="bookmarked_by")
+
+    __table_args__ = (
+        # also serves the bookmarked_by_me lookup of feed pages
+        UniqueConstraint("user_id", "post_id", name="unique_bookmark"),
+    )
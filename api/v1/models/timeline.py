@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from api.v1.models.abstract_base import AbstractBaseModel
+
+
+class TimelineEntry(AbstractBaseModel):
+    """A post materialized into a follower's home timeline"""
+
+    __tablename__ = "timeline_entry"
+
+    user_id: Mapped[str] = mapped_column(ForeignKey("user.id"), nullable=False)
+    post_id: Mapped[str] = mapped_column(ForeignKey("post.id"), nullable=False)
+    author_id: Mapped[str] = mapped_column(ForeignKey("user.id"), nullable=False)
+    # copied from the post so timelines sort the same way the feed does
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_id", name="unique_timeline_entry"),
+        Index("ix_timeline_entry_user_created_at", "user_id", "created_at", "post_id"),
+    )
+
+    def __str__(self) -> str:
+        return self.post_id
@@ -2,13 +2,17 @@ from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 from sqlalchemy import (
+    DDL,
     Column,
     DateTime,
     ForeignKey,
+    Index,
+    Integer,
     String,
     Table,
     func,
     Enum as SQLAlchemyEnum,
+    event,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from api.v1.models.abstract_base import AbstractBaseModel
@@ -29,6 +33,8 @@ followers_table = Table(
     Base.metadata,
     Column("follower_id", String, ForeignKey("user.id"), primary_key=True),
     Column("followed_id", String, ForeignKey("user.id"), primary_key=True),
+    # the primary key serves followings, this serves followers
+    Index("ix_user_interaction_followed_follower", "followed_id", "follower_id"),
 )
 
 
@@ -40,11 +46,13 @@ class User(AbstractBaseModel):
     password: Mapped[str] = mapped_column(String(1024), nullable=False)
     bio: Mapped[Optional[str]] = mapped_column(String(1024))
     contact_info: Mapped[Optional[str]] = mapped_column(String(15))
+    # image of the latest profile picture, so summaries need no join
+    avatar_url: Mapped[Optional[str]] = mapped_column(String(1024))
     followings = relationship(
         "User",
         secondary=followers_table,
-        primaryjoin=lambda: User.id == followers_table.c.followed_id,
-        secondaryjoin=lambda: User.id == followers_table.c.follower_id,
+        primaryjoin=lambda: User.id == followers_table.c.follower_id,
+        secondaryjoin=lambda: User.id == followers_table.c.followed_id,
         backref="followers",
     )
     
@@ -57,6 +65,14 @@ class User(AbstractBaseModel):
         cascade="all, delete",
     )
 
+    # maintained by follow/unfollow/block so reads never count user_interaction
+    follower_count: Mapped[int] = mapped_column(Integer, server_default="0", default=0)
+    following_count: Mapped[int] = mapped_column(Integer, server_default="0", default=0)
+    # maintained by the notification service so the unread badge is a pk lookup
+    unread_notification_count: Mapped[int] = mapped_column(
+        Integer, server_default="0", default=0
+    )
+
     role: Mapped[str] = mapped_column(SQLAlchemyEnum(RoleEnum), default=RoleEnum.user)
     last_login: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     updated_at: Mapped[datetime] = mapped_column(
@@ -84,5 +100,30 @@ class User(AbstractBaseModel):
         "Notification", back_populates="user", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # user directory order, also serves username prefix lookups
+        Index("ix_user_username_id", "username", "id"),
+        # substring search of the directory on postgres
+        Index(
+            "ix_user_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_user_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def __str__(self) -> str:
         return self.username
+
+
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
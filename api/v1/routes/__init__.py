@@ -5,6 +5,7 @@ from api.v1.routes.post import posts
 from api.v1.routes.post_comment import comments
 from api.v1.routes.notification import notifications
 from api.v1.routes.activity import activity
+from api.v1.routes.hashtag import hashtags
 
 # version 1 routes
 
@@ -16,3 +17,4 @@ version_one.include_router(posts)
 version_one.include_router(comments)
 version_one.include_router(notifications)
 version_one.include_router(activity)
+version_one.include_router(hashtags)
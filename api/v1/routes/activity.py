@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from api.v1.utils.dependencies import get_db
-from api.v1.services.activity import activity_service
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.v1.utils.dependencies import get_async_db
+from api.v1.services.activity import async_activity_service
 from api.v1.responses.success_response import success_response
 
 activity = APIRouter(prefix="/activity", tags=["activity"])
@@ -10,9 +10,9 @@ activity = APIRouter(prefix="/activity", tags=["activity"])
 async def get_activity_feed(
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    activities = activity_service.get_feed(db, limit, offset)
+    activities = await async_activity_service.get_feed(db=db, limit=limit, offset=offset)
     return success_response(
         status_code=status.HTTP_200_OK,
         message="Activity feed retrieved successfully",
@@ -2,10 +2,10 @@ from fastapi import APIRouter, Depends, status
 from api.v1.responses.success_response import success_response
 from api.v1.schemas.user import UserCreate, UserLogin
 from api.v1.models.user import User
-from api.v1.services.user import user_service
-from sqlalchemy.orm import Session
+from api.v1.services.user import user_service, async_user_service, oauth2_scheme
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.v1.utils.dependencies import get_db
+from api.v1.utils.dependencies import get_async_db
 
 
 auth = APIRouter(prefix="/auth", tags=["auth"])
@@ -15,8 +15,8 @@ auth = APIRouter(prefix="/auth", tags=["auth"])
     "/register",
     status_code=status.HTTP_201_CREATED,
 )
-async def register(user: UserCreate, db: Session = Depends(get_db)):
-    data = user_service.create_user(user, db)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    data = await async_user_service.create_user(user=user, db=db)
 
     return success_response(
         status_code=status.HTTP_201_CREATED,
@@ -26,8 +26,8 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @auth.post("/login", status_code=status.HTTP_200_OK)
-async def login(data: UserLogin, db: Session = Depends(get_db)):
-    data = user_service.handle_login(db, email=data.email, password=data.password)
+async def login(data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    data = await async_user_service.handle_login(db=db, email=data.email, password=data.password)
 
     return success_response(
         status_code=status.HTTP_200_OK,
@@ -38,8 +38,9 @@ async def login(data: UserLogin, db: Session = Depends(get_db)):
 
 @auth.post("/logout")
 async def logout(
+    token: str = Depends(oauth2_scheme),
     current_user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user_service.blacklist_token(db, current_user)
+    await async_user_service.blacklist_token(db=db, user=current_user, token=token)
     return success_response(message="User logged out successfully")
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.v1.models.user import User
+from api.v1.responses.success_response import success_response
+from api.v1.services.user import user_service
+from api.v1.services.hashtag import async_hashtag_service
+from api.v1.utils.dependencies import get_async_db
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+hashtags = APIRouter(prefix="/hashtags", tags=["hashtag"])
+
+
+@hashtags.get("/trending", summary="Trending hashtags")
+async def trending(
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(user_service.get_current_user),
+):
+    trending_hashtags = await async_hashtag_service.trending(db=db, limit=limit)
+
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="Trending hashtags returned successfully",
+        data=trending_hashtags,
+    )
+
+
+@hashtags.get("/{tag}/posts", summary="Posts using a hashtag")
+async def hashtag_posts(
+    tag: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(user_service.get_current_user),
+):
+    posts = await async_hashtag_service.get_posts(db=db, user=user, tag=tag, limit=limit, cursor=cursor)
+
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="Posts returned successfully",
+        data=posts,
+    )
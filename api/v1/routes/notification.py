@@ -1,32 +1,68 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.v1.models.user import User
 from api.v1.services.user import user_service
-from api.v1.services.notification import notification_service
-from api.v1.utils.dependencies import get_db
+from api.v1.services.notification import notification_service, async_notification_service
+from api.v1.utils.dependencies import get_async_db
 from api.v1.responses.success_response import success_response
-from typing import List
+from api.v1.schemas.notification import MarkReadSchema
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 notifications = APIRouter(prefix="/notifications", tags=["notification"])
 
 
 @notifications.get("/sse")
-async def sse_endpoint(user: User = Depends(user_service.get_current_user)):
+async def sse_endpoint(
+    user: User = Depends(user_service.get_current_user),
+    last_event_id: str | None = Header(None),
+):
     return StreamingResponse(
-        notification_service.event_generator(user.id), media_type="text/event_stream"
+        notification_service.event_generator(user.id, last_event_id=last_event_id),
+        media_type="text/event-stream",
     )
 
 
 @notifications.get("")
 async def user_notifications(
-    user: User = Depends(user_service.get_current_user), db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    user: User = Depends(user_service.get_current_user), db: AsyncSession = Depends(get_async_db)
 ):
 
-    notifications: List = notification_service.notifications(user=user, db=db)
+    notifications = await async_notification_service.notifications(user=user, db=db, limit=limit, cursor=cursor)
 
     return success_response(
         status_code=200,
         message="Notifications returned successfully",
         data=notifications,
     )
+
+
+@notifications.get("/unread-count")
+async def unread_count(
+    user: User = Depends(user_service.get_current_user), db: AsyncSession = Depends(get_async_db)
+):
+
+    count = await async_notification_service.unread_count(user=user, db=db)
+
+    return success_response(
+        status_code=200,
+        message="Unread count returned successfully",
+        data={"unread_count": count},
+    )
+
+
+@notifications.patch("/read")
+async def mark_read(
+    schema: MarkReadSchema = MarkReadSchema(),
+    user: User = Depends(user_service.get_current_user), db: AsyncSession = Depends(get_async_db)
+):
+
+    marked = await async_notification_service.mark_read(user=user, db=db, up_to=schema.up_to)
+
+    return success_response(
+        status_code=200,
+        message="Notifications marked as read",
+        data={"marked_read": marked},
+    )
@@ -1,26 +1,31 @@
-from fastapi import APIRouter, Depends, status, WebSocket, WebSocketDisconnect, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List
+import json
+from fastapi import APIRouter, Depends, Query, status, WebSocket, WebSocketDisconnect, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.v1.models.user import User
 from api.v1.responses.success_response import success_response
-from api.v1.schemas.post import CreatePostSchema, UpdatePostSchema, RepostCreate, RepostResponse, CommentCreateSchema, CommentResponseSchema, BookmarkResponseSchema
-from api.v1.utils.dependencies import get_db
-from api.v1.utils.websocket import manager
+from api.v1.schemas.post import CreatePostSchema, UpdatePostSchema, RepostCreate, CommentCreateSchema, CommentResponseSchema, BookmarkResponseSchema
+from api.v1.utils.dependencies import get_async_db
+from api.v1.utils.websocket import manager, POSTS_TOPIC, post_topic, user_topic
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from api.v1.services.user import user_service
-from api.v1.services.post import post_service
+from api.v1.services.post import async_post_service
+from api.v1.services.timeline import async_timeline_service
+from api.v1.services.search import async_search_service
 
 
 
 posts = APIRouter(prefix="/posts", tags=["post"])
 
 
-@posts.get("", response_model=List[RepostResponse])
+@posts.get("")
 async def get_feeds(
-        db: Session = Depends(get_db),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str | None = None,
+        db: AsyncSession = Depends(get_async_db),
         user: User = Depends(user_service.get_current_user),):
 
-    feeds = post_service.get_feeds(db=db, user=user)
+    feeds = await async_post_service.get_feeds(db=db, user=user, limit=limit, cursor=cursor)
 
     return success_response(
             status_code=status.HTTP_200_OK,
@@ -28,15 +33,46 @@ async def get_feeds(
             data=feeds)
 
 
+@posts.get("/timeline", summary="Home timeline of followed users")
+async def get_timeline(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str | None = None,
+        db: AsyncSession = Depends(get_async_db),
+        user: User = Depends(user_service.get_current_user),):
+
+    timeline = await async_timeline_service.get_timeline(db=db, user=user, limit=limit, cursor=cursor)
+
+    return success_response(
+            status_code=status.HTTP_200_OK,
+            message="Timeline returned successfully",
+            data=timeline)
+
+
+@posts.get("/search", summary="Full-text search of posts")
+async def search_posts(
+        q: str = Query(..., min_length=1, max_length=256),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str | None = None,
+        db: AsyncSession = Depends(get_async_db),
+        user: User = Depends(user_service.get_current_user),):
+
+    results = await async_search_service.search(db=db, user=user, query=q, limit=limit, cursor=cursor)
+
+    return success_response(
+            status_code=status.HTTP_200_OK,
+            message="Search results returned successfully",
+            data=results)
+
+
 @posts.post("")
 async def create_post(
     post: CreatePostSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
-    new_post = post_service.create(db=db, user=user, schema=post)
+    new_post = await async_post_service.create(db=db, user=user, schema=post)
 
-    manager.broadcast(new_post)
+    await manager.broadcast(new_post, topics=[POSTS_TOPIC, user_topic(user.id)])
 
     return success_response(
         status_code=status.HTTP_201_CREATED,
@@ -52,10 +88,10 @@ async def create_post(
 )
 async def delete_post(
     id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
-    post_service.delete(db=db, user=user, post_id=id)
+    await async_post_service.delete(db=db, user=user, post_id=id)
 
     return success_response(
         status_code=status.HTTP_204_NO_CONTENT, message="Post deleted successfully"
@@ -66,12 +102,12 @@ async def delete_post(
 async def update_post(
     id: str,
     schema: UpdatePostSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
-    updated_post = post_service.update(db=db, user=user, post_id=id, schema=schema)
+    updated_post = await async_post_service.update(db=db, user=user, post_id=id, schema=schema)
 
-    manager.broadcast(updated_post)
+    await manager.broadcast(updated_post, topics=[POSTS_TOPIC, user_topic(user.id)])
 
     return success_response(
         status_code=status.HTTP_200_OK,
@@ -81,13 +117,32 @@ async def update_post(
 
 
 @posts.websocket("/ws")
-async def websocket_post_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_post_endpoint(websocket: WebSocket, topics: str | None = None):
+    """Streams posts, by default every post
+
+    Pass `?topics=user:<id>,post:<id>` or send {"subscribe": topic} and
+    {"unsubscribe": topic} messages to follow authors or a post's comments.
+    """
+
+    await manager.connect(websocket, topics=topics.split(",") if topics else None)
 
     try:
+        manager.send(websocket, "connected")
+
         while True:
-            await websocket.send_text("connected")
-            await websocket.receive_text()
+            try:
+                command = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+
+            if not isinstance(command, dict):
+                continue
+
+            if command.get("subscribe"):
+                manager.subscribe(websocket, str(command["subscribe"]))
+
+            if command.get("unsubscribe"):
+                manager.unsubscribe(websocket, str(command["unsubscribe"]))
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -96,27 +151,29 @@ async def websocket_post_endpoint(websocket: WebSocket):
 @posts.patch("/{id}/like", status_code=status.HTTP_200_OK)
 async def like_post(
     id: str,
+    liked: bool | None = Query(None, description="like (true) or unlike (false), toggles when omitted"),
     background_task: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
 
-    liked_post = post_service.like_post(db=db, user=user, post_id=id, background_task=background_task)
+    liked_post = await async_post_service.like_post(db=db, user=user, post_id=id, background_task=background_task, liked=liked)
 
     return success_response(
         status_code=status.HTTP_200_OK,
-        message="Post liked successfully",
+        message="Post liked successfully" if liked_post["liked"] else "Post unliked successfully",
+        data=liked_post,
     )
 
   
 @posts.get("/{id}/like", status_code=status.HTTP_200_OK)
 async def get_likes(
     id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
 
-    likes = post_service.get_likes(db=db, post_id=id, user=user)
+    likes = await async_post_service.get_likes(db=db, post_id=id, user=user)
 
     return success_response(
         status_code=status.HTTP_200_OK,
@@ -130,13 +187,13 @@ async def repost(
     id: str,
     schema: RepostCreate,
     background_task: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
 
-    repost = post_service.repost(db=db, post_id=id, schema=schema, user=user, background_task=background_task)
+    repost = await async_post_service.repost(db=db, post_id=id, schema=schema, user=user, background_task=background_task)
 
-    manager.broadcast(repost)
+    await manager.broadcast(repost, topics=[POSTS_TOPIC, user_topic(user.id)])
 
     return success_response(
         status_code=status.HTTP_201_CREATED,
@@ -148,10 +205,13 @@ async def repost(
 async def add_comment(
     id: str,
     comment: CommentCreateSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
-    new_comment = post_service.add_comment(db=db, user=user, post_id=id, content=comment.content)
+    new_comment = await async_post_service.add_comment(db=db, user=user, post_id=id, content=comment.content)
+
+    await manager.broadcast(new_comment, topics=[post_topic(id)])
+
     return success_response(
         status_code=status.HTTP_201_CREATED,
         message="Comment added successfully",
@@ -161,10 +221,10 @@ async def add_comment(
 @posts.get("/{id}/comments", status_code=status.HTTP_200_OK)
 async def get_comments(
     id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
-    comments = post_service.get_comments(db=db, post_id=id)
+    comments = await async_post_service.get_comments(db=db, post_id=id, user=user)
     return success_response(
         status_code=status.HTTP_200_OK,
         message="Comments retrieved successfully",
@@ -174,10 +234,10 @@ async def get_comments(
 @posts.post("/{id}/bookmark", status_code=status.HTTP_200_OK)
 async def toggle_bookmark(
     id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
-    result = post_service.toggle_bookmark(db=db, user=user, post_id=id)
+    result = await async_post_service.toggle_bookmark(db=db, user=user, post_id=id)
     message = "Post bookmarked" if result["bookmarked"] else "Post removed from bookmarks"
     return success_response(
         status_code=status.HTTP_200_OK,
@@ -1,14 +1,15 @@
 from fastapi import APIRouter, Depends, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.v1.schemas.post_comment import CreateCommentSchema, CommentResponse
 from api.v1.schemas.user import UserResponse
-from api.v1.services.post_comment import comment_service
-from api.v1.utils.dependencies import get_db
+from api.v1.services.post_comment import async_comment_service
+from api.v1.utils.dependencies import get_async_db
 from api.v1.services.user import user_service
 from api.v1.services.post import post_service
 from api.v1.models.user import User
 from api.v1.models.post import Post
 from api.v1.responses.success_response import success_response
+from api.v1.utils.websocket import manager, post_topic
 
 
 comments = APIRouter(prefix="/posts/{post_id}", tags=["comment"])
@@ -17,11 +18,11 @@ comments = APIRouter(prefix="/posts/{post_id}", tags=["comment"])
 @comments.get("/comments")
 async def get_comments(
     post_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
 
-    comments = comment_service.get_comments(db=db, post_id=post_id, user=user)
+    comments = await async_comment_service.get_comments(db=db, post_id=post_id, user=user)
 
     return success_response(
         status_code=status.HTTP_200_OK,
@@ -35,14 +36,16 @@ async def create_comment(
     post_id: str,
     comment: CreateCommentSchema,
     background_task: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
 
-    new_comment: CommentResponse = comment_service.create(
+    new_comment: CommentResponse = await async_comment_service.create(
         db=db, user=user, post_id=post_id, schema=comment, background_task=background_task
     )
 
+    await manager.broadcast(new_comment, topics=[post_topic(post_id)])
+
     return success_response(
         status_code=status.HTTP_201_CREATED,
         message="Comment successfully created",
@@ -55,11 +58,11 @@ async def update_comment(
     post_id: str,
     comment_id: str,
     comment: CreateCommentSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
 
-    updated_comment = comment_service.update(
+    updated_comment = await async_comment_service.update(
         db=db, user=user, post_id=post_id, comment_id=comment_id, schema=comment
     )
 
@@ -75,10 +78,10 @@ async def delete_comment(
     post_id: str,
     comment_id: str,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
 
-    comment_service.delete(db=db, user=user, post_id=post_id, comment_id=comment_id)
+    await async_comment_service.delete(db=db, user=user, post_id=post_id, comment_id=comment_id)
 
     return success_response(
         status_code=status.HTTP_204_NO_CONTENT, message="Comment deleted successfully"
@@ -1,25 +1,92 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends, Query, status, BackgroundTasks
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.v1.models.user import User
 from api.v1.responses.success_response import success_response
 from api.v1.schemas.user import UserUpdateSchema
-from api.v1.services.user import user_service
-from api.v1.utils.dependencies import get_db
+from api.v1.services.user import user_service, async_user_service, USER_TYPEAHEAD_SIZE
+from api.v1.services.suggestion import async_suggestion_service, SUGGESTION_CANDIDATES
+from api.v1.utils.dependencies import get_async_db
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 
 users = APIRouter(prefix="/users", tags=["user"])
 
 
+@users.get("", summary="Get list of users")
+async def get_users(
+    search: str = "",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    viewer: User | None = Depends(user_service.get_optional_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    users = await async_user_service.fetch_all(
+        db=db, search=search, limit=limit, cursor=cursor, viewer=viewer
+    )
+
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="User list fetched successfully",
+        data=users,
+    )
+
+
+@users.get("/typeahead", summary="Autocomplete usernames")
+async def typeahead(
+    q: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(USER_TYPEAHEAD_SIZE, ge=1, le=USER_TYPEAHEAD_SIZE),
+    viewer: User | None = Depends(user_service.get_optional_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    users = await async_user_service.typeahead(db=db, query=q, limit=limit, viewer=viewer)
+
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="Suggestions fetched successfully",
+        data=users,
+    )
+
+
+@users.get("/discover", summary="Get random users")
+async def discover(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    viewer: User | None = Depends(user_service.get_optional_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    users = await async_user_service.discover(db=db, limit=limit, viewer=viewer)
+
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="User list fetched successfully",
+        data=users,
+    )
+
+
+@users.get("/suggestions", summary="People you may know")
+async def suggestions(
+    limit: int = Query(10, ge=1, le=SUGGESTION_CANDIDATES),
+    user: User = Depends(user_service.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    users = await async_suggestion_service.suggestions(db=db, user=user, limit=limit)
+
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="Suggestions fetched successfully",
+        data=users,
+    )
+
+
 @users.patch("/{id}", summary="Update user profile")
 async def update_user_profile(
     id: str,
     body: UserUpdateSchema,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    data = user_service.update_user_profile(db=db, user=user, user_id=id, schema=body)
+    data = await async_user_service.update_user_profile(db=db, user=user, user_id=id, schema=body)
 
     return success_response(message="User profile updated successfully", data=data)
 
@@ -28,9 +95,9 @@ async def update_user_profile(
 async def get_user_profile(
     id: str,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    data = user_service.get_user_detail(db=db, user_id=id)
+    data = await async_user_service.get_user_detail(db=db, user_id=id, viewer=user)
 
     return success_response(
         message="User detail fetched successfully",
@@ -46,33 +113,22 @@ async def get_user_profile(
 async def delete_user_profile(
     id: str,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user_service.delete_user_profile(db=db, user=user, user_id=id)
+    await async_user_service.delete_user_profile(db=db, user=user, user_id=id)
 
     return success_response(status_code=204, message="User deleted successfully")
 
 
-@users.get("", summary="Get list of users")
-async def get_users(search: str = "", db: Session = Depends(get_db)):
-    users = user_service.fetch_all(db=db, search=search)
-
-    return success_response(
-        status_code=status.HTTP_200_OK,
-        message="User list fetched successfully",
-        data=users,
-    )
-
-
 @users.patch("/{followee_id}/follow", summary="Follow a particular user")
 async def follow(
     followee_id: str,
     background_task: BackgroundTasks = BackgroundTasks(),
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
 
-    user_service.follow_user(db=db, user=user, user_id=followee_id, background_task=background_task)
+    await async_user_service.follow_user(db=db, user=user, user_id=followee_id, background_task=background_task)
 
     return success_response(
         status_code=200,
@@ -85,10 +141,10 @@ async def unfollow(
     followee_id: str,
     background_task: BackgroundTasks = BackgroundTasks(),
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
 
-    user_service.unfollow_user(db=db, user_id=followee_id, user=user, background_task=background_task)
+    await async_user_service.unfollow_user(db=db, user_id=followee_id, user=user, background_task=background_task)
 
     return success_response(
         status_code=200,
@@ -99,27 +155,33 @@ async def unfollow(
 @users.get("/{user_id}/followers", summary="List of folllowers")
 async def followers(
     user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
 
-    followers = user_service.followers(db=db, user=user)
+    followers = await async_user_service.followers(
+        db=db, user_id=user_id, viewer=user, limit=limit, cursor=cursor
+    )
 
     return success_response(
         status_code=200, message="Followers successfully returned", data=followers
     )
 
 
-@users.get(
-    "/{user_id}/followings", summary="List of user the current user is following"
-)
+@users.get("/{user_id}/followings", summary="List of users the user is following")
 async def followings(
     user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
 
-    followings = user_service.followings(db=db, user=user)
+    followings = await async_user_service.followings(
+        db=db, user_id=user_id, viewer=user, limit=limit, cursor=cursor
+    )
 
     return success_response(
         status_code=200,
@@ -132,10 +194,10 @@ async def followings(
 async def follow_user_endpoint(
     user_id: str,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     background_task: BackgroundTasks = BackgroundTasks(),
 ):
-    user_service.follow_user(db=db, user_id=user_id, user=user, background_task=background_task)
+    await async_user_service.follow_user(db=db, user_id=user_id, user=user, background_task=background_task)
     return success_response(
         status_code=200, message="User followed successfully", data=None
     )
@@ -145,10 +207,10 @@ async def follow_user_endpoint(
 async def unfollow_user_endpoint(
     user_id: str,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     background_task: BackgroundTasks = BackgroundTasks(),
 ):
-    user_service.unfollow_user(db=db, user_id=user_id, user=user, background_task=background_task)
+    await async_user_service.unfollow_user(db=db, user_id=user_id, user=user, background_task=background_task)
     return success_response(
         status_code=200, message="User unfollowed successfully", data=None
     )
@@ -158,26 +220,26 @@ async def unfollow_user_endpoint(
 async def block_user(
     user_id: str,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return user_service.block_user(db=db, user_id=user_id, current_user=user)
+    return await async_user_service.block_user(db=db, user_id=user_id, current_user=user)
 
 @users.delete("/{user_id}/unblock", summary="Unblock a user")
 async def unblock_user(
     user_id: str,
     user: User = Depends(user_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return user_service.unblock_user(db=db, user_id=user_id, current_user=user)
+    return await async_user_service.unblock_user(db=db, user_id=user_id, current_user=user)
 
 @users.get("/{user_id}/bookmarks", summary="Get user bookmarks")
 async def get_bookmarks(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(user_service.get_current_user),
 ):
-    from api.v1.services.post import post_service
-    bookmarks = post_service.get_bookmarks(db=db, user_id=user_id)
+    from api.v1.services.post import async_post_service
+    bookmarks = await async_post_service.get_bookmarks(db=db, user_id=user_id)
     return success_response(
         status_code=status.HTTP_200_OK,
         message="Bookmarks retrieved successfully",
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from api.v1.models.notification import NotificationStatus, NotificationType
+
+
+class NotificationResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    message: str
+    status: NotificationStatus
+    type: NotificationType | None = None
+    target_id: str | None = None
+    actor_count: int = 1
+    actors: list | None = None
+    created_at: datetime
+    last_actor_at: datetime | None = None
+
+
+class MarkReadSchema(BaseModel):
+
+    # newest notification to mark read, every unread one when omitted
+    up_to: str | None = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, UUID4, Field
-from api.v1.schemas.user import UserResponse
+from api.v1.schemas.user import UserSummaryResponse
 from datetime import datetime
 from typing import Optional
 
@@ -26,11 +26,17 @@ class PostResponse(CreatePostSchema):
     user_id: UUID4 = Field(exclude=True)
     created_at: datetime
     updated_at: datetime
-    user: UserResponse | None = Field(default=None, serialization_alias="original_post_owner")
+    user: UserSummaryResponse | None = Field(default=None, serialization_alias="original_post_owner")
+    like_count: int = 0
+    comment_count: int = 0
+    repost_count: int = 0
+    bookmark_count: int = 0
 
 
 class PostResponseSchema(PostResponse):
     original_post: PostResponse | None = Field(default=None, serialization_alias="original_post")
+    liked_by_me: bool = False
+    bookmarked_by_me: bool = False
 
 
 class LikeResponse(BaseModel):
@@ -40,7 +46,7 @@ class LikeResponse(BaseModel):
     post_id: str
     user_id: str
     liked: bool
-    user: UserResponse = None
+    user: UserSummaryResponse = None
 
 
 class RepostCreate(BaseModel):
@@ -57,7 +63,7 @@ class RepostResponse(BaseModel):
     content: str | None = None
     created_at: datetime
     updated_at: datetime
-    user: UserResponse = Field(default=None, serialization_alias="post_owner")
+    user: UserSummaryResponse = Field(default=None, serialization_alias="post_owner")
     post: PostResponse = Field(default=None, serialization_alias="original_post")
 
 class CommentCreateSchema(BaseModel):
@@ -71,7 +77,7 @@ class CommentResponseSchema(BaseModel):
     user_id: str
     content: str
     created_at: datetime
-    user: UserResponse | None = None
+    user: UserSummaryResponse | None = None
 
 class BookmarkResponseSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from api.v1.schemas.user import UserResponse
+from api.v1.schemas.user import UserSummaryResponse
 
 
 class CreateCommentSchema(BaseModel):
@@ -17,7 +17,7 @@ class CommentResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     post_id: str
-    user: UserResponse
+    user: UserSummaryResponse
 
 
 class UpdateCommentSchema(BaseModel):
@@ -27,7 +27,7 @@ class UserLogin(BaseModel):
     password: str
 
 
-# Used for comment to provide extra details about user
+# Returned with access tokens on signup, login and profile updates
 class UserResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -35,6 +35,22 @@ class UserResponse(BaseModel):
     username: str
 
 
+# Embedded wherever a user is shown, built from columns of the user row alone
+class UserSummaryResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    username: str
+    avatar_url: Optional[str] = None
+    follower_count: int = 0
+    following_count: int = 0
+
+
+class UserSuggestionResponse(UserSummaryResponse):
+    # followings of the viewer who follow this user
+    mutual_count: int = 0
+
+
 class UserLoginSchema(BaseModel):
     id: str
     username: str
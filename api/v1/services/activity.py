@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
 from api.v1.models.activity import Activity, ActionType
+from api.v1.services.async_service import AsyncService
 
 class ActivityService:
-    def create_activity(self, db: Session, actor_id: str, action_type: ActionType, message: str, target_id: str = None):
+    def create_activity(self, db: Session, actor_id: str, action_type: ActionType, message: str, target_id: str = None, commit: bool = True):
         activity = Activity(
             actor_id=actor_id,
             action_type=action_type,
@@ -10,11 +11,16 @@ class ActivityService:
             target_id=target_id
         )
         db.add(activity)
-        db.commit()
-        db.refresh(activity)
+
+        # commit=False leaves the activity in the caller's transaction
+        if commit:
+            db.commit()
+            db.refresh(activity)
+
         return activity
 
     def get_feed(self, db: Session, limit: int = 50, offset: int = 0):
         return db.query(Activity).order_by(Activity.created_at.desc()).offset(offset).limit(limit).all()
 
 activity_service = ActivityService()
+async_activity_service = AsyncService(activity_service)
@@ -0,0 +1,30 @@
+from functools import wraps
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class AsyncService:
+    """Exposes the methods of a service as coroutines running on an `AsyncSession`
+
+    Each call goes through `AsyncSession.run_sync`, so the service code (lazy
+    loads included) keeps using the `Session` api while every query is awaited
+    on the event loop by the asyncio driver instead of blocking it.
+
+    :usage: feeds = await async_post_service.get_feeds(db=db, user=user)
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    def __getattr__(self, name: str):
+        method = getattr(self.service, name)
+
+        if not callable(method):
+            return method
+
+        @wraps(method)
+        async def run(*args, db: AsyncSession, **kwargs):
+            return await db.run_sync(
+                lambda session: method(*args, db=session, **kwargs)
+            )
+
+        return run
@@ -0,0 +1,56 @@
+import os
+from typing import FrozenSet
+from dotenv import load_dotenv
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+from api.v1.models.block import Block
+from api.v1.utils.cache import TTLCache
+
+load_dotenv()
+
+# block sets are cached per worker, blocks made through another worker apply
+# here once the entry expires
+BLOCK_CACHE_TTL_SECONDS = int(os.environ.get("BLOCK_CACHE_TTL_SECONDS", 60))
+BLOCK_CACHE_SIZE = int(os.environ.get("BLOCK_CACHE_SIZE", 10000))
+
+
+class BlockService:
+    """Caches, per user, the ids of the users they blocked or are blocked by
+
+    Read paths filter with these sets instead of loading `User.blocks` and
+    `User.blocked_by` as full users on every request.
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(maxsize=BLOCK_CACHE_SIZE, ttl=BLOCK_CACHE_TTL_SECONDS)
+
+    def blocked_ids(self, db: Session, user_id: str) -> FrozenSet[str]:
+        """Returns the users hidden from `user_id`, in either direction"""
+
+        cached = self.cache.get(user_id)
+
+        if cached is not None:
+            return cached
+
+        blocked = frozenset(
+            db.execute(
+                union(
+                    select(Block.blocked_id).where(Block.blocker_id == user_id),
+                    select(Block.blocker_id).where(Block.blocked_id == user_id),
+                )
+            ).scalars()
+        )
+
+        self.cache.set(user_id, blocked)
+
+        return blocked
+
+    def is_blocked(self, db: Session, user_id: str, other_id: str) -> bool:
+        return other_id in self.blocked_ids(db=db, user_id=user_id)
+
+    def invalidate(self, *user_ids: str):
+        for user_id in user_ids:
+            self.cache.delete(user_id)
+
+
+block_service = BlockService()
@@ -0,0 +1,336 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, event, update
+from sqlalchemy.orm import Session, joinedload
+from api.v1.models.hashtag import Hashtag, HashtagUsage, PostHashtag
+from api.v1.models.post import Post
+from api.v1.models.user import User
+from api.v1.schemas.post import PostResponseSchema
+from api.v1.services.async_service import AsyncService
+from api.v1.services.block import block_service
+from api.v1.utils.database import insert_or_ignore
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, keyset_before, paginate
+
+load_dotenv()
+
+# width of the usage counters trending scores are computed from
+HASHTAG_BUCKET_SECONDS = int(os.environ.get("HASHTAG_BUCKET_SECONDS", 3600))
+
+# usage older than this no longer counts towards trending, and is pruned
+HASHTAG_TRENDING_WINDOW_HOURS = int(os.environ.get("HASHTAG_TRENDING_WINDOW_HOURS", 24))
+
+# age at which a use weighs half as much in the trending score
+HASHTAG_TRENDING_HALF_LIFE_HOURS = float(os.environ.get("HASHTAG_TRENDING_HALF_LIFE_HOURS", 6))
+
+# seconds between two flushes of the in-memory usage counters
+HASHTAG_FLUSH_INTERVAL_SECONDS = int(os.environ.get("HASHTAG_FLUSH_INTERVAL_SECONDS", 60))
+
+# a tag fits the 55 characters of hashtag.tag, longer ones are not tags at
+# all rather than cut short
+HASHTAG_PATTERN = re.compile(r"(?<![\w#])#(\w{1,55})(?!\w)")
+
+# session.info key of the uses indexed in a transaction, counted once it commits
+PENDING_USES_KEY = "hashtag_uses"
+
+
+def bucket_start(moment: datetime) -> datetime:
+    seconds = int(moment.timestamp()) // HASHTAG_BUCKET_SECONDS * HASHTAG_BUCKET_SECONDS
+
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+class HashtagService:
+    """Indexes the hashtags of posts and ranks trending ones"""
+
+    def __init__(self):
+        # uses per (tag, bucket) committed since the last flush to hashtag_usage
+        self._pending: Counter = Counter()
+        self._window: Dict[str, Dict[datetime, int]] = {}
+        self._window_loaded = False
+        self._lock = threading.Lock()
+
+    def extract(self, content: str | None) -> List[str]:
+        """Returns the distinct, lowercased hashtags of a text in order of use"""
+
+        if not content:
+            return []
+
+        return list(dict.fromkeys(tag.lower() for tag in HASHTAG_PATTERN.findall(content)))
+
+    def index_post(self, db: Session, post: Post):
+        """Brings the post's hashtag associations in line with its content
+
+        Runs in the caller's transaction, which has to flush the post first.
+        """
+
+        tags = set(self.extract(post.content))
+
+        current = dict(
+            db.query(Hashtag.tag, PostHashtag.id)
+            .join(PostHashtag, PostHashtag.hashtag_id == Hashtag.id)
+            .filter(PostHashtag.post_id == post.id)
+            .all()
+        )
+
+        added = tags - current.keys()
+        removed = current.keys() - tags
+
+        if removed:
+            db.execute(
+                delete(PostHashtag).where(
+                    PostHashtag.id.in_([current[tag] for tag in removed])
+                )
+            )
+            db.execute(
+                update(Hashtag)
+                .where(Hashtag.tag.in_(removed))
+                .values(usage=Hashtag.usage - 1)
+                .execution_options(synchronize_session=False)
+            )
+
+        if not added:
+            return
+
+        db.execute(
+            insert_or_ignore(db, Hashtag).values([{"tag": tag, "usage": 0} for tag in added])
+        )
+
+        hashtag_ids = dict(
+            db.query(Hashtag.tag, Hashtag.id).filter(Hashtag.tag.in_(added)).all()
+        )
+
+        db.execute(
+            update(Hashtag)
+            .where(Hashtag.tag.in_(added))
+            .values(usage=Hashtag.usage + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+        db.add_all(
+            PostHashtag(
+                hashtag_id=hashtag_ids[tag], post_id=post.id, created_at=post.created_at
+            )
+            for tag in added
+        )
+
+        bucket = bucket_start(datetime.now(timezone.utc))
+        uses = db.info.setdefault(PENDING_USES_KEY, {}).setdefault(self, Counter())
+
+        for tag in added:
+            uses[(tag, bucket)] += 1
+
+    def count_uses(self, uses: Counter):
+        with self._lock:
+            self._pending.update(uses)
+
+    def remove_post(self, db: Session, post_id: str):
+        hashtag_ids = db.query(PostHashtag.hashtag_id).filter(PostHashtag.post_id == post_id)
+
+        db.execute(
+            update(Hashtag)
+            .where(Hashtag.id.in_(hashtag_ids.scalar_subquery()))
+            .values(usage=Hashtag.usage - 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(delete(PostHashtag).where(PostHashtag.post_id == post_id))
+
+    def flush(self, db: Session) -> int:
+        """Writes the counted uses to hashtag_usage and reloads the window
+
+        Scheduled every HASHTAG_FLUSH_INTERVAL_SECONDS, returns the number of
+        (tag, bucket) counters written.
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+
+        try:
+            if pending:
+                self._write_usage(db=db, pending=pending)
+
+            since = datetime.now(timezone.utc) - timedelta(hours=HASHTAG_TRENDING_WINDOW_HOURS)
+            db.execute(delete(HashtagUsage).where(HashtagUsage.bucket_start < since))
+            db.commit()
+        except Exception:
+            db.rollback()
+
+            # counted again at the next flush
+            with self._lock:
+                self._pending.update(pending)
+            raise
+
+        self.load_window(db=db)
+
+        return len(pending)
+
+    def _write_usage(self, db: Session, pending: Counter):
+        tags = {tag for tag, _ in pending}
+        hashtag_ids = dict(
+            db.query(Hashtag.tag, Hashtag.id).filter(Hashtag.tag.in_(tags)).all()
+        )
+
+        for (tag, bucket), count in pending.items():
+            if tag not in hashtag_ids:
+                continue
+
+            db.execute(
+                insert_or_ignore(db, HashtagUsage).values(
+                    hashtag_id=hashtag_ids[tag], bucket_start=bucket, count=0
+                )
+            )
+            db.execute(
+                update(HashtagUsage)
+                .where(
+                    HashtagUsage.hashtag_id == hashtag_ids[tag],
+                    HashtagUsage.bucket_start == bucket,
+                )
+                .values(count=HashtagUsage.count + count)
+            )
+
+    def load_window(self, db: Session):
+        """Loads the usage buckets of the trending window into memory"""
+
+        since = datetime.now(timezone.utc) - timedelta(hours=HASHTAG_TRENDING_WINDOW_HOURS)
+
+        rows = (
+            db.query(Hashtag.tag, HashtagUsage.bucket_start, HashtagUsage.count)
+            .join(Hashtag, Hashtag.id == HashtagUsage.hashtag_id)
+            .filter(HashtagUsage.bucket_start >= since)
+            .all()
+        )
+
+        window: Dict[str, Dict[datetime, int]] = {}
+
+        for tag, bucket, count in rows:
+            # sqlite hands back naive datetimes
+            bucket = bucket if bucket.tzinfo else bucket.replace(tzinfo=timezone.utc)
+            window.setdefault(tag, {})[bucket] = count
+
+        with self._lock:
+            self._window = window
+            self._window_loaded = True
+
+    def trending(self, db: Session, limit: int = 10):
+        """Ranks hashtags by their uses in the window, decayed by age"""
+
+        if not self._window_loaded:
+            self.load_window(db=db)
+
+        now = datetime.now(timezone.utc)
+        since = now - timedelta(hours=HASHTAG_TRENDING_WINDOW_HOURS)
+        decay = math.log(2) / (HASHTAG_TRENDING_HALF_LIFE_HOURS * 3600)
+
+        with self._lock:
+            counts: Counter = Counter()
+
+            for tag, buckets in self._window.items():
+                for bucket, count in buckets.items():
+                    counts[(tag, bucket)] += count
+
+            counts.update(self._pending)
+
+        scores: Dict[str, float] = {}
+        uses: Counter = Counter()
+
+        for (tag, bucket), count in counts.items():
+            if bucket < bucket_start(since):
+                continue
+
+            age = max((now - bucket).total_seconds(), 0)
+            scores[tag] = scores.get(tag, 0) + count * math.exp(-decay * age)
+            uses[tag] += count
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+        return [
+            {"tag": tag, "score": round(score, 3), "uses": uses[tag]}
+            for tag, score in ranked
+        ]
+
+    def get_posts(
+        self,
+        db: Session,
+        user: User,
+        tag: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """Returns a page of the posts using a hashtag, newest first"""
+
+        hashtag = db.query(Hashtag).filter(Hashtag.tag == tag.lstrip("#").lower()).first()
+
+        if not hashtag:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Hashtag not found"
+            )
+
+        entries = db.query(PostHashtag.post_id, PostHashtag.created_at).filter(
+            PostHashtag.hashtag_id == hashtag.id
+        )
+
+        excluded_user_ids = block_service.blocked_ids(db=db, user_id=user.id)
+
+        if excluded_user_ids:
+            entries = entries.join(Post, Post.id == PostHashtag.post_id).filter(
+                Post.user_id.notin_(excluded_user_ids)
+            )
+
+        if cursor:
+            entries = entries.filter(
+                keyset_before(PostHashtag.created_at, PostHashtag.post_id, cursor)
+            )
+
+        rows = (
+            entries.order_by(PostHashtag.created_at.desc(), PostHashtag.post_id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+        rows, next_cursor = paginate(
+            rows, limit, key=lambda row: (row.created_at, row.post_id)
+        )
+
+        post_ids = [row.post_id for row in rows]
+
+        posts = {
+            post.id: post
+            for post in db.query(Post)
+            .options(joinedload(Post.original_post), joinedload(Post.user))
+            .filter(Post.id.in_(post_ids))
+        }
+
+        items = [
+            PostResponseSchema.model_validate(posts[post_id])
+            for post_id in post_ids
+            if post_id in posts
+        ]
+
+        # imported here, the post service depends on this module
+        from api.v1.services.post import post_service
+
+        post_service.attach_viewer_state(db=db, user=user, posts=items)
+
+        return jsonable_encoder({"items": items, "next_cursor": next_cursor})
+
+
+hashtag_service = HashtagService()
+async_hashtag_service = AsyncService(hashtag_service)
+
+
+@event.listens_for(Session, "after_commit")
+def count_committed_uses(session: Session):
+    for service, uses in session.info.pop(PENDING_USES_KEY, {}).items():
+        service.count_uses(uses)
+
+
+@event.listens_for(Session, "after_rollback")
+def drop_rolled_back_uses(session: Session):
+    session.info.pop(PENDING_USES_KEY, None)
@@ -1,30 +1,385 @@
-from fastapi import BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import Dict
 import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from fastapi import BackgroundTasks, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Tuple
 from api.v1.models.user import User
-from api.v1.models.notification import Notification
+from api.v1.models.notification import Notification, NotificationStatus, NotificationType
+from api.v1.schemas.notification import NotificationResponse
+from api.v1.services.async_service import AsyncService
+from api.v1.utils.broker import Broker, broker
+from api.v1.utils.database import AsyncSessionLocal
+from api.v1.utils.metrics import registry
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, keyset_before, paginate
+
+load_dotenv()
+
+# most notifications replayed to a client reconnecting with Last-Event-ID
+NOTIFICATION_REPLAY_LIMIT = int(os.environ.get("NOTIFICATION_REPLAY_LIMIT", 100))
+
+# an unread group keeps absorbing notifications until it sees no new one
+# for this many seconds
+NOTIFICATION_GROUP_WINDOW_SECONDS = int(os.environ.get("NOTIFICATION_GROUP_WINDOW_SECONDS", 3600))
+
+# actors remembered on a group, the most recent one is named in its message
+NOTIFICATION_SAMPLE_ACTORS = int(os.environ.get("NOTIFICATION_SAMPLE_ACTORS", 10))
+
+# seconds an sse push waits for further updates of the same group
+NOTIFICATION_PUSH_DELAY_SECONDS = float(os.environ.get("NOTIFICATION_PUSH_DELAY_SECONDS", 1))
+
+SSE_CONNECTIONS = registry.gauge("sse_connections", "Open notification event streams")
+
+PUSH_DURATION = registry.histogram(
+    "notification_push_duration_seconds",
+    "Time taken to publish a notification to the sse streams, after its push delay",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+NOTIFICATION_VERBS = {
+    NotificationType.like: "liked your post",
+    NotificationType.unlike: "unliked your post",
+    NotificationType.comment: "commented on your post",
+    NotificationType.repost: "shared your post",
+    NotificationType.follow: "followed you",
+    NotificationType.unfollow: "unfollowed you",
+}
+
+
+def encode_event(event_id: str | None, message: str) -> str:
+    return json.dumps({"id": event_id, "message": message})
+
+
+def coalesce_events(events: List[str]) -> str:
+    """Merges the pending events of a full sse queue into a single one
+
+    The merged event carries the id of the newest event, so a client that
+    reconnects afterwards resumes after everything it was told about.
+    """
+
+    last = json.loads(events[-1])
+
+    return encode_event(last["id"], f"You have {len(events)} new notifications")
 
 
 class NotificationService:
-    def __init__(self):
+    def __init__(self, broker: Broker, session_factory=AsyncSessionLocal):
+
+        self.broker = broker
+        self.session_factory = session_factory
+        # latest (user_id, message) of the groups waiting to be pushed
+        self._pending_pushes: Dict[str, Tuple[str, str]] = {}
+        self._push_tasks = set()
+
+    def create(self, db: Session, user_id: str, message: str) -> Notification:
+        """Records an ungrouped notification, e.g. for account events
+
+        Like `notify`, it joins the caller's transaction.
+        """
+
+        notification = Notification(user_id=user_id, message=message)
+
+        db.add(notification)
+        self._count_unread(db=db, user_id=user_id, delta=1)
+
+        return notification
+
+    def notify(
+        self,
+        db: Session,
+        user_id: str,
+        type: NotificationType,
+        actor: User,
+        target_id: str | None = None,
+    ) -> Notification:
+        """Records that `actor` did `type` to the user, e.g. liked their post
+
+        The notification is folded into the user's unread group for the same
+        (type, target) when one was active within the group window, so a
+        viral post keeps a single "alice and 41 others liked your post" row.
+        The row is locked until the caller commits, which it has to do.
+        Actors are counted once while they are among the sampled actors.
+        """
+
+        now = datetime.now(timezone.utc)
+        since = now - timedelta(seconds=NOTIFICATION_GROUP_WINDOW_SECONDS)
+
+        notification = (
+            db.query(Notification)
+            .filter(
+                Notification.user_id == user_id,
+                Notification.type == type,
+                Notification.target_id == target_id
+                if target_id is not None
+                else Notification.target_id.is_(None),
+                Notification.status == NotificationStatus.unread,
+                Notification.last_actor_at >= since,
+            )
+            .order_by(Notification.last_actor_at.desc())
+            .with_for_update()
+            .first()
+        )
+
+        sample = {"id": actor.id, "username": actor.username}
+
+        if notification is None:
+            notification = Notification(
+                user_id=user_id,
+                type=type,
+                target_id=target_id,
+                actor_count=1,
+                actors=[sample],
+                message=self.group_message(type, actor.username, 1),
+                created_at=now,
+                last_actor_at=now,
+            )
+            db.add(notification)
+            db.flush()
+
+            self._count_unread(db=db, user_id=user_id, delta=1)
+
+            return notification
+
+        actors = notification.actors or []
+
+        if all(a["id"] != actor.id for a in actors):
+            notification.actor_count += 1
+
+        notification.actors = [sample] + [a for a in actors if a["id"] != actor.id][
+            : NOTIFICATION_SAMPLE_ACTORS - 1
+        ]
+        notification.message = self.group_message(
+            type, actor.username, notification.actor_count
+        )
+        # moves the group back to the top of the inbox and into sse replays,
+        # created_at is left alone
+        notification.last_actor_at = now
+
+        return notification
+
+    def group_message(self, type: NotificationType, username: str, actor_count: int) -> str:
+        others = actor_count - 1
+        verb = NOTIFICATION_VERBS[type]
+
+        if not others:
+            return f"{username} {verb}"
+
+        return f"{username} and {others} other{'s' if others > 1 else ''} {verb}"
+
+    async def push(self, user_id: str, message: str, event_id: str):
+        """Publishes a notification group, coalescing its updates
+
+        Updates of the same group arriving within the push delay go out as a
+        single event carrying the latest message.
+        """
+
+        if NOTIFICATION_PUSH_DELAY_SECONDS <= 0:
+            return await self.publish(user_id, message, event_id)
 
-        self.user_event_queues: Dict[str, asyncio.Queue] = {}
+        scheduled = event_id in self._pending_pushes
+        self._pending_pushes[event_id] = (user_id, message)
 
-    async def event_generator(self, user_id: str):
-        if user_id not in self.user_event_queues:
-            self.user_event_queues[user_id] = asyncio.Queue()
+        if not scheduled:
+            task = asyncio.create_task(self._push_later(event_id))
+            self._push_tasks.add(task)
+            task.add_done_callback(self._push_tasks.discard)
 
-        while True:
-            event = await self.user_event_queues[user_id].get()
-            yield f"data: {event}"
+    async def _push_later(self, event_id: str):
+        await asyncio.sleep(NOTIFICATION_PUSH_DELAY_SECONDS)
 
-    def notifications(self, user: User, db: Session):
+        user_id, message = self._pending_pushes.pop(event_id)
+        await self.publish(user_id, message, event_id)
+
+    async def publish(self, user_id: str, message: str, event_id: str | None = None):
+        """Delivers a message to the user's sse streams, whichever worker holds them
+
+        :param event_id: id of the stored notification, sent as the sse event id
+        """
+
+        with PUSH_DURATION.time():
+            await self.broker.publish(user_id, encode_event(event_id, message))
+
+    async def event_generator(self, user_id: str, last_event_id: str | None = None):
+        SSE_CONNECTIONS.inc()
+
+        try:
+            async for event in self._events(user_id, last_event_id):
+                yield event
+        finally:
+            SSE_CONNECTIONS.dec()
+
+    async def _events(self, user_id: str, last_event_id: str | None):
+        async with self.broker.subscribe(user_id, merge=coalesce_events) as queue:
+            replayed = set()
+
+            # subscribed first so nothing published during the replay is lost
+            if last_event_id:
+                async with self.session_factory() as db:
+                    missed = await db.run_sync(
+                        lambda session: self.missed_notifications(
+                            db=session, user_id=user_id, last_event_id=last_event_id
+                        )
+                    )
+
+                for notification in missed:
+                    replayed.add((notification.id, notification.message))
+                    yield self.format_event(notification.id, notification.message)
+
+            while True:
+                event = json.loads(await queue.get())
+
+                # a grouped notification keeps its id, only skip exact repeats
+                if (event["id"], event["message"]) in replayed:
+                    continue
+
+                yield self.format_event(event["id"], event["message"])
+
+    def format_event(self, event_id: str | None, message: str) -> str:
+        if event_id is None:
+            return f"data: {message}\n\n"
+
+        return f"id: {event_id}\ndata: {message}\n\n"
+
+    def missed_notifications(
+        self,
+        db: Session,
+        user_id: str,
+        last_event_id: str,
+        limit: int = NOTIFICATION_REPLAY_LIMIT,
+    ):
+        """Notifications stored or regrouped after the one a reconnecting client
+        saw last
+        """
+
+        last = (
+            db.query(Notification.last_actor_at, Notification.id)
+            .filter(Notification.id == last_event_id, Notification.user_id == user_id)
+            .first()
+        )
+
+        if not last:
+            return []
+
+        return (
+            db.query(Notification)
+            .filter(
+                Notification.user_id == user_id,
+                or_(
+                    Notification.last_actor_at > last.last_actor_at,
+                    and_(
+                        Notification.last_actor_at == last.last_actor_at,
+                        Notification.id > last.id,
+                    ),
+                ),
+            )
+            .order_by(Notification.last_actor_at, Notification.id)
+            .limit(limit)
+            .all()
+        )
+
+    def notifications(
+        self,
+        user: User,
+        db: Session,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """Returns a page of the user's inbox, most recently active first"""
+
+        query = db.query(Notification).filter(Notification.user_id == user.id)
+
+        if cursor:
+            query = query.filter(
+                keyset_before(Notification.last_actor_at, Notification.id, cursor)
+            )
+
+        # fetch one extra row to know whether there is a next page
         notifications = (
-            db.query(Notification).filter(Notification.user_id == user.id).all()
+            query.order_by(Notification.last_actor_at.desc(), Notification.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+        notifications, next_cursor = paginate(
+            notifications, limit, key=lambda n: (n.last_actor_at, n.id)
+        )
+
+        items = [NotificationResponse.model_validate(n) for n in notifications]
+
+        return jsonable_encoder({"items": items, "next_cursor": next_cursor})
+
+    def unread_count(self, user: User, db: Session) -> int:
+        return (
+            db.query(User.unread_notification_count).filter(User.id == user.id).scalar()
+            or 0
+        )
+
+    def mark_read(self, user: User, db: Session, up_to: str | None = None) -> int:
+        """Marks the user's unread notifications read with a single UPDATE
+
+        With `up_to`, only that notification and the ones older than it are
+        marked. Returns the number of notifications marked read.
+        """
+
+        condition = and_(
+            Notification.user_id == user.id,
+            Notification.status == NotificationStatus.unread,
+        )
+
+        if up_to:
+            last = (
+                db.query(Notification.last_actor_at, Notification.id)
+                .filter(Notification.id == up_to, Notification.user_id == user.id)
+                .first()
+            )
+
+            if not last:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Notification not found",
+                )
+
+            condition = and_(
+                condition,
+                or_(
+                    Notification.last_actor_at < last.last_actor_at,
+                    and_(
+                        Notification.last_actor_at == last.last_actor_at,
+                        Notification.id <= last.id,
+                    ),
+                ),
+            )
+
+        marked = db.execute(
+            update(Notification)
+            .where(condition)
+            .values(status=NotificationStatus.read)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if marked:
+            self._count_unread(db=db, user_id=user.id, delta=-marked)
+
+        db.commit()
+
+        return marked
+
+    def _count_unread(self, db: Session, user_id: str, delta: int):
+        db.query(User).filter(User.id == user_id).update(
+            {User.unread_notification_count: User.unread_notification_count + delta},
+            synchronize_session=False,
         )
 
-        return notifications
 
+notification_service = NotificationService(broker=broker)
+async_notification_service = AsyncService(notification_service)
 
-notification_service = NotificationService()
+registry.gauge(
+    "notification_pending_pushes",
+    "Notification groups waiting for their delayed sse push",
+    callback=lambda: len(notification_service._pending_pushes),
+)
@@ -1,7 +1,9 @@
-
+import os
+from dotenv import load_dotenv
 from fastapi import HTTPException, status, BackgroundTasks
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import delete, func, literal, or_, select
+from sqlalchemy.orm import Session, aliased, joinedload
 from api.v1.models.post import Post, Like, Bookmark
 from api.v1.models.post_comment import PostComment
 from api.v1.models.user import User
@@ -16,13 +18,32 @@ from api.v1.schemas.post import (
     CommentResponseSchema,
     BookmarkResponseSchema
 )
-from api.v1.schemas.user import UserResponse
 from api.v1.services.user import user_service
-from api.v1.models.notification import Notification
+from api.v1.models.notification import NotificationType
 from api.v1.services.notification import notification_service
 from api.v1.services.activity import activity_service
+from api.v1.services.timeline import timeline_service
+from api.v1.services.hashtag import hashtag_service
+from api.v1.services.search import search_service
+from api.v1.services.block import block_service
 from api.v1.models.activity import ActionType
 from api.v1.models.user import RoleEnum
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, keyset_before, paginate
+from api.v1.utils.database import insert_or_ignore
+from api.v1.services.async_service import AsyncService
+
+load_dotenv()
+
+# number of posts recomputed per transaction by reconcile_counters
+POST_COUNTER_BATCH_SIZE = int(os.environ.get("POST_COUNTER_BATCH_SIZE", 1000))
+
+# seconds between two reconcile_counters runs
+POST_COUNTER_RECONCILE_INTERVAL_SECONDS = int(
+    os.environ.get("POST_COUNTER_RECONCILE_INTERVAL_SECONDS", 6 * 3600)
+)
+
+Repost = aliased(Post)
+
 
 class PostService:
     def get_post(self, db: Session, user: User, post_id: str):
@@ -31,26 +52,112 @@ class PostService:
                 joinedload(Post.user)
                 ).filter(Post.id == post_id).first()
 
-        return jsonable_encoder(PostResponseSchema.model_validate(post))
+        post_response = PostResponseSchema.model_validate(post)
+        self.attach_viewer_state(db=db, user=user, posts=[post_response])
+
+        return jsonable_encoder(post_response)
+
+
+    def get_viewer_state(self, db: Session, user: User, post_ids):
+        """Returns the ids of the posts the user liked and bookmarked
+
+        Both memberships are resolved for a whole page with a single query
+        over the (user_id, post_id) unique indexes of like and bookmark.
+        """
+
+        post_ids = set(post_ids)
+
+        if not post_ids:
+            return set(), set()
+
+        liked = select(Like.post_id, literal("like").label("kind")).where(
+            Like.user_id == user.id, Like.post_id.in_(post_ids)
+        )
+        bookmarked = select(Bookmark.post_id, literal("bookmark").label("kind")).where(
+            Bookmark.user_id == user.id, Bookmark.post_id.in_(post_ids)
+        )
+
+        liked_ids, bookmarked_ids = set(), set()
+
+        for row in db.execute(liked.union_all(bookmarked)):
+            if row.kind == "like":
+                liked_ids.add(row.post_id)
+            else:
+                bookmarked_ids.add(row.post_id)
+
+        return liked_ids, bookmarked_ids
+
+
+    def attach_viewer_state(self, db: Session, user: User, posts):
+        """Sets liked_by_me and bookmarked_by_me on validated PostResponseSchemas"""
 
+        liked_ids, bookmarked_ids = self.get_viewer_state(
+            db=db, user=user, post_ids=[str(post.id) for post in posts]
+        )
+
+        for post in posts:
+            post.liked_by_me = str(post.id) in liked_ids
+            post.bookmarked_by_me = str(post.id) in bookmarked_ids
+
+        return posts
 
-    def get_feeds(self, db: Session, user: User):
-        # Get list of users who blocked current user or are blocked by current user
-        blocked_users = [u.id for u in user.blocks]
-        blocked_by_users = [u.id for u in user.blocked_by]
-        excluded_user_ids = set(blocked_users + blocked_by_users)
 
-        posts = db.query(Post).filter(Post.user_id.notin_(excluded_user_ids)).options(
-            joinedload(Post.original_post),
-            joinedload(Post.user)
-        ).all()
+    def get_posts_by_ids(self, db: Session, post_ids) -> dict:
+        """Loads many posts and their owners in one query, keyed by id"""
+
+        post_ids = set(post_ids)
+
+        if not post_ids:
+            return {}
+
+        posts = (
+            db.query(Post)
+            .options(joinedload(Post.original_post), joinedload(Post.user))
+            .filter(Post.id.in_(post_ids))
+            .all()
+        )
+
+        return {post.id: post for post in posts}
+
+
+    def get_feeds(
+        self,
+        db: Session,
+        user: User,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        query = db.query(Post)
+
+        # users who blocked the current user or are blocked by them
+        excluded_user_ids = block_service.blocked_ids(db=db, user_id=user.id)
+
+        if excluded_user_ids:
+            query = query.filter(Post.user_id.notin_(excluded_user_ids))
+
+        if cursor:
+            query = query.filter(keyset_before(Post.created_at, Post.id, cursor))
+
+        # fetch one extra row to know whether there is a next page
+        posts = (
+            query.options(joinedload(Post.original_post), joinedload(Post.user))
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+        posts, next_cursor = paginate(
+            posts, limit, key=lambda post: (post.created_at, post.id)
+        )
 
         posts_response = []
         for post in posts:
             validated_post_response = PostResponseSchema.model_validate(post)
             posts_response.append(validated_post_response)
 
-        return jsonable_encoder(posts_response)
+        self.attach_viewer_state(db=db, user=user, posts=posts_response)
+
+        return jsonable_encoder({"items": posts_response, "next_cursor": next_cursor})
 
 
     def create(self, db: Session, user: User, schema: CreatePostSchema):
@@ -65,9 +172,16 @@ class PostService:
         post = Post(user_id=user.id, **schema_dict)
 
         db.add(post)
+        db.flush()
+
+        timeline_service.fan_out(db=db, post=post, author=user)
+        hashtag_service.index_post(db=db, post=post)
+
         db.commit()
         db.refresh(post)
 
+        search_service.index_post(db=db, post=post)
+
         # Log activity
         activity_service.create_activity(
             db=db,
@@ -95,9 +209,19 @@ class PostService:
                 status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to delete this post"
             )
 
+        timeline_service.remove_post(db=db, post_id=post.id)
+        hashtag_service.remove_post(db=db, post_id=post.id)
+
+        if post.original_post_id:
+            db.query(Post).filter(Post.id == post.original_post_id).update(
+                {Post.repost_count: Post.repost_count - 1}, synchronize_session=False
+            )
+
         db.delete(post)
         db.commit()
 
+        search_service.remove_post(db=db, post_id=post_id)
+
 
     def update(self, db: Session, user: User, post_id: str, schema: UpdatePostSchema):
         # get post from db
@@ -122,67 +246,91 @@ class PostService:
             if value:
                 setattr(post, attr, value)
 
+        hashtag_service.index_post(db=db, post=post)
+
         db.commit()
         db.refresh(post)
 
+        search_service.index_post(db=db, post=post)
+
         return jsonable_encoder(PostResponse.model_validate(post))
 
 
-    def like_post(self, db: Session, user: User, post_id: str, background_task: BackgroundTasks):
+    def like_post(
+        self,
+        db: Session,
+        user: User,
+        post_id: str,
+        background_task: BackgroundTasks,
+        liked: bool | None = None,
+    ):
+        """Likes or unlikes a post, toggling when `liked` is None
+
+        The like row is removed or written with a single statement each, the
+        unique (user_id, post_id) constraint resolving concurrent taps, and the
+        counter, notification and activity share one transaction.
+        """
 
         # get the post
         post = (
             db.query(Post).filter(Post.id == post_id).first()
         )
 
-        if not post:
+        if not post or block_service.is_blocked(db=db, user_id=user.id, other_id=post.user_id):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, details="Page not found"
+                status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
             )
 
-        # Check if user has already liked the post
-        like = (
-            db.query(Like)
-            .filter(Like.post_id == post_id, Like.user_id == user.id)
-            .first()
-        )
-
-        if like:
-            db.delete(like)
-            db.commit()
+        removed = added = 0
 
-            # notification for unliking a post
-            notification = Notification(user_id=post.user_id, message=f"{user.username} recently unliked your post")
+        if liked is not True:
+            removed = db.execute(
+                delete(Like).where(Like.post_id == post_id, Like.user_id == user.id)
+            ).rowcount
 
-            db.add(notification)
-            db.commit()
+        if liked is True or (liked is None and not removed):
+            added = db.execute(
+                insert_or_ignore(db, Like).values(
+                    user_id=user.id, post_id=post_id, liked=True
+                )
+            ).rowcount
 
-            background_task.add_task(notification_service.user_event_queues[notification.user_id].put, notification.message)
+        is_liked = not removed and liked is not False
 
-        else:
-            like = Like(user_id=user.id, post_id=post_id)
-            like.liked = True
-            db.add(like)
-            db.commit()
+        # repeated or concurrent taps that changed nothing
+        if not (added or removed):
+            db.rollback()
+            return {"liked": is_liked}
 
-            # add notification for like
-            notification = Notification(user_id=post.user_id, message=f"{user.username} recently liked your post")
+        post.like_count = Post.like_count + added - removed
 
-            db.add(notification)
-            db.commit()
+        # notification for liking or unliking a post
+        notification = notification_service.notify(
+            db=db,
+            user_id=post.user_id,
+            type=NotificationType.like if added else NotificationType.unlike,
+            actor=user,
+            target_id=post.id,
+        )
 
-            # background task for sse notification
-            background_task.add_task(notification_service.user_event_queues[notification.user_id].put, notification.message)
-            
+        if added:
             # Log activity
             activity_service.create_activity(
                 db=db,
                 actor_id=user.id,
                 action_type=ActionType.LIKE,
                 message=f"{user.username} liked a post",
-                target_id=post.id
+                target_id=post.id,
+                commit=False,
             )
 
+        db.commit()
+
+        # background task for sse notification
+        background_task.add_task(notification_service.push, notification.user_id, notification.message, notification.id)
+
+        return {"liked": is_liked}
+
 
     def get_likes(self, db: Session, post_id: str, user: User):
 
@@ -195,15 +343,24 @@ class PostService:
                 status_code=status.HTTP_404_NOT_FOUND, details="Page not found"
             )
 
-        likes = db.query(Like).filter(Like.post_id == post_id).all()
+        likes = db.query(Like).filter(Like.post_id == post_id)
+
+        excluded_user_ids = block_service.blocked_ids(db=db, user_id=user.id)
+
+        if excluded_user_ids:
+            likes = likes.filter(Like.user_id.notin_(excluded_user_ids))
+
+        likes = likes.all()
+
+        users = user_service.get_user_summaries(
+            db=db, user_ids=[like.user_id for like in likes]
+        )
 
         likes_response = []
 
         for like in likes:
 
-            owner_details = user_service.get_user_detail(db=db, user_id=like.user_id)
-            response_user = jsonable_encoder(owner_details)
-            validate_user = UserResponse(**response_user)
+            validate_user = users[like.user_id]
 
             like_response = jsonable_encoder(like)
 
@@ -215,12 +372,13 @@ class PostService:
 
 
     def add_comment(self, db: Session, user: User, post_id: str, content: str):
-        # Verify post exists
+        # Verify post exists, and is not from or to someone blocked
         post = db.query(Post).filter(Post.id == post_id).first()
-        if not post:
+        if not post or block_service.is_blocked(db=db, user_id=user.id, other_id=post.user_id):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
         comment = PostComment(post_id=post_id, user_id=user.id, comment=content)
         db.add(comment)
+        post.comment_count = Post.comment_count + 1
         db.commit()
         db.refresh(comment)
         # Return serialized comment
@@ -230,17 +388,22 @@ class PostService:
             user_id=user.id,
             content=content,
             created_at=comment.created_at,
-            user=user_service.get_user_detail(db=db, user_id=user.id)
+            user=user_service.get_user_summary(db=db, user_id=user.id)
         ))
 
-    def get_comments(self, db: Session, post_id: str):
+    def get_comments(self, db: Session, post_id: str, user: User):
         post = db.query(Post).filter(Post.id == post_id).first()
         if not post:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-        comments = db.query(PostComment).filter(PostComment.post_id == post_id).all()
+        comments = db.query(PostComment).filter(PostComment.post_id == post_id)
+        excluded_user_ids = block_service.blocked_ids(db=db, user_id=user.id)
+        if excluded_user_ids:
+            comments = comments.filter(PostComment.user_id.notin_(excluded_user_ids))
+        comments = comments.all()
+        users = user_service.get_user_summaries(db=db, user_ids=[c.user_id for c in comments])
         response = []
         for c in comments:
-            user_detail = user_service.get_user_detail(db=db, user_id=c.user_id)
+            user_detail = users[c.user_id]
             response.append(jsonable_encoder(CommentResponseSchema(
                 id=c.id,
                 post_id=post_id,
@@ -252,44 +415,74 @@ class PostService:
         return response
 
     def toggle_bookmark(self, db: Session, user: User, post_id: str):
+        """Bookmarks or unbookmarks a post
+
+        As for likes, the bookmark row is removed or written with a single
+        statement each, the unique (user_id, post_id) constraint resolving
+        concurrent taps.
+        """
+
         # Verify post exists
         post = db.query(Post).filter(Post.id == post_id).first()
         if not post:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-        bookmark = db.query(Bookmark).filter(Bookmark.post_id == post_id, Bookmark.user_id == user.id).first()
-        if bookmark:
-            db.delete(bookmark)
+
+        removed = db.execute(
+            delete(Bookmark).where(Bookmark.post_id == post_id, Bookmark.user_id == user.id)
+        ).rowcount
+
+        if removed:
+            post.bookmark_count = Post.bookmark_count - removed
             db.commit()
             return {"bookmarked": False}
-        else:
-            new_bm = Bookmark(user_id=user.id, post_id=post_id)
-            db.add(new_bm)
+
+        added = db.execute(
+            insert_or_ignore(db, Bookmark).values(user_id=user.id, post_id=post_id)
+        ).rowcount
+
+        if added:
+            post.bookmark_count = Post.bookmark_count + added
             db.commit()
-            db.refresh(new_bm)
-            return {"bookmarked": True, "bookmark": jsonable_encoder(BookmarkResponseSchema(
-                id=new_bm.id,
-                post_id=post_id,
-                user_id=user.id,
-                created_at=new_bm.created_at,
-                post=self.get_post(db=db, user=user, post_id=post_id)
-            ))}
+        else:
+            # a concurrent tap bookmarked it first
+            db.rollback()
+
+        bookmark = (
+            db.query(Bookmark)
+            .filter(Bookmark.post_id == post_id, Bookmark.user_id == user.id)
+            .one()
+        )
+
+        return {"bookmarked": True, "bookmark": jsonable_encoder(BookmarkResponseSchema(
+            id=bookmark.id,
+            post_id=post_id,
+            user_id=user.id,
+            created_at=bookmark.created_at,
+            post=PostResponse.model_validate(post)
+        ))}
 
     def get_bookmarks(self, db: Session, user_id: str):
         bookmarks = db.query(Bookmark).filter(Bookmark.user_id == user_id).all()
+        posts = self.get_posts_by_ids(db=db, post_ids=[bm.post_id for bm in bookmarks])
         response = []
         for bm in bookmarks:
-            post = db.query(Post).filter(Post.id == bm.post_id).first()
+            post = posts.get(bm.post_id)
             response.append(jsonable_encoder(BookmarkResponseSchema(
                 id=bm.id,
                 post_id=bm.post_id,
                 user_id=user_id,
                 created_at=bm.created_at,
-                post=self.get_post(db=db, user=user_service.get_user_detail(db=db, user_id=user_id), post_id=bm.post_id)
+                post=PostResponse.model_validate(post) if post else None
             )))
         return response
 
     def repost(self, db: Session, user: User, post_id: str, schema: RepostCreate, background_task: BackgroundTasks):
-        original_post = self.get_post(db=db, user=user, post_id=post_id)
+        original_post = (
+            db.query(Post)
+            .options(joinedload(Post.user))
+            .filter(Post.id == post_id)
+            .first()
+        )
 
         if not original_post:
             raise HTTPException(status_code=404, detail="Post not found")
@@ -302,25 +495,38 @@ class PostService:
         )
 
         db.add(new_post)
+        original_post.repost_count = Post.repost_count + 1
+        db.flush()
+
+        timeline_service.fan_out(db=db, post=new_post, author=user)
+        hashtag_service.index_post(db=db, post=new_post)
+
         db.commit()
         db.refresh(new_post)
 
-        new_post_owner = user_service.get_user_detail(db=db, user_id=user.id)
+        search_service.index_post(db=db, post=new_post)
+
+        new_post_owner = user_service.get_user_summary(db=db, user_id=user.id)
 
         # Post serialization
-        original_post_response = jsonable_encoder(original_post)
+        original_post_response = PostResponse.model_validate(original_post)
 
         new_post_response = jsonable_encoder(new_post)
         new_post_response["user"] = jsonable_encoder(new_post_owner)
         new_post_response["post"] = original_post_response
 
         # repost notification
-        notification = Notification(user_id=original_post.user_id, message=f"{user.username} shared your post")
-        db.add(notification)
+        notification = notification_service.notify(
+            db=db,
+            user_id=original_post.user_id,
+            type=NotificationType.repost,
+            actor=user,
+            target_id=original_post.id,
+        )
         db.commit()
 
         # background task for notificatiom
-        background_task.add_task(notification_service.user_event_queues[notification.user_id].put, notification.message)
+        background_task.add_task(notification_service.push, notification.user_id, notification.message, notification.id)
         
         # Log activity
         activity_service.create_activity(
@@ -334,4 +540,57 @@ class PostService:
         return RepostResponse(**new_post_response)
 
 
+    def reconcile_counters(self, db: Session, batch_size: int = POST_COUNTER_BATCH_SIZE) -> int:
+        """Recomputes the engagement counters from the source tables
+
+        Runs periodically to repair drift left by failed or concurrent writes.
+        Posts are processed in id order, one committed batch at a time, and the
+        number of corrected posts is returned.
+        """
+
+        counters = {
+            Post.like_count: select(func.count(Like.id)).where(Like.post_id == Post.id),
+            Post.comment_count: select(func.count(PostComment.id)).where(
+                PostComment.post_id == Post.id
+            ),
+            Post.repost_count: select(func.count(Repost.id)).where(
+                Repost.original_post_id == Post.id
+            ),
+            Post.bookmark_count: select(func.count(Bookmark.id)).where(
+                Bookmark.post_id == Post.id
+            ),
+        }
+
+        counters = {
+            column: query.correlate(Post).scalar_subquery()
+            for column, query in counters.items()
+        }
+
+        drifted = or_(*(column != count for column, count in counters.items()))
+
+        last_id = None
+        repaired = 0
+
+        while True:
+            ids = db.query(Post.id).order_by(Post.id)
+
+            if last_id is not None:
+                ids = ids.filter(Post.id > last_id)
+
+            ids = [row.id for row in ids.limit(batch_size)]
+
+            if not ids:
+                return repaired
+
+            repaired += (
+                db.query(Post)
+                .filter(Post.id.in_(ids), drifted)
+                .update(counters, synchronize_session=False)
+            )
+            db.commit()
+
+            last_id = ids[-1]
+
+
 post_service = PostService()
+async_post_service = AsyncService(post_service)
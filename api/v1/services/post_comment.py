@@ -6,13 +6,14 @@ from api.v1.schemas.post_comment import (
     CommentResponse,
     UpdateCommentSchema,
 )
-from api.v1.schemas.user import UserResponse
 from api.v1.models.post_comment import PostComment
 from api.v1.models.post import Post
 from api.v1.models.user import User
-from api.v1.models.notification import Notification
+from api.v1.models.notification import NotificationType
 from api.v1.services.user import user_service
+from api.v1.services.block import block_service
 from api.v1.services.notification import notification_service
+from api.v1.services.async_service import AsyncService
 
 
 class CommentService:
@@ -44,16 +45,16 @@ class CommentService:
             db.query(Post).filter(Post.id == post_id).first()
         )
 
-        if not post:
+        if not post or block_service.is_blocked(db=db, user_id=user.id, other_id=post.user_id):
             raise self.post_not_found
 
         comment = PostComment(user_id=user.id, post_id=post.id, **schema_dict)
 
-        # get user complete details and serialize the user
-        comment_owner = user_service.get_user_detail(db=db, user_id=user.id)
+        comment_owner = user_service.get_user_summary(db=db, user_id=user.id)
         response_user = jsonable_encoder(comment_owner)
 
         db.add(comment)
+        post.comment_count = Post.comment_count + 1
         db.commit()
         db.refresh(comment)
 
@@ -61,13 +62,17 @@ class CommentService:
         encoded["user"] = response_user
 
         # Comment Notification
-        notification = Notification(user_id=post.user_id, message=f"{user.username} commented on your post")
-
-        db.add(notification)
+        notification = notification_service.notify(
+            db=db,
+            user_id=post.user_id,
+            type=NotificationType.comment,
+            actor=user,
+            target_id=post.id,
+        )
         db.commit()
 
         # add background task to send notifcation
-        background_task.add_task(notification_service.user_event_queues[notification.user_id].put, notification.message)
+        background_task.add_task(notification_service.push, notification.user_id, notification.message, notification.id)
 
 
         return CommentResponse(**encoded)
@@ -109,7 +114,7 @@ class CommentService:
             if value:
                 setattr(comment, attr, value)
 
-        comment_owner = user_service.get_user_detail(db=db, user_id=user.id)
+        comment_owner = user_service.get_user_summary(db=db, user_id=user.id)
         response_user = jsonable_encoder(comment_owner)
 
         db.commit()
@@ -143,6 +148,7 @@ class CommentService:
             raise self.comment_not_found
 
         db.delete(comment)
+        post.comment_count = Post.comment_count - 1
         db.commit()
 
 
@@ -156,14 +162,23 @@ class CommentService:
         if not post:
             raise self.post_not_found
 
-        comments = db.query(PostComment).filter(PostComment.post_id == post_id).all()
+        comments = db.query(PostComment).filter(PostComment.post_id == post_id)
+
+        excluded_user_ids = block_service.blocked_ids(db=db, user_id=user.id)
+
+        if excluded_user_ids:
+            comments = comments.filter(PostComment.user_id.notin_(excluded_user_ids))
+
+        comments = comments.all()
+
+        users = user_service.get_user_summaries(
+            db=db, user_ids=[comment.user_id for comment in comments]
+        )
 
         response_comments = []
 
         for comment in comments:
-            owner_details = user_service.get_user_detail(db=db, user_id=comment.user_id)
-            response_user = jsonable_encoder(owner_details)
-            validate_user = UserResponse(**response_user)
+            validate_user = users[comment.user_id]
             response_comment = jsonable_encoder(comment)
 
             response_comment["user"] = validate_user.model_dump()
@@ -177,3 +192,4 @@ class CommentService:
 
 
 comment_service = CommentService()
+async_comment_service = AsyncService(comment_service)
@@ -0,0 +1,203 @@
+import threading
+from typing import Dict, FrozenSet, List, Tuple
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.orm import Session, joinedload
+from api.v1.models.post import Post, POST_SEARCH_CONFIG, post_search_vector
+from api.v1.models.user import User
+from api.v1.schemas.post import PostResponseSchema
+from api.v1.services.async_service import AsyncService
+from api.v1.services.block import block_service
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, invalid_cursor, paginate
+from api.v1.utils.search import InvertedIndex
+
+# ts_rank_cd normalization dividing the rank by 1 + log(document length)
+POSTGRES_RANK_NORMALIZATION = 1
+
+
+class SearchService:
+    """Full-text search over posts
+
+    On Postgres posts are matched through the GIN index on their tsvector,
+    which the database keeps current. Elsewhere an in-process inverted index
+    is built from the post table on the first search, then kept current by
+    the post service as posts are created, updated and deleted.
+    """
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        # author of every indexed post, so blocked authors are skipped before
+        # a page is cut
+        self.authors: Dict[str, str] = {}
+        self._loaded = False
+        # never held across a query: sessions run as greenlets on the event
+        # loop thread, one waiting on it there would block the loop
+        self._lock = threading.Lock()
+        # changes made while a load reads the posts, replayed on its index
+        self._pending: List[list] = []
+
+    def uses_postgres(self, db: Session) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    def index_post(self, db: Session, post: Post):
+        """Indexes a committed post"""
+
+        if self.uses_postgres(db):
+            return
+
+        self._change(("add", post.id, post.user_id, post.content))
+
+    def remove_post(self, db: Session, post_id: str):
+        if self.uses_postgres(db):
+            return
+
+        self._change(("remove", post_id, None, None))
+
+    def _change(self, change: Tuple):
+        with self._lock:
+            for pending in self._pending:
+                pending.append(change)
+
+            if self._loaded:
+                self._apply(self.index, self.authors, change)
+
+    def _apply(self, index: InvertedIndex, authors: Dict[str, str], change: Tuple):
+        action, post_id, user_id, content = change
+
+        if action == "add":
+            index.add(post_id, content)
+            authors[post_id] = user_id
+        else:
+            index.remove(post_id)
+            authors.pop(post_id, None)
+
+    def load(self, db: Session):
+        """Builds the in-process index from every post, then swaps it in"""
+
+        pending: list = []
+
+        with self._lock:
+            self._pending.append(pending)
+
+        index = InvertedIndex()
+        authors: Dict[str, str] = {}
+
+        try:
+            for post_id, user_id, content in (
+                db.query(Post.id, Post.user_id, Post.content)
+                .filter(Post.content.isnot(None))
+                .yield_per(1000)
+            ):
+                index.add(post_id, content)
+                authors[post_id] = user_id
+        except BaseException:
+            with self._lock:
+                self._pending.remove(pending)
+
+            raise
+
+        with self._lock:
+            self._pending.remove(pending)
+
+            for change in pending:
+                self._apply(index, authors, change)
+
+            self.index, self.authors = index, authors
+            self._loaded = True
+
+    def search(
+        self,
+        db: Session,
+        user: User,
+        query: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """Returns a page of the posts matching every term of `query`, best
+        ranked first
+        """
+
+        after = self._decode_cursor(cursor) if cursor else None
+        excluded_user_ids = block_service.blocked_ids(db=db, user_id=user.id)
+
+        if self.uses_postgres(db):
+            ranked = self._search_postgres(db, query, limit, after, excluded_user_ids)
+        else:
+            ranked = self._search_index(db, query, limit, after, excluded_user_ids)
+
+        ranked, next_cursor = paginate(ranked, limit, key=lambda row: row)
+
+        posts = {
+            post.id: post
+            for post in db.query(Post)
+            .options(joinedload(Post.original_post), joinedload(Post.user))
+            .filter(Post.id.in_([post_id for _, post_id in ranked]))
+        }
+
+        items = [
+            PostResponseSchema.model_validate(posts[post_id])
+            for _, post_id in ranked
+            if post_id in posts
+        ]
+
+        # imported here, the post service depends on this module
+        from api.v1.services.post import post_service
+
+        post_service.attach_viewer_state(db=db, user=user, posts=items)
+
+        return jsonable_encoder({"items": items, "next_cursor": next_cursor})
+
+    def _decode_cursor(self, cursor: str):
+        values = decode_cursor(cursor)
+
+        try:
+            score, post_id = values
+            return float(score), str(post_id)
+        except (ValueError, TypeError):
+            raise invalid_cursor
+
+    def _search_postgres(
+        self, db: Session, query: str, limit: int, after, excluded_user_ids: FrozenSet[str]
+    ):
+        ts_query = func.plainto_tsquery(text(f"'{POST_SEARCH_CONFIG}'"), query)
+        rank = func.ts_rank_cd(post_search_vector, ts_query, POSTGRES_RANK_NORMALIZATION)
+
+        rows = db.query(rank.label("score"), Post.id).filter(
+            post_search_vector.op("@@")(ts_query)
+        )
+
+        if excluded_user_ids:
+            rows = rows.filter(Post.user_id.notin_(excluded_user_ids))
+
+        if after:
+            score, post_id = after
+            rows = rows.filter(or_(rank < score, and_(rank == score, Post.id < post_id)))
+
+        rows = rows.order_by(rank.desc(), Post.id.desc()).limit(limit + 1).all()
+
+        return [(row.score, row.id) for row in rows]
+
+    def _search_index(
+        self, db: Session, query: str, limit: int, after, excluded_user_ids: FrozenSet[str]
+    ):
+        if not self._loaded:
+            self.load(db=db)
+
+        with self._lock:
+            index, authors = self.index, self.authors
+
+        ranked = index.search(query)
+
+        if excluded_user_ids:
+            ranked = [
+                entry for entry in ranked if authors.get(entry[1]) not in excluded_user_ids
+            ]
+
+        if after:
+            ranked = [entry for entry in ranked if entry < after]
+
+        return ranked[: limit + 1]
+
+
+search_service = SearchService()
+async_search_service = AsyncService(search_service)
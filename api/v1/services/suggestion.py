@@ -0,0 +1,159 @@
+import heapq
+import os
+import threading
+from typing import List
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from api.v1.models.user import User, followers_table
+from api.v1.schemas.user import UserSuggestionResponse
+from api.v1.services.async_service import AsyncService
+from api.v1.services.block import block_service
+from api.v1.utils.cache import TTLCache
+from api.v1.utils.graph import FollowGraph
+
+load_dotenv()
+
+# ranked candidates cached per user, suggestions are filtered from them
+SUGGESTION_CANDIDATES = int(os.environ.get("SUGGESTION_CANDIDATES", 100))
+
+# seconds a user's candidates are reused, bounds how stale the mutual counts
+# of follows made by other users get
+SUGGESTION_CACHE_TTL_SECONDS = int(os.environ.get("SUGGESTION_CACHE_TTL_SECONDS", 600))
+SUGGESTION_CACHE_SIZE = int(os.environ.get("SUGGESTION_CACHE_SIZE", 10000))
+
+# seconds between two reloads of the follow graph, picks up follows made
+# through other workers
+SUGGESTION_GRAPH_REFRESH_SECONDS = int(os.environ.get("SUGGESTION_GRAPH_REFRESH_SECONDS", 600))
+
+
+class SuggestionService:
+    """Suggests people to follow from the follow graph
+
+    Candidates are the users followed by the people a user follows, ranked by
+    how many of them lead there. The graph is held in memory, loaded on the
+    first request and kept current by follow/unfollow; ranked candidates are
+    cached per user and filtered against current follows and blocks.
+    """
+
+    def __init__(self):
+        self.graph = FollowGraph()
+        self.cache = TTLCache(maxsize=SUGGESTION_CACHE_SIZE, ttl=SUGGESTION_CACHE_TTL_SECONDS)
+        self._loaded = False
+        # never held across a query: sessions run as greenlets on the event
+        # loop thread, one waiting on it there would block the loop
+        self._lock = threading.Lock()
+        # follows and unfollows made while a reload reads the edges, replayed
+        # on its graph
+        self._pending: List[list] = []
+
+    def load_graph(self, db: Session):
+        """Reloads the follow graph, scheduled every
+        SUGGESTION_GRAPH_REFRESH_SECONDS
+        """
+
+        pending: list = []
+
+        with self._lock:
+            self._pending.append(pending)
+
+        graph = FollowGraph()
+
+        try:
+            graph.load(
+                db.execute(
+                    select(followers_table.c.follower_id, followers_table.c.followed_id)
+                ).yield_per(10000)
+            )
+        except BaseException:
+            with self._lock:
+                self._pending.remove(pending)
+
+            raise
+
+        with self._lock:
+            self._pending.remove(pending)
+
+            for action, follower_id, followed_id in pending:
+                getattr(graph, action)(follower_id, followed_id)
+
+            self.graph = graph
+            self._loaded = True
+
+        self.cache.clear()
+
+    def follow(self, follower_id: str, followed_id: str):
+        """Applies a committed follow, replayed on a reload in progress"""
+
+        self._change("follow", follower_id, followed_id)
+
+    def unfollow(self, follower_id: str, followed_id: str):
+        self._change("unfollow", follower_id, followed_id)
+
+    def _change(self, action: str, follower_id: str, followed_id: str):
+        with self._lock:
+            for pending in self._pending:
+                pending.append((action, follower_id, followed_id))
+
+            if self._loaded:
+                getattr(self.graph, action)(follower_id, followed_id)
+
+        self.cache.delete(follower_id)
+
+    def candidates(self, user_id: str) -> list:
+        """Returns the best ranked (user id, mutual count) pairs"""
+
+        cached = self.cache.get(user_id)
+
+        if cached is not None:
+            return cached
+
+        graph = self.graph
+        counts = graph.friends_of_friends(user_id)
+        counts.pop(user_id, None)
+
+        for followed_id in graph.followings(user_id):
+            counts.pop(followed_id, None)
+
+        ranked = heapq.nsmallest(
+            SUGGESTION_CANDIDATES, counts.items(), key=lambda item: (-item[1], item[0])
+        )
+
+        self.cache.set(user_id, ranked)
+
+        return ranked
+
+    def suggestions(self, db: Session, user: User, limit: int = 10):
+        if not self._loaded:
+            self.load_graph(db=db)
+
+        followings = self.graph.followings(user.id)
+        excluded = block_service.blocked_ids(db=db, user_id=user.id)
+
+        ranked = [
+            (candidate_id, mutuals)
+            for candidate_id, mutuals in self.candidates(user.id)
+            if candidate_id not in excluded and candidate_id not in followings
+        ][:limit]
+
+        users = {
+            candidate.id: candidate
+            for candidate in db.query(User).filter(
+                User.id.in_([candidate_id for candidate_id, _ in ranked])
+            )
+        }
+
+        return jsonable_encoder(
+            [
+                UserSuggestionResponse.model_validate(users[candidate_id]).model_copy(
+                    update={"mutual_count": mutuals}
+                )
+                for candidate_id, mutuals in ranked
+                if candidate_id in users
+            ]
+        )
+
+
+suggestion_service = SuggestionService()
+async_suggestion_service = AsyncService(suggestion_service)
@@ -0,0 +1,223 @@
+import os
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session, joinedload
+from api.v1.models.post import Post
+from api.v1.models.timeline import TimelineEntry
+from api.v1.models.user import User, followers_table
+from api.v1.schemas.post import PostResponseSchema
+from api.v1.utils.database import insert_or_ignore
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, keyset_before, paginate
+from api.v1.services.async_service import AsyncService
+
+load_dotenv()
+
+# authors with more followers than this are merged into timelines on read
+TIMELINE_FANOUT_LIMIT = int(os.environ.get("TIMELINE_FANOUT_LIMIT", 5000))
+
+# number of recent posts copied into a timeline when a user follows someone
+TIMELINE_BACKFILL_SIZE = int(os.environ.get("TIMELINE_BACKFILL_SIZE", 20))
+
+
+class TimelineService:
+    def fan_out(self, db: Session, post: Post, author: User):
+        """Pushes a new post into the timelines of the author's followers
+
+        High-follower authors only get the entry in their own timeline, their
+        posts are merged in when followers read their timeline instead.
+        """
+
+        recipients = [author.id]
+
+        if author.follower_count <= TIMELINE_FANOUT_LIMIT:
+            follower_ids = db.query(followers_table.c.follower_id).filter(
+                followers_table.c.followed_id == author.id
+            )
+            recipients.extend(row.follower_id for row in follower_ids)
+
+        db.execute(
+            insert(TimelineEntry),
+            [
+                {
+                    "user_id": user_id,
+                    "post_id": post.id,
+                    "author_id": author.id,
+                    "created_at": post.created_at,
+                }
+                for user_id in recipients
+            ],
+        )
+
+        return recipients
+
+    def backfill(self, db: Session, user: User, author: User):
+        """Copies the author's recent posts into a new follower's timeline"""
+
+        if author.follower_count > TIMELINE_FANOUT_LIMIT:
+            return
+
+        existing = db.query(TimelineEntry.post_id).filter(
+            TimelineEntry.user_id == user.id, TimelineEntry.author_id == author.id
+        )
+
+        posts = (
+            db.query(Post.id, Post.created_at)
+            .filter(Post.user_id == author.id, Post.id.notin_(existing))
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(TIMELINE_BACKFILL_SIZE)
+            .all()
+        )
+
+        if posts:
+            db.execute(
+                insert(TimelineEntry),
+                [
+                    {
+                        "user_id": user.id,
+                        "post_id": post.id,
+                        "author_id": author.id,
+                        "created_at": post.created_at,
+                    }
+                    for post in posts
+                ],
+            )
+
+    def lost_follower(self, db: Session, author: User):
+        """Fans out the recent posts of an author falling back to
+        TIMELINE_FANOUT_LIMIT followers
+
+        Their posts were merged into timelines on read until now, and would
+        drop out of them otherwise. Call it after decrementing the count.
+        """
+
+        db.flush()
+        follower_count = db.query(User.follower_count).filter(User.id == author.id).scalar()
+
+        # counts change one at a time under the row lock, a single unfollow
+        # sees the limit
+        if follower_count != TIMELINE_FANOUT_LIMIT:
+            return
+
+        posts = (
+            db.query(Post.id, Post.created_at)
+            .filter(Post.user_id == author.id)
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(TIMELINE_BACKFILL_SIZE)
+            .all()
+        )
+
+        follower_ids = db.query(followers_table.c.follower_id).filter(
+            followers_table.c.followed_id == author.id
+        )
+
+        entries = [
+            {
+                "user_id": row.follower_id,
+                "post_id": post.id,
+                "author_id": author.id,
+                "created_at": post.created_at,
+            }
+            for row in follower_ids
+            for post in posts
+        ]
+
+        if entries:
+            # followers who got some of the posts through backfill keep them
+            db.execute(insert_or_ignore(db, TimelineEntry), entries)
+
+    def remove_author(self, db: Session, user_id: str, author_id: str):
+        """Drops an author's posts from a user's timeline, e.g. after an unfollow"""
+
+        db.execute(
+            delete(TimelineEntry).where(
+                TimelineEntry.user_id == user_id, TimelineEntry.author_id == author_id
+            )
+        )
+
+    def remove_post(self, db: Session, post_id: str):
+        db.execute(delete(TimelineEntry).where(TimelineEntry.post_id == post_id))
+
+    def get_timeline(
+        self,
+        db: Session,
+        user: User,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        # materialized entries: a single range scan over the user's timeline
+        entries = db.query(TimelineEntry.post_id, TimelineEntry.created_at).filter(
+            TimelineEntry.user_id == user.id
+        )
+
+        if cursor:
+            entries = entries.filter(
+                keyset_before(TimelineEntry.created_at, TimelineEntry.post_id, cursor)
+            )
+
+        rows = (
+            entries.order_by(
+                TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc()
+            )
+            .limit(limit + 1)
+            .all()
+        )
+
+        # fan-out-on-read for followed high-follower accounts
+        celebrity_ids = db.query(User.id).join(
+            followers_table, followers_table.c.followed_id == User.id
+        ).filter(
+            followers_table.c.follower_id == user.id,
+            User.follower_count > TIMELINE_FANOUT_LIMIT,
+        )
+
+        celebrity_posts = db.query(Post.id.label("post_id"), Post.created_at).filter(
+            Post.user_id.in_(celebrity_ids)
+        )
+
+        if cursor:
+            celebrity_posts = celebrity_posts.filter(
+                keyset_before(Post.created_at, Post.id, cursor)
+            )
+
+        rows += (
+            celebrity_posts.order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+        rows = sorted(
+            {row.post_id: row for row in rows}.values(),
+            key=lambda row: (row.created_at, row.post_id),
+            reverse=True,
+        )[: limit + 1]
+
+        rows, next_cursor = paginate(
+            rows, limit, key=lambda row: (row.created_at, row.post_id)
+        )
+
+        post_ids = [row.post_id for row in rows]
+
+        posts = {
+            post.id: post
+            for post in db.query(Post)
+            .options(joinedload(Post.original_post), joinedload(Post.user))
+            .filter(Post.id.in_(post_ids))
+        }
+
+        items = [
+            PostResponseSchema.model_validate(posts[post_id])
+            for post_id in post_ids
+            if post_id in posts
+        ]
+
+        # imported here, the post service depends on this module
+        from api.v1.services.post import post_service
+
+        post_service.attach_viewer_state(db=db, user=user, posts=items)
+
+        return jsonable_encoder({"items": items, "next_cursor": next_cursor})
+
+
+timeline_service = TimelineService()
+async_timeline_service = AsyncService(timeline_service)
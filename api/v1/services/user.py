@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta, timezone
+import hashlib
 import os
+from uuid import uuid4
 from typing import Annotated
 from dotenv import load_dotenv
 from pydantic import ValidationError
@@ -9,31 +11,76 @@ from api.v1.models.access_token import AccessToken
 from api.v1.models.cover_photo import CoverPhoto
 from api.v1.models.profile_picture import ProfilePicture
 from api.v1.models.social_link import SocialLink
-from api.v1.utils.dependencies import get_db
+from api.v1.utils.dependencies import get_async_db
 
 load_dotenv()
 from fastapi import Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, text
-from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, selectinload
+from sqlalchemy import and_, or_
 import jwt
-from api.v1.models.user import User
-from api.v1.schemas.user import UserCreate, UserUpdateSchema, UserResponse
+from api.v1.models.user import RoleEnum, User, followers_table
+from api.v1.schemas.user import UserCreate, UserUpdateSchema, UserResponse, UserSummaryResponse
 from api.v1.utils.storage import upload
-from api.v1.models.notification import Notification
+from api.v1.utils.password import password_hasher
+from api.v1.utils.cache import TTLCache
+from api.v1.utils.pagination import DEFAULT_PAGE_SIZE, decode_cursor, invalid_cursor, paginate
+from api.v1.utils.trie import Trie
+from api.v1.models.notification import NotificationType
 from api.v1.services.notification import notification_service
 from api.v1.services.activity import activity_service
+from api.v1.services.timeline import timeline_service
+from api.v1.services.suggestion import suggestion_service
+from api.v1.services.block import block_service
 from api.v1.models.activity import ActionType
+from api.v1.services.async_service import AsyncService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
-hash_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# for public routes that tailor their response to a signed in viewer
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 SECRET_KEY = os.environ.get("SECRET_KEY")
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# verified tokens are cached per worker, other workers see a logout or profile
+# change once their entry expires
+AUTH_CACHE_TTL_SECONDS = int(os.environ.get("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 10000))
+
+auth_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+TOKEN_REAPER_INTERVAL_SECONDS = int(os.environ.get("TOKEN_REAPER_INTERVAL_SECONDS", 3600))
+TOKEN_REAPER_BATCH_SIZE = int(os.environ.get("TOKEN_REAPER_BATCH_SIZE", 1000))
+
+# usernames suggested per typeahead lookup
+USER_TYPEAHEAD_SIZE = int(os.environ.get("USER_TYPEAHEAD_SIZE", 10))
+
+# seconds between two rebuilds of the typeahead trie
+USER_TYPEAHEAD_REFRESH_SECONDS = int(os.environ.get("USER_TYPEAHEAD_REFRESH_SECONDS", 300))
+
+# user columns a UserSummaryResponse is built from
+USER_SUMMARY_COLUMNS = (
+    User.id,
+    User.username,
+    User.avatar_url,
+    User.follower_count,
+    User.following_count,
+)
+
+# user columns kept in the auth cache, anything else is loaded on first access
+USER_SNAPSHOT_FIELDS = ("id", "username", "email", "role")
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
 
 class UserService:
+    def __init__(self):
+        # built on the first typeahead lookup
+        self.typeahead_trie: Trie | None = None
+
     def create_user(self, user: UserCreate, db: Session):
         # check if user already exists
 
@@ -50,22 +97,18 @@ class UserService:
         db.commit()
         db.refresh(user)
 
-        # create notification
+        self._index_typeahead(user)
 
-        notification = Notification(
-            user_id=user.id, message="Account created successfully"
-        )
+        # create notification
 
-        db.add(notification)
+        notification_service.create(db=db, user_id=user.id, message="Account created successfully")
         db.commit()
 
         # generate access token
 
         token, expiry = self.generate_access_token(db, user).values()
 
-        user = jsonable_encoder(
-            UserResponse.model_validate(self.get_user_detail(db=db, user_id=user.id))
-        )
+        user = jsonable_encoder(UserResponse.model_validate(user))
 
         response = {
             "access_token": token,
@@ -76,10 +119,10 @@ class UserService:
         return response
 
     def hash_password(self, password: str) -> str:
-        return hash_context.hash(password)
+        return password_hasher.hash(password)
 
     def verify_password(self, password: str, hashed_password) -> bool:
-        return hash_context.verify(password, hashed_password)
+        return password_hasher.verify(password, hashed_password)
 
     def exists(self, email: str, db: Session) -> bool:
         user = db.query(User).filter(User.email == email).first()
@@ -94,6 +137,8 @@ class UserService:
             "id": user.id,
             "username": user.username,
             "email": user.email,
+            # keeps tokens issued within the same second distinct
+            "jti": uuid4().hex,
         }
         expire = datetime.now(timezone.utc) + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES
@@ -103,7 +148,9 @@ class UserService:
 
         # store access toke to database
 
-        access_token = AccessToken(user_id=user.id, token=token, expiry_time=expire)
+        access_token = AccessToken(
+            user_id=user.id, token_digest=token_digest(token), expiry_time=expire
+        )
 
         db.add(access_token)
         db.commit()
@@ -112,8 +159,7 @@ class UserService:
         return {"token": token, "expiry_time": expire}
 
     def get_user_by_email(self, email: str, db: Session) -> User | None:
-        if self.exists(email, db):
-            return db.query(User).filter(User.email == email).first()
+        return db.query(User).filter(User.email == email).first()
 
     def get_user_by_id(self, id: str, db: Session) -> User | None:
         return db.query(User).filter(User.id == id).first() or None
@@ -147,14 +193,10 @@ class UserService:
 
         # create notification
 
-        notification = Notification(user_id=user.id, message="Account Login successful")
-
-        db.add(notification)
+        notification_service.create(db=db, user_id=user.id, message="Account Login successful")
         db.commit()
 
-        user = jsonable_encoder(
-            UserResponse.model_validate(self.get_user_detail(db=db, user_id=user.id))
-        )
+        user = jsonable_encoder(UserResponse.model_validate(user))
 
         response = {
             "access_token": access_token,
@@ -164,17 +206,39 @@ class UserService:
 
         return response
 
-    def get_current_user(
+    async def get_current_user(
         self,
         token: Annotated[str, Depends(oauth2_scheme)],
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
     ):
+        return await db.run_sync(lambda session: self.authenticate(session, token))
+
+    async def get_optional_current_user(
+        self,
+        token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+        db: AsyncSession = Depends(get_async_db),
+    ) -> User | None:
+        if not token:
+            return None
+
+        return await db.run_sync(lambda session: self.authenticate(session, token))
+
+    def authenticate(self, db: Session, token: str) -> User:
         credential_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+        digest = token_digest(token)
+        cached = auth_cache.get(digest)
+
+        if cached:
+            if cached["blacklisted"]:
+                raise credential_exception
+
+            return self.user_from_snapshot(db, cached["user"])
+
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
@@ -188,47 +252,127 @@ class UserService:
 
         # check if token is blacklisted
 
-        access_token = db.query(AccessToken).filter(AccessToken.token == token).first()
+        access_token = (
+            db.query(AccessToken).filter(AccessToken.token_digest == digest).first()
+        )
+        blacklisted = bool(access_token and access_token.blacklisted)
 
-        if access_token and access_token.blacklisted:
+        user = None if blacklisted else self.get_user_by_email(email, db)
+
+        if not blacklisted and not user:
             raise credential_exception
 
-        user = self.get_user_by_email(email, db)
+        expires = payload.get("exp")
+
+        # never keep an entry past the token's own expiry, nor one for a token
+        # without any
+        if expires is not None:
+            auth_cache.set(
+                digest,
+                {
+                    "claims": payload,
+                    "blacklisted": blacklisted,
+                    "user": self.user_snapshot(user) if user else None,
+                },
+                ttl=expires - datetime.now(timezone.utc).timestamp(),
+            )
 
-        if not user:
+        if blacklisted:
             raise credential_exception
 
         return user
 
-    def blacklist_token(self, db: Session, user: User) -> None:
-        # get user access token
+    def user_snapshot(self, user: User) -> dict:
+        snapshot = {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+        snapshot["role"] = getattr(user.role, "value", user.role)
+
+        return snapshot
+
+    def user_from_snapshot(self, db: Session, snapshot: dict) -> User:
+        """Attaches a cached user to the session without querying it"""
+
+        fields = dict(snapshot)
+
+        if fields.get("role"):
+            fields["role"] = RoleEnum(fields["role"])
+
+        user = User(**fields)
+        make_transient_to_detached(user)
+
+        return db.merge(user, load=False)
+
+    def invalidate_auth_cache(self, user_id: str) -> None:
+        auth_cache.delete_where(
+            lambda entry: entry["user"] is not None and entry["user"]["id"] == user_id
+        )
+
+    def blacklist_token(self, db: Session, user: User, token: str) -> None:
+        # get the presented access token
+
+        digest = token_digest(token)
 
         access_token = (
-            db.query(AccessToken).filter(AccessToken.user_id == user.id).first()
+            db.query(AccessToken)
+            .filter(AccessToken.token_digest == digest, AccessToken.user_id == user.id)
+            .first()
         )
 
-        access_token.blacklisted = True
+        if access_token:
+            access_token.blacklisted = True
 
-        db.commit()
-        db.refresh(access_token)
+            db.commit()
+            db.refresh(access_token)
 
-        # create notification
+        auth_cache.delete(digest)
 
-        notification = Notification(
-            user_id=user.id, message="Account logout successful"
-        )
+        # create notification
 
-        db.add(notification)
+        notification_service.create(db=db, user_id=user.id, message="Account logout successful")
         db.commit()
 
-    def get_user_detail(self, db: Session, user_id: str):
+    def purge_expired_tokens(self, db: Session, batch_size: int = TOKEN_REAPER_BATCH_SIZE) -> int:
+        """Deletes access tokens past their expiry in batches, returns the count"""
+
+        now = datetime.now(timezone.utc)
+        purged = 0
+
+        while True:
+            expired = (
+                db.query(AccessToken.id)
+                .filter(AccessToken.expiry_time < now)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+
+            deleted = (
+                db.query(AccessToken)
+                .filter(AccessToken.id.in_(expired))
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+
+            purged += deleted
+
+            if deleted < batch_size:
+                return purged
+
+    def get_user_detail(self, db: Session, user_id: str, viewer: User | None = None):
+        # blocked users see each other as missing
+        if viewer is not None and block_service.is_blocked(
+            db=db, user_id=viewer.id, other_id=user_id
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        # the full profile, only for GET /users/{id}; followers are counted,
+        # and each collection is its own query instead of a cartesian join
         query = (
             db.query(User)
             .options(
-                joinedload(User.profile_pictures),
-                joinedload(User.cover_photos),
-                joinedload(User.followers),
-                joinedload(User.social_links),
+                selectinload(User.profile_pictures),
+                selectinload(User.cover_photos),
+                selectinload(User.social_links),
             )
             .filter(User.id == user_id)
             .first()
@@ -241,6 +385,36 @@ class UserService:
 
         return query
 
+    def get_user_summary(self, db: Session, user_id: str) -> UserSummaryResponse:
+        """Loads the summary embedded next to a user's content"""
+
+        summary = db.query(*USER_SUMMARY_COLUMNS).filter(User.id == user_id).first()
+
+        if not summary:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        return UserSummaryResponse.model_validate(summary)
+
+    def get_user_summaries(self, db: Session, user_ids) -> dict:
+        """Loads many user summaries with a single `IN` query, keyed by id
+
+        Used when serializing lists (likes, comments, bookmarks) so each
+        related user is not fetched with a separate query.
+        """
+
+        user_ids = set(user_ids)
+
+        if not user_ids:
+            return {}
+
+        summaries = db.query(*USER_SUMMARY_COLUMNS).filter(User.id.in_(user_ids)).all()
+
+        return {
+            summary.id: UserSummaryResponse.model_validate(summary) for summary in summaries
+        }
+
     def update_user_profile(
         self, db: Session, user: User, user_id: str, schema: UserUpdateSchema
     ):
@@ -264,6 +438,7 @@ class UserService:
             # create new profile picture
 
             new_profile_picture = ProfilePicture(user_id=user.id, image=image_url)
+            user.avatar_url = image_url
 
             db.add(new_profile_picture)
             db.commit()
@@ -301,26 +476,27 @@ class UserService:
 
             db.commit()
 
+        previous_username = user.username
+
         for key, value in data.items():
             setattr(user, key, value)
 
         db.commit()
         db.refresh(user)
 
-        # create notification
+        self.invalidate_auth_cache(user.id)
 
-        notification = Notification(
-            user_id=user.id, message="Account updated successfully"
-        )
+        if user.username != previous_username:
+            self._index_typeahead(user, previous_username=previous_username)
+
+        # create notification
 
-        db.add(notification)
+        notification_service.create(db=db, user_id=user.id, message="Account updated successfully")
         db.commit()
 
         # return user detail
 
-        return jsonable_encoder(
-            UserResponse.model_validate(self.get_user_detail(db=db, user_id=user_id))
-        )
+        return jsonable_encoder(UserResponse.model_validate(user))
 
     def delete_user_profile(self, db: Session, user: User, user_id: str):
         # check if user is the currently logged in user
@@ -331,27 +507,154 @@ class UserService:
                 detail="You do not have permission to delete this user",
             )
 
+        username = user.username
+
         db.delete(user)
         db.commit()
 
-    def fetch_all(self, db: Session, search: str = ""):
-        query = (
-            db.query(User)
-            .options(joinedload(User.profile_pictures), joinedload(User.social_links))
-            .order_by(text("RANDOM()"))
-        )
+        self.invalidate_auth_cache(user_id)
+
+        if self.typeahead_trie is not None:
+            self.typeahead_trie.remove(username.lower(), user_id)
+
+    def fetch_all(
+        self,
+        db: Session,
+        search: str = "",
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        viewer: User | None = None,
+    ):
+        """Returns a page of the user directory ordered by username
+
+        Searching matches a substring of the username or email, which the
+        trigram indexes serve on postgres.
+        """
+
+        query = db.query(User)
+
+        if viewer is not None:
+            excluded_user_ids = block_service.blocked_ids(db=db, user_id=viewer.id)
+
+            if excluded_user_ids:
+                query = query.filter(User.id.notin_(excluded_user_ids))
 
         if search:
+            pattern = "%{}%".format(
+                search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
             query = query.filter(
                 or_(
-                    User.username.icontains(f"%{search}%"),
-                    User.email.icontains(f"%{search}%"),
+                    User.username.ilike(pattern, escape="\\"),
+                    User.email.ilike(pattern, escape="\\"),
                 )
             )
 
-        users = query.all()
+        if cursor:
+            try:
+                username, id = decode_cursor(cursor)
+            except (ValueError, TypeError):
+                raise invalid_cursor
+
+            query = query.filter(
+                or_(
+                    User.username > username,
+                    and_(User.username == username, User.id > id),
+                )
+            )
+
+        users = query.order_by(User.username, User.id).limit(limit + 1).all()
+
+        users, next_cursor = paginate(users, limit, key=lambda user: (user.username, user.id))
+
+        return jsonable_encoder(
+            {
+                "items": [UserSummaryResponse.model_validate(user) for user in users],
+                "next_cursor": next_cursor,
+            }
+        )
+
+    def discover(self, db: Session, limit: int = DEFAULT_PAGE_SIZE, viewer: User | None = None):
+        """Returns random users without sorting the table
+
+        Seeks the primary key index at a random uuid and reads the following
+        rows, wrapping around to the start of the index when it runs out.
+        """
+
+        pivot = str(uuid4())
+
+        query = db.query(User)
+
+        if viewer is not None:
+            excluded_user_ids = block_service.blocked_ids(db=db, user_id=viewer.id)
+
+            if excluded_user_ids:
+                query = query.filter(User.id.notin_(excluded_user_ids))
+
+        users = query.filter(User.id >= pivot).order_by(User.id).limit(limit).all()
+
+        if len(users) < limit:
+            users += (
+                query.filter(User.id < pivot)
+                .order_by(User.id)
+                .limit(limit - len(users))
+                .all()
+            )
+
+        return jsonable_encoder([UserSummaryResponse.model_validate(user) for user in users])
+
+    def typeahead(
+        self,
+        db: Session,
+        query: str,
+        limit: int = USER_TYPEAHEAD_SIZE,
+        viewer: User | None = None,
+    ):
+        """Returns the most followed users whose username starts with `query`"""
+
+        if self.typeahead_trie is None:
+            self.rebuild_typeahead(db=db)
+
+        suggestions = self.typeahead_trie.top(query.lower(), limit=USER_TYPEAHEAD_SIZE)
+
+        if viewer is not None:
+            excluded_user_ids = block_service.blocked_ids(db=db, user_id=viewer.id)
+            suggestions = [user for user in suggestions if user["id"] not in excluded_user_ids]
+
+        return suggestions[:limit]
+
+    def rebuild_typeahead(self, db: Session):
+        """Rebuilds the autocomplete trie, scheduled every
+        USER_TYPEAHEAD_REFRESH_SECONDS so follower counts stay current
+        """
+
+        trie = Trie(size=USER_TYPEAHEAD_SIZE)
+
+        for id, username, follower_count in db.query(
+            User.id, User.username, User.follower_count
+        ).yield_per(1000):
+            trie.add(
+                username.lower(),
+                id,
+                score=follower_count or 0,
+                value={"id": id, "username": username},
+            )
 
-        return jsonable_encoder(users, exclude={"password"})
+        self.typeahead_trie = trie
+
+    def _index_typeahead(self, user: User, previous_username: str | None = None):
+        if self.typeahead_trie is None:
+            return
+
+        if previous_username is not None:
+            self.typeahead_trie.remove(previous_username.lower(), user.id)
+
+        self.typeahead_trie.add(
+            user.username.lower(),
+            user.id,
+            score=user.follower_count or 0,
+            value={"id": user.id, "username": user.username},
+        )
 
     def follow_user(self, db: Session, user_id: str, user: User, background_task: BackgroundTasks):
 
@@ -362,17 +665,27 @@ class UserService:
                 detail="User not found",
             )
 
+        if block_service.is_blocked(db=db, user_id=user.id, other_id=followee.id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You cannot follow this user",
+            )
+
         if followee not in user.followings:
+            timeline_service.backfill(db=db, user=user, author=followee)
+
             user.followings.append(followee)
+            user.following_count = User.following_count + 1
+            followee.follower_count = User.follower_count + 1
 
-            notification = Notification(
-                user_id=followee.id, message=f"{user.username} followed you"
+            notification = notification_service.notify(
+                db=db, user_id=followee.id, type=NotificationType.follow, actor=user
             )
-
-            db.add(notification)
             db.commit()
 
-            background_task.add_task(notification_service.user_event_queues[notification.user_id].put, notification.message)
+            suggestion_service.follow(follower_id=user.id, followed_id=followee.id)
+
+            background_task.add_task(notification_service.push, notification.user_id, notification.message, notification.id)
             
             # Log activity
             activity_service.create_activity(
@@ -395,33 +708,106 @@ class UserService:
             )
 
         user.followings.remove(user_to_unfollow)
+        user.following_count = User.following_count - 1
+        user_to_unfollow.follower_count = User.follower_count - 1
 
-        notification = Notification(
-            user_id=user_to_unfollow.id, message=f"{user.username} unfollowed you"
-        )
+        timeline_service.remove_author(db=db, user_id=user.id, author_id=user_to_unfollow.id)
+        timeline_service.lost_follower(db=db, author=user_to_unfollow)
 
-        db.add(notification)
+        notification = notification_service.notify(
+            db=db, user_id=user_to_unfollow.id, type=NotificationType.unfollow, actor=user
+        )
         db.commit()
 
-        background_task.add_task(notification_service.user_event_queues[notification.user_id].put, notification.message)
+        suggestion_service.unfollow(follower_id=user.id, followed_id=user_to_unfollow.id)
 
+        background_task.add_task(notification_service.push, notification.user_id, notification.message, notification.id)
 
-    def followers(self, db: Session, user: User):
 
-        followers = [
-            UserResponse(**jsonable_encoder(follower)) for follower in user.followers
-        ]
+    def followers(
+        self,
+        db: Session,
+        user_id: str,
+        viewer: User,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """Returns a page of the users following `user_id`"""
+
+        return self._connections(
+            db=db,
+            user_id=user_id,
+            viewer=viewer,
+            key=followers_table.c.followed_id,
+            other=followers_table.c.follower_id,
+            count=User.follower_count,
+            limit=limit,
+            cursor=cursor,
+        )
 
-        return followers
+    def followings(
+        self,
+        db: Session,
+        user_id: str,
+        viewer: User,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+    ):
+        """Returns a page of the users `user_id` follows"""
+
+        return self._connections(
+            db=db,
+            user_id=user_id,
+            viewer=viewer,
+            key=followers_table.c.follower_id,
+            other=followers_table.c.followed_id,
+            count=User.following_count,
+            limit=limit,
+            cursor=cursor,
+        )
 
-    def followings(self, db: Session, user: User):
+    def _connections(self, db: Session, user_id: str, viewer: User, key, other, count, limit, cursor):
+        """Pages through one side of user_interaction ordered by the other
+        user's id, a range scan of the (key, other) index
+        """
 
-        followings = [
-            UserResponse(**jsonable_encoder(following)) for following in user.followings
-        ]
+        excluded_user_ids = block_service.blocked_ids(db=db, user_id=viewer.id)
 
-        return followings
+        total = db.query(count).filter(User.id == user_id).scalar()
 
+        if total is None or user_id in excluded_user_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        query = (
+            db.query(*USER_SUMMARY_COLUMNS)
+            .join(followers_table, other == User.id)
+            .filter(key == user_id)
+        )
+
+        if excluded_user_ids:
+            query = query.filter(other.notin_(excluded_user_ids))
+
+        if cursor:
+            try:
+                (after,) = decode_cursor(cursor)
+            except (ValueError, TypeError):
+                raise invalid_cursor
+
+            query = query.filter(other > str(after))
+
+        rows = query.order_by(other).limit(limit + 1).all()
+
+        rows, next_cursor = paginate(rows, limit, key=lambda row: (row.id,))
+
+        return jsonable_encoder(
+            {
+                "items": [UserSummaryResponse.model_validate(row) for row in rows],
+                "next_cursor": next_cursor,
+                "count": total,
+            }
+        )
 
     def block_user(self, db: Session, user_id: str, current_user: User):
         user_to_block = self.get_user_by_id(user_id, db)
@@ -433,15 +819,37 @@ class UserService:
 
         current_user.blocks.append(user_to_block)
         
+        removed_follows = []
+
         # If following, unfollow
         if user_to_block in current_user.followings:
             current_user.followings.remove(user_to_block)
+            current_user.following_count = User.following_count - 1
+            user_to_block.follower_count = User.follower_count - 1
+            removed_follows.append((current_user.id, user_to_block.id))
         
         # If they follow us, remove them
         if current_user in user_to_block.followings:
             user_to_block.followings.remove(current_user)
+            user_to_block.following_count = User.following_count - 1
+            current_user.follower_count = User.follower_count - 1
+            removed_follows.append((user_to_block.id, current_user.id))
+
+        timeline_service.remove_author(db=db, user_id=current_user.id, author_id=user_to_block.id)
+        timeline_service.remove_author(db=db, user_id=user_to_block.id, author_id=current_user.id)
+
+        for _, followed_id in removed_follows:
+            timeline_service.lost_follower(
+                db=db, author=user_to_block if followed_id == user_to_block.id else current_user
+            )
 
         db.commit()
+
+        block_service.invalidate(current_user.id, user_to_block.id)
+
+        for follower_id, followed_id in removed_follows:
+            suggestion_service.unfollow(follower_id=follower_id, followed_id=followed_id)
+
         return {"message": "User blocked successfully"}
 
     def unblock_user(self, db: Session, user_id: str, current_user: User):
@@ -454,6 +862,9 @@ class UserService:
 
         current_user.blocks.remove(user_to_unblock)
         db.commit()
+
+        block_service.invalidate(current_user.id, user_to_unblock.id)
         return {"message": "User unblocked successfully"}
 
 user_service = UserService()
+async_user_service = AsyncService(user_service)
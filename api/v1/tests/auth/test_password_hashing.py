@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import pytest
+from fastapi import HTTPException
+from api.v1.utils.password import PasswordHasher
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(max_workers=2, queue_limit=2)
+
+    hashed_password = hasher.hash("@Password123")
+
+    assert hasher.verify("@Password123", hashed_password)
+    assert not hasher.verify("wrong-password", hashed_password)
+    assert hasher.pending == 0
+
+
+def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=1, queue_limit=0)
+
+    # occupy the only slot
+    hasher._slots.acquire()
+
+    with pytest.raises(HTTPException) as exc:
+        hasher.hash("@Password123")
+
+    assert exc.value.status_code == 503
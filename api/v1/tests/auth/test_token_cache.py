@@ -0,0 +1,94 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+from datetime import datetime, timedelta, timezone
+import jwt
+import pytest
+from fastapi import HTTPException
+from api.v1.models.access_token import AccessToken
+from api.v1.services.user import ALGORITHM, SECRET_KEY, auth_cache, token_digest, user_service
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
+def test_cached_token_skips_database(mock_db_session, test_user, access_token):
+    token = access_token["token"]
+    mock_db_session.query.return_value.filter.return_value.first.side_effect = [
+        AccessToken(blacklisted=False),
+        test_user,
+    ]
+
+    user_service.authenticate(mock_db_session, token)
+    queries = mock_db_session.query.call_count
+
+    user_service.authenticate(mock_db_session, token)
+
+    assert mock_db_session.query.call_count == queries
+    assert token_digest(token) in auth_cache
+    merged_user = mock_db_session.merge.call_args.args[0]
+    assert merged_user.id == test_user.id
+
+
+def test_blacklisted_token_is_cached(mock_db_session, test_user, access_token):
+    token = access_token["token"]
+    mock_db_session.query.return_value.filter.return_value.first.side_effect = [
+        AccessToken(blacklisted=True),
+    ]
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            user_service.authenticate(mock_db_session, token)
+
+        assert exc.value.status_code == 401
+
+    assert mock_db_session.query.call_count == 1
+
+
+def test_token_without_expiry_is_not_cached(mock_db_session, test_user):
+    token = jwt.encode({"email": test_user.email}, SECRET_KEY, algorithm=ALGORITHM)
+    mock_db_session.query.return_value.filter.return_value.first.side_effect = [
+        AccessToken(blacklisted=False),
+        test_user,
+    ]
+
+    assert user_service.authenticate(mock_db_session, token) is test_user
+    assert token_digest(token) not in auth_cache
+
+
+def test_logout_invalidates_cache(mock_db_session, test_user, access_token):
+    token = access_token["token"]
+    mock_db_session.query.return_value.filter.return_value.first.side_effect = [
+        AccessToken(blacklisted=False),
+        test_user,
+        AccessToken(blacklisted=False),
+    ]
+
+    user_service.authenticate(mock_db_session, token)
+    user_service.blacklist_token(mock_db_session, test_user, token)
+
+    assert token_digest(token) not in auth_cache
+
+
+def test_purge_expired_tokens_in_batches(sqlite_db):
+    now = datetime.now(timezone.utc)
+    sqlite_db.add_all(
+        [
+            AccessToken(user_id="u", token_digest=f"expired-{i}", expiry_time=now - timedelta(minutes=1))
+            for i in range(5)
+        ]
+        + [AccessToken(user_id="u", token_digest="live", expiry_time=now + timedelta(minutes=30))]
+    )
+    sqlite_db.commit()
+
+    assert user_service.purge_expired_tokens(db=sqlite_db, batch_size=2) == 5
+    assert [token.token_digest for token in sqlite_db.query(AccessToken)] == ["live"]
+    assert user_service.purge_expired_tokens(db=sqlite_db, batch_size=2) == 0
@@ -6,12 +6,19 @@ sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
 )
 
+# fail the tests of routes going over their query budget
+os.environ.setdefault("QUERY_BUDGET_STRICT", "True")
+
 from fastapi import HTTPException, status
 import pytest
 from uuid import uuid4
 from main import app
-from unittest.mock import patch, MagicMock
-from api.v1.utils.dependencies import get_db
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from api.v1.utils.database import Base
+from unittest.mock import patch, MagicMock, AsyncMock
+from api.v1.utils.dependencies import get_db, get_async_db
 from api.v1.services.user import user_service
 from api.v1.models.user import User
 
@@ -22,11 +29,30 @@ mock_id = str(uuid4())
 def mock_db_session():
     with patch("api.v1.utils.dependencies.get_db", autospec=True):
         mock_db = MagicMock()
+        # the async session runs the sync service code against the same mock
+        mock_db.run_sync = AsyncMock(side_effect=lambda fn: fn(mock_db))
         app.dependency_overrides[get_db] = lambda: mock_db
+        app.dependency_overrides[get_async_db] = lambda: mock_db
         yield mock_db
     app.dependency_overrides = {}
 
 
+@pytest.fixture
+def sqlite_db():
+    """A session on a fresh in-memory database, for tests running real queries"""
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autoflush=False, bind=engine)()
+
+    yield db
+
+    db.close()
+    engine.dispose()
+
+
 @pytest.fixture
 def mock_user_service():
     with patch("api.v1.services.user.user_service", autospec=True) as mock_service:
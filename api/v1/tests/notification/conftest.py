@@ -24,3 +24,21 @@ def mock_get_notifications():
             },
         ]
         yield get_notifications
+
+
+@pytest.fixture
+def mock_unread_count():
+    with patch(
+        "api.v1.services.notification.notification_service.unread_count"
+    ) as unread_count:
+        unread_count.return_value = 3
+        yield unread_count
+
+
+@pytest.fixture
+def mock_mark_read():
+    with patch(
+        "api.v1.services.notification.notification_service.mark_read"
+    ) as mark_read:
+        mark_read.return_value = 2
+        yield mark_read
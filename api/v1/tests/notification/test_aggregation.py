@@ -0,0 +1,122 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from api.v1.models.notification import Notification, NotificationType
+from api.v1.models.user import User
+from api.v1.services.notification import NotificationService
+from api.v1.utils.broker import InProcessBroker
+
+alice = User(id="alice-id", username="alice")
+
+
+def open_group(db, notification):
+    query = db.query.return_value.filter.return_value.order_by.return_value
+    query.with_for_update.return_value.first.return_value = notification
+
+
+def test_first_notification_starts_a_group():
+    service = NotificationService(broker=InProcessBroker())
+    db = MagicMock()
+    open_group(db, None)
+
+    notification = service.notify(
+        db=db, user_id="owner", type=NotificationType.like, actor=alice, target_id="post-1"
+    )
+
+    db.add.assert_called_once_with(notification)
+    assert notification.message == "alice liked your post"
+    assert notification.actor_count == 1
+    assert notification.target_id == "post-1"
+
+
+def test_later_notifications_fold_into_the_open_group():
+    service = NotificationService(broker=InProcessBroker())
+    group = Notification(
+        user_id="owner",
+        type=NotificationType.like,
+        target_id="post-1",
+        actor_count=41,
+        actors=[{"id": "carol-id", "username": "carol"}],
+        message="carol and 40 others liked your post",
+    )
+    db = MagicMock()
+    open_group(db, group)
+
+    notification = service.notify(
+        db=db, user_id="owner", type=NotificationType.like, actor=alice, target_id="post-1"
+    )
+
+    assert notification is group
+    assert not db.add.called
+    assert group.created_at is None
+    assert group.last_actor_at is not None
+    assert group.message == "alice and 41 others liked your post"
+    assert [actor["username"] for actor in group.actors] == ["alice", "carol"]
+
+    # an actor already in the sample is not counted twice
+    service.notify(
+        db=db, user_id="owner", type=NotificationType.like, actor=alice, target_id="post-1"
+    )
+
+    assert group.actor_count == 42
+
+
+def test_group_message():
+    service = NotificationService(broker=InProcessBroker())
+
+    assert service.group_message(NotificationType.follow, "bob", 2) == "bob and 1 other followed you"
+
+
+def test_push_coalesces_updates_of_a_group():
+    service = NotificationService(broker=InProcessBroker())
+    service.publish = AsyncMock()
+
+    async def run():
+        await service.push("owner", "alice liked your post", "group-1")
+        await service.push("owner", "bob and 1 other liked your post", "group-1")
+        await asyncio.gather(*service._push_tasks)
+
+    with patch("api.v1.services.notification.NOTIFICATION_PUSH_DELAY_SECONDS", 0.01):
+        asyncio.run(run())
+
+    service.publish.assert_awaited_once_with(
+        "owner", "bob and 1 other liked your post", "group-1"
+    )
+
+
+def test_regrouped_notifications_keep_their_creation_time(sqlite_db):
+    service = NotificationService(broker=InProcessBroker())
+    owner = User(username="owner", email="owner@example.com", password="x")
+    bob = User(username="bob", email="bob@example.com", password="x")
+    sqlite_db.add_all([owner, bob])
+    sqlite_db.commit()
+
+    liked = service.notify(
+        db=sqlite_db, user_id=owner.id, type=NotificationType.like, actor=alice, target_id="post-1"
+    )
+    sqlite_db.commit()
+    followed = service.notify(
+        db=sqlite_db, user_id=owner.id, type=NotificationType.follow, actor=alice
+    )
+    sqlite_db.commit()
+    created_at = liked.created_at
+
+    # bob's like regroups the older notification
+    service.notify(
+        db=sqlite_db, user_id=owner.id, type=NotificationType.like, actor=bob, target_id="post-1"
+    )
+    sqlite_db.commit()
+
+    first = service.notifications(user=owner, db=sqlite_db, limit=1)
+    second = service.notifications(user=owner, db=sqlite_db, limit=1, cursor=first["next_cursor"])
+
+    assert [n["id"] for n in first["items"] + second["items"]] == [liked.id, followed.id]
+    assert second["next_cursor"] is None
+    assert liked.created_at == created_at
+    assert liked.last_actor_at > created_at
@@ -36,3 +36,37 @@ def test_get_notifications(
             "status": "unread",
         },
     ]
+
+
+def test_get_notifications_pagination(
+    mock_db_session: Session,
+    current_user,
+    access_token,
+    mock_get_notifications,
+):
+
+    response = client.get(
+        endpoint,
+        params={"limit": 5, "cursor": "abc"},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert mock_get_notifications.call_args.kwargs["limit"] == 5
+    assert mock_get_notifications.call_args.kwargs["cursor"] == "abc"
+
+
+def test_unread_count(
+    mock_db_session: Session,
+    current_user,
+    access_token,
+    mock_unread_count,
+):
+
+    response = client.get(
+        f"{endpoint}/unread-count",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"unread_count": 3}
@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+)
+
+
+from main import app
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from api.v1.models.user import User
+from api.v1.services.notification import notification_service
+
+client = TestClient(app)
+endpoint = "/api/v1/notifications/read"
+
+
+def test_mark_all_read(
+    mock_db_session: Session,
+    current_user,
+    access_token,
+    mock_mark_read,
+):
+
+    response = client.patch(
+        endpoint,
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"marked_read": 2}
+    assert mock_mark_read.call_args.kwargs["up_to"] is None
+
+
+def test_mark_read_up_to(
+    mock_db_session: Session,
+    current_user,
+    access_token,
+    mock_mark_read,
+):
+
+    response = client.patch(
+        endpoint,
+        json={"up_to": "hhh"},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert mock_mark_read.call_args.kwargs["up_to"] == "hhh"
+
+
+def test_mark_read_is_one_update_and_keeps_the_counter():
+    db = MagicMock()
+    db.execute.return_value.rowcount = 4
+
+    marked = notification_service.mark_read(user=User(id="user-1"), db=db)
+
+    assert marked == 4
+    assert db.execute.call_count == 1
+    counter = db.query.return_value.filter.return_value.update
+    counter.assert_called_once()
+    assert db.commit.call_count == 1
@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from api.v1.models.notification import Notification
+from api.v1.utils.broker import EventQueue, InProcessBroker
+from api.v1.services.notification import NotificationService, coalesce_events, encode_event
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def run_sync(self, fn):
+        return fn(MagicMock())
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    queue = EventQueue(maxsize=2, overflow="drop_oldest")
+
+    for message in ["1", "2", "3"]:
+        queue.offer(message)
+
+    assert [queue.get_nowait(), queue.get_nowait()] == ["2", "3"]
+    assert queue.dropped == 1
+
+
+def test_coalesce_merges_pending_messages():
+    queue = EventQueue(maxsize=2, overflow="coalesce", merge=coalesce_events)
+
+    for i in range(3):
+        queue.offer(encode_event(f"n{i}", "liked"))
+
+    assert queue.qsize() == 1
+    assert queue.get_nowait() == encode_event("n2", "You have 3 new notifications")
+
+
+def test_coalesce_needs_a_merge_function():
+    with pytest.raises(ValueError):
+        EventQueue(overflow="coalesce")
+
+
+def test_replays_missed_notifications_then_streams():
+    broker = InProcessBroker()
+    service = NotificationService(broker=broker, session_factory=FakeSession)
+    service.missed_notifications = MagicMock(
+        return_value=[Notification(id="n2", user_id="user-1", message="missed")]
+    )
+
+    async def run():
+        events = service.event_generator("user-1", last_event_id="n1")
+
+        replayed = await events.__anext__()
+
+        # already replayed, must not be sent twice
+        await service.publish("user-1", "missed", event_id="n2")
+        await service.publish("user-1", "live", event_id="n3")
+        live = await events.__anext__()
+
+        await events.aclose()
+        return replayed, live
+
+    assert asyncio.run(run()) == ("id: n2\ndata: missed\n\n", "id: n3\ndata: live\n\n")
+    assert service.missed_notifications.call_args.kwargs["last_event_id"] == "n1"
+    assert broker.subscribers == {}
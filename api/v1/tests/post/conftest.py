@@ -10,6 +10,8 @@ from fastapi import HTTPException
 import pytest
 from uuid import uuid4
 from unittest.mock import patch
+from api.v1.models.post import Post
+from api.v1.models.user import User
 
 mock_id = str(uuid4())
 
@@ -73,7 +75,7 @@ def mock_update_post_not_found_side_effect():
 @pytest.fixture
 def mock_like_post():
     with patch("api.v1.services.post.post_service.like_post") as like_post:
-        like_post.return_value = {"message": "post liked successfully"}
+        like_post.return_value = {"liked": True}
         yield like_post
 
 
@@ -138,3 +140,49 @@ def mock_get_feeds():
                 "original_post": "null"
                 }
         yield get_feeds
+
+
+@pytest.fixture
+def mock_get_timeline():
+    with patch("api.v1.services.timeline.timeline_service.get_timeline") as get_timeline:
+
+        get_timeline.return_value = {
+                "items": [
+                    {
+                        "id": "jjj",
+                        "content": "a post from someone i follow",
+                        "image": None,
+                        "video": None,
+                        "created_at": "2024-08-22T23:59:25.816336+01:00",
+                        "updated_at": "2024-08-22T23:59:25.816336+01:00",
+                        "original_post_owner": {"id": "kkk", "username": "izzyjosh"},
+                        "original_post": None,
+                        },
+                    ],
+                "next_cursor": None,
+                }
+        yield get_timeline
+
+
+@pytest.fixture
+def db_author(sqlite_db):
+    user = User(username="author", email="author@example.com", password="x")
+    sqlite_db.add(user)
+    sqlite_db.commit()
+    return user
+
+
+@pytest.fixture
+def db_reader(sqlite_db):
+    user = User(username="reader", email="reader@example.com", password="x")
+    sqlite_db.add(user)
+    sqlite_db.commit()
+    return user
+
+
+@pytest.fixture
+def db_post(sqlite_db, db_author):
+    post = Post(user_id=db_author.id, content="Lorem ipsum")
+    sqlite_db.add(post)
+    sqlite_db.commit()
+    return post
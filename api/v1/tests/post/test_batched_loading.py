@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import pytest
+from unittest.mock import MagicMock
+from api.v1.models.post import Like, Post
+from api.v1.models.user import User
+from api.v1.services.post import post_service
+
+
+@pytest.mark.parametrize("like_count", [1, 50])
+def test_get_likes_query_count_is_constant(mock_db_session, test_user, like_count):
+    users = [
+        User(id=f"user-{i}", username=f"user{i}", follower_count=0, following_count=0)
+        for i in range(like_count)
+    ]
+    likes = [
+        Like(id=f"like-{i}", user_id=user.id, post_id="post-1", liked=True)
+        for i, user in enumerate(users)
+    ]
+
+    query = mock_db_session.query.return_value.filter.return_value
+    query.first.return_value = Post(id="post-1", user_id=test_user.id)
+    query.all.side_effect = [likes, users]
+
+    response = post_service.get_likes(
+        db=mock_db_session, post_id="post-1", user=test_user
+    )
+
+    # post, likes and one batched lookup of the likers
+    assert mock_db_session.query.call_count == 3
+    assert [like["user"]["username"] for like in response] == [
+        user.username for user in users
+    ]
+
+
+def test_viewer_state_is_one_query_per_page(mock_db_session, test_user):
+    mock_db_session.execute.return_value = [
+        MagicMock(post_id="post-1", kind="like"),
+        MagicMock(post_id="post-2", kind="bookmark"),
+        MagicMock(post_id="post-1", kind="bookmark"),
+    ]
+
+    liked, bookmarked = post_service.get_viewer_state(
+        db=mock_db_session, user=test_user, post_ids=["post-1", "post-2", "post-3"]
+    )
+
+    assert mock_db_session.execute.call_count == 1
+    assert liked == {"post-1"}
+    assert bookmarked == {"post-1", "post-2"}
+
+
+def test_viewer_state_skips_empty_pages(mock_db_session, test_user):
+    assert post_service.get_viewer_state(
+        db=mock_db_session, user=test_user, post_ids=[]
+    ) == (set(), set())
+    assert not mock_db_session.execute.called
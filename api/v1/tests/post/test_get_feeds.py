@@ -3,9 +3,15 @@ import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../")))
 
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from main import app
+from api.v1.models.post import Post
+from api.v1.services.post import post_service
+from api.v1.utils.pagination import encode_cursor
 
 client = TestClient(app)
 endpoint = "api/v1/posts"
@@ -43,3 +49,68 @@ def test_web_socket():
 
         response = websocket.receive_text()
         assert response == "connected"
+
+
+def test_get_feeds_pagination(
+        mock_db_session: Session,
+        current_user,
+        access_token,
+        mock_get_feeds,):
+
+    response = client.get(
+            endpoint,
+            params={"limit": 5, "cursor": "abc"},
+            headers={"Authorization": f"Bearer {access_token}"})
+
+    assert response.status_code == 200
+    assert mock_get_feeds.call_args.kwargs["limit"] == 5
+    assert mock_get_feeds.call_args.kwargs["cursor"] == "abc"
+
+
+def test_get_feeds_limit_too_large(
+        mock_db_session: Session,
+        current_user,
+        access_token,
+        mock_get_feeds,):
+
+    response = client.get(
+            endpoint,
+            params={"limit": 1000},
+            headers={"Authorization": f"Bearer {access_token}"})
+
+    assert response.status_code == 422
+
+
+def test_feed_pages_have_no_gaps_or_duplicates(sqlite_db, db_author, db_reader):
+    now = datetime.now(timezone.utc)
+    # three posts per timestamp, so pages end in the middle of ties
+    posts = [
+        Post(user_id=db_author.id, content=f"post {i}", created_at=now - timedelta(seconds=i // 3))
+        for i in range(8)
+    ]
+    sqlite_db.add_all(posts)
+    sqlite_db.commit()
+
+    ids, cursor = [], None
+
+    while True:
+        page = post_service.get_feeds(db=sqlite_db, user=db_reader, limit=2, cursor=cursor)
+        ids += [post["id"] for post in page["items"]]
+        cursor = page["next_cursor"]
+
+        if cursor is None:
+            break
+
+    expected = sorted(posts, key=lambda post: (post.created_at, post.id), reverse=True)
+
+    assert ids == [post.id for post in expected]
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not-a-cursor", encode_cursor("only-one-value"), encode_cursor("yesterday", "id")]
+)
+def test_malformed_feed_cursor_is_rejected(sqlite_db, db_reader, cursor):
+    with pytest.raises(HTTPException) as error:
+        post_service.get_feeds(db=sqlite_db, user=db_reader, cursor=cursor)
+
+    assert error.value.status_code == 400
@@ -0,0 +1,152 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../")))
+
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from main import app
+from api.v1.models.post import Post
+from api.v1.models.timeline import TimelineEntry
+from api.v1.models.user import User
+from api.v1.services.post import post_service
+from api.v1.services.timeline import timeline_service
+from api.v1.services.user import user_service
+
+client = TestClient(app)
+endpoint = "api/v1/posts/timeline"
+
+
+def test_get_timeline(
+        mock_db_session: Session,
+        current_user,
+        access_token,
+        mock_get_timeline,):
+
+    response = client.get(
+            endpoint,
+            params={"limit": 10},
+            headers={"Authorization": f"Bearer {access_token}"})
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "Timeline returned successfully"
+    assert response.json()["data"]["items"][0]["id"] == "jjj"
+    assert response.json()["data"]["next_cursor"] is None
+    assert mock_get_timeline.call_args.kwargs["limit"] == 10
+
+
+def test_get_timeline_unauthenticated():
+
+    response = client.get(endpoint)
+
+    assert response.status_code == 401
+
+
+def make_users(db, *names):
+    users = [User(username=name, email=f"{name}@example.com", password="x") for name in names]
+    db.add_all(users)
+    db.commit()
+
+    return users
+
+
+def follow(db, user, author):
+    user_service.follow_user(
+        db=db, user_id=author.id, user=user, background_task=BackgroundTasks()
+    )
+
+
+def publish(db, author, content):
+    post = Post(user_id=author.id, content=content)
+    db.add(post)
+    db.flush()
+    timeline_service.fan_out(db=db, post=post, author=author)
+    db.commit()
+
+    return post
+
+
+def timeline(db, user, limit=20):
+    ids, cursor = [], None
+
+    while True:
+        page = timeline_service.get_timeline(db=db, user=user, limit=limit, cursor=cursor)
+        ids += [post["id"] for post in page["items"]]
+        cursor = page["next_cursor"]
+
+        if cursor is None:
+            return ids
+
+
+def test_posts_reach_followers_and_new_followers(sqlite_db):
+    author, early, late = make_users(sqlite_db, "author", "early", "late")
+    follow(sqlite_db, early, author)
+
+    post = publish(sqlite_db, author, "hello")
+    follow(sqlite_db, late, author)
+
+    assert timeline(sqlite_db, author) == [post.id]
+    assert timeline(sqlite_db, early) == [post.id]
+    # backfilled on follow
+    assert timeline(sqlite_db, late) == [post.id]
+
+
+def test_unfollow_and_block_drop_the_author(sqlite_db):
+    author, leaving, blocked = make_users(sqlite_db, "author", "leaving", "blocked")
+    follow(sqlite_db, leaving, author)
+    follow(sqlite_db, blocked, author)
+    publish(sqlite_db, author, "hello")
+
+    user_service.unfollow_user(
+        db=sqlite_db, user_id=author.id, user=leaving, background_task=BackgroundTasks()
+    )
+    user_service.block_user(db=sqlite_db, user_id=blocked.id, current_user=author)
+
+    assert timeline(sqlite_db, leaving) == []
+    assert timeline(sqlite_db, blocked) == []
+
+
+def test_deleted_post_leaves_every_timeline(sqlite_db):
+    author, reader = make_users(sqlite_db, "author", "reader")
+    follow(sqlite_db, reader, author)
+    post = publish(sqlite_db, author, "hello")
+
+    post_service.delete(db=sqlite_db, user=author, post_id=post.id)
+
+    assert sqlite_db.query(TimelineEntry).count() == 0
+    assert timeline(sqlite_db, reader) == []
+
+
+def test_high_follower_posts_are_merged_on_read(sqlite_db, monkeypatch):
+    monkeypatch.setattr("api.v1.services.timeline.TIMELINE_FANOUT_LIMIT", 1)
+    star, friend, reader, other = make_users(sqlite_db, "star", "friend", "reader", "other")
+
+    for user, author in [(reader, star), (other, star), (reader, friend)]:
+        follow(sqlite_db, user, author)
+
+    posts = [
+        publish(sqlite_db, star, "first"),
+        publish(sqlite_db, friend, "second"),
+        publish(sqlite_db, star, "third"),
+    ]
+
+    # only the star's own timeline got their posts
+    assert sqlite_db.query(TimelineEntry).filter(TimelineEntry.author_id == star.id).count() == 2
+    assert timeline(sqlite_db, reader, limit=1) == [post.id for post in reversed(posts)]
+
+
+def test_posts_stay_when_the_author_falls_below_the_limit(sqlite_db, monkeypatch):
+    monkeypatch.setattr("api.v1.services.timeline.TIMELINE_FANOUT_LIMIT", 1)
+    star, reader, leaving = make_users(sqlite_db, "star", "reader", "leaving")
+    follow(sqlite_db, reader, star)
+    follow(sqlite_db, leaving, star)
+    post = publish(sqlite_db, star, "while above the limit")
+
+    user_service.unfollow_user(
+        db=sqlite_db, user_id=star.id, user=leaving, background_task=BackgroundTasks()
+    )
+    later = publish(sqlite_db, star, "back under the limit")
+
+    assert timeline(sqlite_db, reader) == [later.id, post.id]
+    assert timeline(sqlite_db, leaving) == []
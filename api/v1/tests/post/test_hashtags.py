@@ -0,0 +1,134 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../")))
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from api.v1.models.hashtag import PostHashtag
+from api.v1.models.post import Post
+from api.v1.services.hashtag import HashtagService, bucket_start
+from api.v1.utils.query_budget import QueryStats, current_stats, track_queries
+from main import app
+
+client = TestClient(app)
+
+
+def test_extract_hashtags():
+    service = HashtagService()
+
+    assert service.extract("Loving #FastAPI and #python, #fastapi again") == ["fastapi", "python"]
+    assert service.extract("mail me at a#b or ##double") == []
+    assert service.extract(None) == []
+    assert service.extract(f"#{'a' * 55} #{'b' * 56}") == ["a" * 55]
+
+
+def test_trending_decays_older_uses():
+    service = HashtagService()
+    service._window_loaded = True
+
+    now = bucket_start(datetime.now(timezone.utc))
+    service._window = {
+        # more uses, but most of them half a day ago
+        "stale": {now - timedelta(hours=12): 10, now: 1},
+        "expired": {now - timedelta(days=3): 100},
+    }
+    service._pending[("fresh", now)] += 4
+
+    trending = service.trending(db=None, limit=10)
+
+    assert [entry["tag"] for entry in trending] == ["fresh", "stale"]
+    assert trending[1]["uses"] == 11
+
+
+def test_uses_count_once_the_post_commits(sqlite_db, db_post):
+    service = HashtagService()
+    db_post.content = "Loving #FastAPI"
+
+    service.index_post(db=sqlite_db, post=db_post)
+    sqlite_db.rollback()
+
+    assert not service._pending
+
+    db_post.content = "Loving #FastAPI"
+    service.index_post(db=sqlite_db, post=db_post)
+
+    assert not service._pending
+
+    sqlite_db.commit()
+
+    assert [tag for tag, _ in service._pending] == ["fastapi"]
+
+
+def test_get_trending_hashtags(mock_db_session: Session, current_user, access_token):
+    with patch("api.v1.services.hashtag.hashtag_service.trending") as trending:
+        trending.return_value = [{"tag": "fastapi", "score": 4.0, "uses": 4}]
+
+        response = client.get(
+            "api/v1/hashtags/trending",
+            params={"limit": 5},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["tag"] == "fastapi"
+    assert trending.call_args.kwargs["limit"] == 5
+
+
+def test_get_hashtag_posts(mock_db_session: Session, current_user, access_token):
+    with patch("api.v1.services.hashtag.hashtag_service.get_posts") as get_posts:
+        get_posts.return_value = {"items": [{"id": "jjj"}], "next_cursor": None}
+
+        response = client.get(
+            "api/v1/hashtags/fastapi/posts",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["items"][0]["id"] == "jjj"
+    assert get_posts.call_args.kwargs["tag"] == "fastapi"
+
+
+def test_blocked_authors_are_skipped_before_paging(sqlite_db, db_author, db_reader, monkeypatch):
+    service = HashtagService()
+    posts = [Post(user_id=db_reader.id, content="#fastapi")] + [
+        Post(user_id=db_author.id, content=f"#fastapi {i}") for i in range(3)
+    ]
+
+    for post in posts:
+        sqlite_db.add(post)
+        sqlite_db.flush()
+        service.index_post(db=sqlite_db, post=post)
+
+    sqlite_db.commit()
+    monkeypatch.setattr(
+        "api.v1.services.hashtag.block_service.blocked_ids",
+        lambda db, user_id: frozenset({db_author.id}),
+    )
+
+    page = service.get_posts(db=sqlite_db, user=db_reader, tag="fastapi", limit=1)
+
+    assert [post["id"] for post in page["items"]] == [posts[0].id]
+    assert page["next_cursor"] is None
+
+
+def test_many_tags_are_indexed_without_repeating_statements(sqlite_db, db_author):
+    service = HashtagService()
+    post = Post(user_id=db_author.id, content=" ".join(f"#tag{i}" for i in range(8)))
+    sqlite_db.add(post)
+    sqlite_db.flush()
+
+    track_queries(sqlite_db.get_bind())
+    stats = QueryStats()
+    token = current_stats.set(stats)
+
+    try:
+        service.index_post(db=sqlite_db, post=post)
+        sqlite_db.flush()
+    finally:
+        current_stats.reset(token)
+
+    assert stats.count and stats.violations() == []
+    assert sqlite_db.query(PostHashtag).filter(PostHashtag.post_id == post.id).count() == 8
@@ -0,0 +1,132 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy import event, false
+from api.v1.models.post import Bookmark, Like, Post
+from api.v1.models.post_comment import PostComment
+from api.v1.schemas.post import RepostCreate
+from api.v1.schemas.post_comment import CreateCommentSchema
+from api.v1.services.post import post_service
+from api.v1.services.post_comment import comment_service
+
+
+def counts(db, post_id):
+    db.expire_all()
+    post = db.get(Post, post_id)
+    return post.like_count, post.comment_count, post.repost_count, post.bookmark_count
+
+
+def test_like_updates_like_count(sqlite_db, db_reader, db_post):
+    post_service.like_post(
+        db=sqlite_db, user=db_reader, post_id=db_post.id, background_task=BackgroundTasks()
+    )
+    assert counts(sqlite_db, db_post.id) == (1, 0, 0, 0)
+
+    post_service.like_post(
+        db=sqlite_db, user=db_reader, post_id=db_post.id, background_task=BackgroundTasks()
+    )
+    assert counts(sqlite_db, db_post.id) == (0, 0, 0, 0)
+
+
+def test_comment_updates_comment_count(sqlite_db, db_author, db_post):
+    comment = comment_service.create(
+        db=sqlite_db,
+        user=db_author,
+        post_id=db_post.id,
+        schema=CreateCommentSchema(comment="Nice"),
+        background_task=BackgroundTasks(),
+    )
+    post_service.add_comment(db=sqlite_db, user=db_author, post_id=db_post.id, content="Again")
+    assert counts(sqlite_db, db_post.id) == (0, 2, 0, 0)
+
+    comment_service.delete(
+        db=sqlite_db, user=db_author, post_id=db_post.id, comment_id=comment.id
+    )
+    assert counts(sqlite_db, db_post.id) == (0, 1, 0, 0)
+
+
+def test_blocked_user_cannot_comment(sqlite_db, db_author, db_reader, db_post, monkeypatch):
+    monkeypatch.setattr(
+        "api.v1.services.post.block_service.blocked_ids",
+        lambda db, user_id: frozenset({db_author.id}),
+    )
+
+    with pytest.raises(HTTPException) as error:
+        post_service.add_comment(db=sqlite_db, user=db_reader, post_id=db_post.id, content="Hi")
+
+    assert error.value.status_code == 404
+    assert counts(sqlite_db, db_post.id) == (0, 0, 0, 0)
+
+
+def test_repost_updates_repost_count(sqlite_db, db_reader, db_post):
+    repost = post_service.repost(
+        db=sqlite_db,
+        user=db_reader,
+        post_id=db_post.id,
+        schema=RepostCreate(content="Look"),
+        background_task=BackgroundTasks(),
+    )
+    assert counts(sqlite_db, db_post.id) == (0, 0, 1, 0)
+
+    post_service.delete(db=sqlite_db, user=db_reader, post_id=repost.id)
+    assert counts(sqlite_db, db_post.id) == (0, 0, 0, 0)
+
+
+def test_bookmark_updates_bookmark_count(sqlite_db, db_reader, db_post):
+    assert post_service.toggle_bookmark(db=sqlite_db, user=db_reader, post_id=db_post.id)["bookmarked"]
+    assert counts(sqlite_db, db_post.id) == (0, 0, 0, 1)
+
+    assert not post_service.toggle_bookmark(db=sqlite_db, user=db_reader, post_id=db_post.id)["bookmarked"]
+    assert counts(sqlite_db, db_post.id) == (0, 0, 0, 0)
+
+
+def test_concurrent_bookmark_tap_is_ignored(sqlite_db, db_reader, db_post):
+    sqlite_db.add(Bookmark(user_id=db_reader.id, post_id=db_post.id))
+    sqlite_db.commit()
+
+    def miss_the_other_tap(state):
+        # the delete ran before the other tap committed its bookmark
+        if state.is_delete:
+            state.statement = state.statement.where(false())
+
+    event.listen(sqlite_db, "do_orm_execute", miss_the_other_tap)
+    result = post_service.toggle_bookmark(db=sqlite_db, user=db_reader, post_id=db_post.id)
+    event.remove(sqlite_db, "do_orm_execute", miss_the_other_tap)
+
+    assert result["bookmarked"]
+    assert sqlite_db.query(Bookmark).count() == 1
+    assert counts(sqlite_db, db_post.id) == (0, 0, 0, 0)
+
+
+def test_reconcile_counters_repairs_drift_in_batches(sqlite_db, db_author, db_reader):
+    posts = [Post(user_id=db_author.id, content=f"post {i}") for i in range(5)]
+    sqlite_db.add_all(posts)
+    sqlite_db.flush()
+
+    # drift: counters missing real rows, and counters without any row
+    sqlite_db.add(Like(user_id=db_reader.id, post_id=posts[0].id, liked=True))
+    sqlite_db.add(PostComment(user_id=db_reader.id, post_id=posts[3].id, comment="Hi"))
+    posts[1].bookmark_count = 3
+    posts[4].repost_count = 2
+    # already correct, not counted as repaired
+    sqlite_db.add(Like(user_id=db_author.id, post_id=posts[2].id, liked=True))
+    posts[2].like_count = 1
+    sqlite_db.commit()
+
+    repaired = post_service.reconcile_counters(db=sqlite_db, batch_size=2)
+
+    assert repaired == 4
+    assert [counts(sqlite_db, post.id) for post in posts] == [
+        (1, 0, 0, 0),
+        (0, 0, 0, 0),
+        (1, 0, 0, 0),
+        (0, 1, 0, 0),
+        (0, 0, 0, 0),
+    ]
+    assert post_service.reconcile_counters(db=sqlite_db, batch_size=2) == 0
@@ -5,9 +5,13 @@ sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
 )
 
+from unittest.mock import patch
+from fastapi import BackgroundTasks
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from main import app
+from api.v1.models.post import Like, Post
+from api.v1.services.post import post_service
 
 client = TestClient(app)
 endpoint = "api/v1/posts/dgdvdy38ixh/like"
@@ -25,6 +29,28 @@ def test_like_post(
     )
 
     assert response.status_code == 200
+    assert response.json()["data"] == {"liked": True}
+    assert mock_like_post.call_args.kwargs["liked"] is None
+
+
+def test_unlike_post(
+    mock_db_session: Session,
+    access_token,
+    current_user,
+    mock_like_post,
+):
+
+    mock_like_post.return_value = {"liked": False}
+
+    response = client.patch(
+        endpoint,
+        params={"liked": False},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "Post unliked successfully"
+    assert mock_like_post.call_args.kwargs["liked"] is False
 
 
 def test_get_likes(
@@ -44,3 +70,58 @@ def test_get_likes(
         "liked": "True",
         "user": {"id": "jjj", "image": "hhh"},
     }
+
+
+def likes(db, post_id, user_id):
+    db.expire_all()
+    rows = db.query(Like).filter(Like.post_id == post_id, Like.user_id == user_id).count()
+    return rows, db.get(Post, post_id).like_count
+
+
+def test_like_post_toggles(sqlite_db, db_reader, db_post):
+    like = lambda: post_service.like_post(
+        db=sqlite_db, user=db_reader, post_id=db_post.id, background_task=BackgroundTasks()
+    )
+
+    assert like() == {"liked": True}
+    assert likes(sqlite_db, db_post.id, db_reader.id) == (1, 1)
+
+    assert like() == {"liked": False}
+    assert likes(sqlite_db, db_post.id, db_reader.id) == (0, 0)
+
+
+def test_like_post_is_idempotent(sqlite_db, db_reader, db_post):
+    background_task = BackgroundTasks()
+
+    for _ in range(2):
+        with patch.object(sqlite_db, "rollback", wraps=sqlite_db.rollback) as rollback:
+            response = post_service.like_post(
+                db=sqlite_db,
+                user=db_reader,
+                post_id=db_post.id,
+                background_task=background_task,
+                liked=True,
+            )
+
+        assert response == {"liked": True}
+
+    # the repeated like changed nothing, so it was rolled back unnotified
+    rollback.assert_called_once()
+    assert len(background_task.tasks) == 1
+    assert likes(sqlite_db, db_post.id, db_reader.id) == (1, 1)
+
+
+def test_unlike_post_not_liked(sqlite_db, db_reader, db_post):
+    background_task = BackgroundTasks()
+
+    response = post_service.like_post(
+        db=sqlite_db,
+        user=db_reader,
+        post_id=db_post.id,
+        background_task=background_task,
+        liked=False,
+    )
+
+    assert response == {"liked": False}
+    assert not background_task.tasks
+    assert likes(sqlite_db, db_post.id, db_reader.id) == (0, 0)
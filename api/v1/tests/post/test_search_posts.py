@@ -0,0 +1,104 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../")))
+
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from api.v1.models.post import Post
+from api.v1.services.search import SearchService
+from api.v1.utils.search import InvertedIndex
+from main import app
+
+client = TestClient(app)
+endpoint = "api/v1/posts/search"
+
+
+def test_index_ranks_documents_matching_every_term():
+    index = InvertedIndex()
+    index.add("post-1", "FastAPI tips and tricks")
+    index.add("post-2", "fastapi fastapi tips")
+    index.add("post-3", "python tips")
+
+    ranked = index.search("Tips FastAPI")
+
+    assert [post_id for _, post_id in ranked] == ["post-2", "post-1"]
+    assert index.search("tips django") == []
+
+
+def test_index_updates_incrementally():
+    index = InvertedIndex()
+    index.add("post-1", "hello world")
+    index.add("post-1", "goodbye world")
+    index.add("post-2", "hello")
+    index.remove("post-2")
+
+    assert index.search("hello") == []
+    assert [post_id for _, post_id in index.search("goodbye")] == ["post-1"]
+    assert len(index) == 1
+
+
+def test_search_posts(mock_db_session: Session, current_user, access_token):
+    with patch("api.v1.services.search.search_service.search") as search:
+        search.return_value = {"items": [{"id": "jjj"}], "next_cursor": None}
+
+        response = client.get(
+            endpoint,
+            params={"q": "fastapi", "limit": 5},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["items"][0]["id"] == "jjj"
+    assert search.call_args.kwargs["query"] == "fastapi"
+    assert search.call_args.kwargs["limit"] == 5
+
+
+def test_search_posts_requires_query(mock_db_session: Session, current_user, access_token):
+    response = client.get(endpoint, headers={"Authorization": f"Bearer {access_token}"})
+
+    assert response.status_code == 422
+
+
+def test_blocked_authors_are_skipped_before_paging(sqlite_db, db_author, db_reader, monkeypatch):
+    service = SearchService()
+    sqlite_db.add_all(
+        [Post(user_id=db_author.id, content=f"fastapi {i}") for i in range(3)]
+        + [Post(user_id=db_reader.id, content="fastapi fastapi fastapi")]
+    )
+    sqlite_db.commit()
+    monkeypatch.setattr(
+        "api.v1.services.search.block_service.blocked_ids",
+        lambda db, user_id: frozenset({db_author.id}),
+    )
+
+    first = service.search(db=sqlite_db, user=db_reader, query="fastapi", limit=1)
+
+    assert [post["original_post_owner"]["id"] for post in first["items"]] == [db_reader.id]
+    assert first["next_cursor"] is None
+
+
+def test_changes_made_while_loading_are_kept(sqlite_db, db_author):
+    service = SearchService()
+    old, new = Post(user_id=db_author.id, content="old fastapi"), Post(
+        user_id=db_author.id, content="new fastapi"
+    )
+    sqlite_db.add_all([old, new])
+    sqlite_db.commit()
+    old_id = old.id
+    sqlite_db.refresh(new)
+
+    def change_while_loading(state):
+        # the lock is free while the posts are read, another session may
+        # index or remove a post meanwhile
+        service.index_post(db=sqlite_db, post=new)
+        service.remove_post(db=sqlite_db, post_id=old_id)
+
+    event.listen(sqlite_db, "do_orm_execute", change_while_loading)
+    service.load(db=sqlite_db)
+    event.remove(sqlite_db, "do_orm_execute", change_while_loading)
+
+    assert [post_id for _, post_id in service.index.search("fastapi")] == [new.id]
+    assert service._pending == []
@@ -0,0 +1,123 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import asyncio
+from api.v1.utils.broker import InProcessBroker, PostgresBroker
+from api.v1.utils.websocket import ConnectionManager, user_topic
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+
+class FakeConnection:
+    """Stands in for the asyncpg connections of workers sharing one server"""
+
+    def __init__(self, server: list):
+        self.server = server
+        self.listeners = {}
+        self.termination_listeners = []
+        server.append(self)
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    def is_closed(self):
+        return self not in self.server
+
+    async def execute(self, query, channel, payload):
+        for connection in self.server:
+            if channel in connection.listeners:
+                connection.listeners[channel](connection, 0, channel, payload)
+
+    async def close(self):
+        self.server.remove(self)
+
+
+def postgres_broker(server: list) -> PostgresBroker:
+    broker = PostgresBroker(dsn="postgresql://test")
+
+    async def connect():
+        return FakeConnection(server)
+
+    broker.connect = connect
+    return broker
+
+
+async def broadcast_across(worker_a: ConnectionManager, worker_b: ConnectionManager):
+    for manager in (worker_a, worker_b):
+        await manager.backplane.start()
+        await manager.start()
+
+    on_a, on_b, elsewhere = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await worker_a.connect(on_a)
+    await worker_b.connect(on_b)
+    await worker_b.connect(elsewhere, topics=[user_topic("someone-else")])
+
+    # a post created on worker a
+    relayed = await worker_a.broadcast({"id": "post-1"})
+    await asyncio.sleep(0.01)
+
+    for manager in (worker_a, worker_b):
+        await manager.stop()
+        await manager.backplane.stop()
+
+    return relayed, on_a.sent, on_b.sent, elsewhere.sent
+
+
+def test_in_memory_backplane_relays_broadcasts():
+    backplane = InProcessBroker()
+    worker_a = ConnectionManager(backplane=backplane)
+    worker_b = ConnectionManager(backplane=backplane)
+
+    relayed, on_a, on_b, elsewhere = asyncio.run(broadcast_across(worker_a, worker_b))
+
+    assert relayed is None
+    assert on_a == on_b == ['{"id": "post-1"}']
+    assert elsewhere == []
+    assert backplane.subscribers == {}
+
+
+def test_postgres_backplane_reaches_every_worker():
+    server = []
+    worker_a = ConnectionManager(backplane=postgres_broker(server))
+    worker_b = ConnectionManager(backplane=postgres_broker(server))
+
+    _, on_a, on_b, elsewhere = asyncio.run(broadcast_across(worker_a, worker_b))
+
+    assert on_a == on_b == ['{"id": "post-1"}']
+    assert elsewhere == []
+    assert server == []
+
+
+def test_failing_backplane_delivers_locally():
+    class FailingBroker(InProcessBroker):
+        async def publish(self, channel, message):
+            raise ValueError("payload string too long")
+
+    manager = ConnectionManager(backplane=FailingBroker())
+    websocket = FakeWebSocket()
+
+    async def run():
+        await manager.connect(websocket)
+        queued = await manager.broadcast({"id": "post-1"})
+        await asyncio.sleep(0.01)
+        manager.disconnect(websocket)
+        return queued
+
+    assert asyncio.run(run()) == 1
+    assert websocket.sent == ['{"id": "post-1"}']
@@ -0,0 +1,107 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import asyncio
+from api.v1.utils.websocket import ConnectionManager, POSTS_TOPIC, post_topic
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("socket is closed")
+
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_broadcast_reaches_topic_subscribers_only():
+    async def scenario():
+        manager = ConnectionManager()
+        everything, comments = FakeWebSocket(), FakeWebSocket()
+
+        await manager.connect(everything)
+        await manager.connect(comments, topics=[post_topic("post-1")])
+
+        assert await manager.broadcast({"id": "post-2"}) == 1
+        assert await manager.broadcast("comment", topics=[post_topic("post-1")]) == 1
+        await asyncio.sleep(0.01)
+
+        return everything.sent, comments.sent
+
+    assert run(scenario()) == (['{"id": "post-2"}'], ["comment"])
+
+
+def test_slow_and_dead_sockets_are_evicted():
+    async def scenario():
+        manager = ConnectionManager(send_queue_size=1, send_timeout=0.05)
+        healthy, slow, dead = FakeWebSocket(), FakeWebSocket(delay=1), FakeWebSocket(fail=True)
+
+        for websocket in (healthy, slow, dead):
+            await manager.connect(websocket)
+
+        await manager.broadcast("first")
+        await asyncio.sleep(0.2)
+        await manager.broadcast("second")
+        await asyncio.sleep(0.01)
+
+        return manager, healthy, slow, dead
+
+    manager, healthy, slow, dead = run(scenario())
+
+    assert healthy.sent == ["first", "second"]
+    assert slow.closed_with == 1013 and dead.closed_with == 1013
+    assert manager.active_connections == [healthy]
+
+
+def test_full_queue_evicts_without_blocking_the_broadcast():
+    async def scenario():
+        manager = ConnectionManager(send_queue_size=2, send_timeout=10)
+        stalled = FakeWebSocket(delay=10)
+        await manager.connect(stalled)
+
+        delivered = [await manager.broadcast(str(i)) for i in range(4)]
+        await asyncio.sleep(0)
+
+        return manager, stalled, delivered
+
+    manager, stalled, delivered = run(scenario())
+
+    # the queue holds two messages, the third overflows and evicts the socket
+    assert delivered == [1, 1, 0, 0]
+    assert manager.connections == {} and manager.topics == {}
+    assert stalled.closed_with == 1013
+
+
+def test_disconnect_cleans_up_topics():
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+
+        await manager.connect(websocket, topics=[POSTS_TOPIC, post_topic("post-1")])
+        manager.unsubscribe(websocket, POSTS_TOPIC)
+        topics = set(manager.topics)
+        manager.disconnect(websocket)
+
+        return topics, manager.topics
+
+    assert run(scenario()) == ({post_topic("post-1")}, {})
@@ -7,6 +7,7 @@ sys.path.insert(
 
 
 import pytest
+from unittest.mock import AsyncMock, patch
 from main import app
 from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
@@ -83,3 +84,22 @@ def test_create_comment_post_not_found(
     assert response.status_code == 404
     assert data["status_code"] == 404
     assert data["message"] == "Post not found"
+
+
+def test_created_comment_reaches_post_subscribers(
+    mock_db_session: Session, access_token, current_user, mock_create_comment
+):
+    with patch(
+        "api.v1.routes.post_comment.manager.broadcast", new_callable=AsyncMock
+    ) as broadcast:
+        response = client.post(
+            endpoint,
+            headers={"authorization": f"Bearer {access_token}"},
+            json={"comment": "Test comment"},
+        )
+
+    assert response.status_code == 201
+    broadcast.assert_awaited_once_with(
+        mock_create_comment.return_value,
+        topics=["post:ac3d6659-8f67-4a67-b690-9f77fab7e6e3"],
+    )
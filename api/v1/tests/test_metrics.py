@@ -0,0 +1,156 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+)
+
+import asyncio
+import json
+import subprocess
+import threading
+import time
+from fastapi.testclient import TestClient
+from main import app
+from api.v1.utils.metrics import AGGREGATE_FILE, Registry
+
+client = TestClient(app)
+
+
+def test_histogram_and_counter_exposition():
+    registry = Registry(multiprocess_dir="")
+    latency = registry.histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1))
+    errors = registry.counter("errors_total", "Errors", ["reason"])
+
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5, route="/a")
+    errors.inc(reason='say "hi"\n')
+
+    text = registry.expose()
+
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{route="/a"} 5.55' in text
+    assert 'latency_seconds_count{route="/a"} 3' in text
+    assert 'errors_total{reason="say \\"hi\\"\\n"} 1' in text
+
+
+def test_threads_record_without_losing_updates():
+    registry = Registry(multiprocess_dir="")
+    requests = registry.counter("requests_total", "Requests")
+    in_flight = registry.gauge("in_flight", "In flight")
+
+    def record():
+        for _ in range(1000):
+            requests.inc()
+            in_flight.inc()
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    # decremented on another thread than the increments
+    in_flight.dec(8000)
+
+    text = registry.expose()
+
+    assert "requests_total 8000" in text
+    assert "in_flight 0" in text
+
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+    registry = Registry(multiprocess_dir=str(tmp_path))
+    requests = registry.counter("requests_total", "Requests", ["route"])
+    connections = registry.gauge("connections", "Connections", callback=lambda: 2)
+    requests.inc(route="/a")
+
+    other_worker = Registry(multiprocess_dir=str(tmp_path))
+    other_worker.counter("requests_total", "Requests", ["route"]).inc(3, route="/a")
+    other_worker.gauge("connections", "Connections", callback=lambda: 5)
+    (tmp_path / "1.json").write_text(json.dumps(other_worker.snapshot()))
+
+    text = registry.expose()
+
+    assert 'requests_total{route="/a"} 4' in text
+    assert "connections 7" in text
+
+
+def worker(tmp_path, requests: int, connections: int) -> Registry:
+    registry = Registry(multiprocess_dir=str(tmp_path))
+    registry.counter("requests_total", "Requests").inc(requests)
+    registry.gauge("connections", "Connections").inc(connections)
+    registry.histogram("latency_seconds", "Latency", buckets=(1,)).observe(0.5)
+    return registry
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+def test_stopped_worker_keeps_its_counters(tmp_path):
+    async def serve():
+        registry = worker(tmp_path, requests=2, connections=3)
+        await registry.start()
+        await registry.stop()
+
+    asyncio.run(serve())
+
+    text = worker(tmp_path, requests=1, connections=1).expose()
+
+    assert "requests_total 3" in text
+    assert "latency_seconds_count 2" in text
+    assert "connections 1" in text
+    assert sorted(os.listdir(tmp_path)) == [AGGREGATE_FILE, "metrics.lock"]
+
+
+def test_dead_worker_is_folded_once(tmp_path):
+    pid = dead_pid()
+    (tmp_path / f"{pid}.json").write_text(
+        json.dumps(worker(tmp_path, requests=2, connections=3).snapshot())
+    )
+    registry = worker(tmp_path, requests=1, connections=1)
+
+    assert "requests_total 3" in registry.expose()
+    assert not (tmp_path / f"{pid}.json").exists()
+
+    text = registry.expose()
+
+    assert "requests_total 3" in text
+    assert "latency_seconds_count 2" in text
+    assert "connections 1" in text
+
+
+def test_hung_worker_keeps_its_counters_but_not_its_gauges(tmp_path):
+    path = tmp_path / f"{os.getppid()}.json"
+    path.write_text(json.dumps(worker(tmp_path, requests=2, connections=3).snapshot()))
+    os.utime(path, (time.time() - 60, time.time() - 60))
+
+    text = worker(tmp_path, requests=1, connections=1).expose()
+
+    assert "requests_total 3" in text
+    assert "connections 1" in text
+    assert path.exists()
+
+
+def test_metrics_endpoint_reports_route_templates():
+    client.get("/")
+    client.get("/zzz")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"}' in response.text
+    assert 'route="unmatched",status="404"' in response.text
+    assert "websocket_connections 0" in response.text
+    assert "sse_connections" in response.text
+    assert "# TYPE notification_push_duration_seconds histogram" in response.text
@@ -0,0 +1,98 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+)
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from api.v1.utils.query_budget import (
+    QueryBudgetExceeded,
+    QueryBudgetMiddleware,
+    QueryStats,
+    current_stats,
+    query_budget,
+    track_queries,
+)
+
+engine = create_engine("sqlite://")
+track_queries(engine)
+
+
+def make_client(strict: bool) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(QueryBudgetMiddleware, strict=strict)
+
+    @app.get("/queries/{count}")
+    def run_queries(count: int, distinct: bool = False):
+        with engine.connect() as connection:
+            for number in range(count):
+                connection.execute(text(f"SELECT {number if distinct else 1}"))
+
+        return {}
+
+    @app.get("/report", dependencies=[Depends(query_budget(100))])
+    def report():
+        with engine.connect() as connection:
+            for number in range(40):
+                connection.execute(text(f"SELECT {number}"))
+
+        return {}
+
+    return TestClient(app)
+
+
+def test_server_timing_counts_queries():
+    response = make_client(strict=True).get("/queries/3")
+
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'desc="3 queries, 0 rows"' in response.headers["server-timing"]
+
+
+def test_repeated_statement_fails_in_strict_mode():
+    with pytest.raises(QueryBudgetExceeded, match="same statement run 6 times"):
+        make_client(strict=True).get("/queries/6")
+
+
+def test_query_budget_exceeded_fails_in_strict_mode():
+    with pytest.raises(QueryBudgetExceeded, match="31 queries, budget is 30"):
+        make_client(strict=True).get("/queries/31?distinct=true")
+
+
+def test_query_budget_exceeded_is_logged(caplog):
+    response = make_client(strict=False).get("/queries/6")
+
+    assert response.status_code == 200
+    assert "Query budget exceeded by GET /queries/6" in caplog.text
+
+
+def test_route_raises_its_query_budget():
+    response = make_client(strict=True).get("/report")
+
+    assert response.status_code == 200
+    assert 'desc="40 queries' in response.headers["server-timing"]
+
+
+def test_failing_statement_leaves_no_start_behind():
+    stats = QueryStats()
+    token = current_stats.set(stats)
+
+    try:
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM missing"))
+
+            connection.execute(text("SELECT 1"))
+            info = dict(connection.info)
+    finally:
+        current_stats.reset(token)
+
+    assert info == {}
+    assert stats.count == 1
+    assert stats.shapes == {"SELECT 1": 1}
@@ -35,14 +35,8 @@ def mock_user_update():
 
 @pytest.fixture
 def mock_user_update_effect():
-    with patch(
-        "api.v1.services.user.user_service.get_user_detail"
-    ) as user_detail_effect:
-        user_detail_effect.side_effect = HTTPException(
-            403, "You do not have permission to update this profile"
-        )
-
-        yield user_detail_effect
+    # id of another user, so the real permission check rejects the update
+    return "67890"
 
 
 @pytest.fixture
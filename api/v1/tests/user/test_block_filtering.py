@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+import pytest
+from fastapi import HTTPException
+from api.v1.services.block import BlockService
+from api.v1.services.user import user_service
+
+
+def test_block_set_is_cached_until_invalidated(mock_db_session):
+    service = BlockService()
+    mock_db_session.execute.return_value.scalars.return_value = ["blocked", "blocker"]
+
+    assert service.blocked_ids(db=mock_db_session, user_id="me") == {"blocked", "blocker"}
+    assert service.is_blocked(db=mock_db_session, user_id="me", other_id="blocked")
+    assert mock_db_session.execute.call_count == 1
+
+    service.invalidate("me")
+    mock_db_session.execute.return_value.scalars.return_value = []
+
+    assert service.blocked_ids(db=mock_db_session, user_id="me") == frozenset()
+    assert mock_db_session.execute.call_count == 2
+
+
+def test_blocked_profile_is_hidden(mock_db_session, test_user, monkeypatch):
+    monkeypatch.setattr(
+        "api.v1.services.user.block_service.blocked_ids",
+        lambda db, user_id: frozenset({"blocked"}),
+    )
+
+    with pytest.raises(HTTPException) as error:
+        user_service.get_user_detail(db=mock_db_session, user_id="blocked", viewer=test_user)
+
+    assert error.value.status_code == 404
+    assert not mock_db_session.query.called
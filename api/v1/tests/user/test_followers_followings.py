@@ -8,6 +8,8 @@ sys.path.insert(
 from fastapi.testclient import TestClient
 from main import app
 from sqlalchemy.orm import Session
+from api.v1.models.user import User, followers_table
+from api.v1.services.user import user_service
 
 client = TestClient(app)
 
@@ -44,3 +46,53 @@ def test_followings(
         {"id": "hhh", "username": "joshua", "profile_picture": "hhh"},
         {"id": "jjj", "username": "joseph", "profile_picture": "jjj"},
     ]
+
+
+def test_followers_of_requested_user_are_paginated(
+    mock_db_session: Session, access_token, current_user, mock_followers
+):
+
+    response = client.get(
+        "/api/v1/users/hhh/followers",
+        params={"limit": 2, "cursor": "abc"},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+    kwargs = mock_followers.call_args.kwargs
+    assert response.status_code == 200
+    assert (kwargs["user_id"], kwargs["limit"], kwargs["cursor"]) == ("hhh", 2, "abc")
+
+
+def test_followers_are_paged_after_dropping_blocked_users(sqlite_db, monkeypatch):
+    followed = User(username="followed", email="followed@example.com", password="x")
+    fans = [
+        User(id=f"{i}aaa", username=f"fan{i}", email=f"fan{i}@example.com", password="x")
+        for i in range(4)
+    ]
+    sqlite_db.add_all([followed, *fans])
+    sqlite_db.flush()
+    sqlite_db.execute(
+        followers_table.insert(),
+        [{"follower_id": fan.id, "followed_id": followed.id} for fan in fans],
+    )
+    followed.follower_count = len(fans)
+    sqlite_db.commit()
+    monkeypatch.setattr(
+        "api.v1.services.user.block_service.blocked_ids",
+        lambda db, user_id: frozenset({"1aaa"}),
+    )
+
+    pages, cursor = [], None
+
+    while True:
+        page = user_service.followers(
+            db=sqlite_db, user_id=followed.id, viewer=followed, limit=1, cursor=cursor
+        )
+        pages.append([user["id"] for user in page["items"]])
+        cursor = page["next_cursor"]
+
+        if cursor is None:
+            break
+
+    assert pages == [["0aaa"], ["2aaa"], ["3aaa"]]
+    assert page["count"] == 4
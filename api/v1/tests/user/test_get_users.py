@@ -5,8 +5,13 @@ sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
 )
 
+from unittest.mock import patch
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+from api.v1.models.user import User
+from api.v1.services.user import user_service
+from api.v1.utils.trie import Trie
 from main import app
 
 client = TestClient(app)
@@ -26,3 +31,62 @@ def test_get_user_detail(mock_db_session: Session, mock_user_detail, mock_get_us
         {"id": 2, "username": "test"},
         {"id": 3, "username": "doe"},
     ]
+
+
+def test_get_users_is_paginated(mock_db_session: Session, mock_get_users):
+    response = client.get(endpoint, params={"search": "doe", "limit": 2, "cursor": "abc"})
+
+    assert response.status_code == 200
+    kwargs = mock_get_users.call_args.kwargs
+    assert (kwargs["search"], kwargs["limit"], kwargs["cursor"]) == ("doe", 2, "abc")
+    assert kwargs["viewer"] is None
+
+
+def test_typeahead_returns_most_followed_first(mock_db_session: Session):
+    trie = Trie(size=2)
+    trie.add("doe", "user-1", score=5, value={"id": "user-1", "username": "doe"})
+    trie.add("dora", "user-2", score=50, value={"id": "user-2", "username": "Dora"})
+    trie.add("dot", "user-3", score=1, value={"id": "user-3", "username": "dot"})
+    trie.add("alice", "user-4", score=99, value={"id": "user-4", "username": "alice"})
+
+    with patch.object(user_service, "typeahead_trie", trie):
+        response = client.get(f"{endpoint}/typeahead", params={"q": "DO"})
+
+    assert response.status_code == 200
+    assert [user["username"] for user in response.json()["data"]] == ["Dora", "doe"]
+
+
+def test_trie_remove():
+    trie = Trie(size=10)
+    trie.add("doe", "user-1", score=5, value="doe")
+    trie.add("dora", "user-2", score=50, value="dora")
+    trie.remove("dora", "user-2")
+
+    assert trie.top("do", limit=10) == ["doe"]
+    assert trie.top("dor", limit=10) == []
+    assert trie.top("x", limit=10) == []
+
+
+def test_discover_seeks_instead_of_sorting(sqlite_db):
+    sqlite_db.add_all(
+        User(id=user_id, username=f"user-{user_id}", email=f"{user_id}@example.com", password="x")
+        for user_id in ("0aaa", "4aaa", "8aaa", "caaa")
+    )
+    sqlite_db.commit()
+
+    statements = []
+    event.listen(
+        sqlite_db.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    with patch("api.v1.services.user.uuid4", return_value="5aaa"):
+        users = user_service.discover(db=sqlite_db, limit=3)
+
+    # seeks past the pivot, then wraps around to the start of the index
+    assert [user["id"] for user in users] == ["8aaa", "caaa", "0aaa"]
+    assert len(statements) == 2
+    assert "user.id >= ?" in statements[0] and "ORDER BY user.id" in statements[0]
+    assert "user.id < ?" in statements[1]
+    assert not any("random" in statement.lower() for statement in statements)
@@ -0,0 +1,93 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
+)
+
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from api.v1.models.user import followers_table
+from api.v1.services.suggestion import SuggestionService
+from main import app
+
+client = TestClient(app)
+endpoint = "api/v1/users/suggestions"
+
+
+def suggestion_service_for(edges) -> SuggestionService:
+    service = SuggestionService()
+    service.graph.load(edges)
+    service._loaded = True
+
+    return service
+
+
+def test_candidates_ranked_by_mutual_follows():
+    service = suggestion_service_for(
+        [
+            ("me", "ann"), ("me", "bob"), ("me", "cat"),
+            ("ann", "dan"), ("bob", "dan"), ("cat", "dan"),
+            ("ann", "eve"), ("bob", "eve"),
+            ("ann", "bob"), ("ann", "me"),
+        ]
+    )
+
+    # followed already or the user themself are never candidates
+    assert service.candidates("me") == [("dan", 3), ("eve", 2)]
+
+
+def test_follow_refreshes_cached_candidates():
+    service = suggestion_service_for([("me", "ann"), ("ann", "dan"), ("ann", "eve")])
+
+    assert [user_id for user_id, _ in service.candidates("me")] == ["dan", "eve"]
+
+    service.follow("me", "dan")
+    service.unfollow("ann", "eve")
+
+    # dan is followed now and ann no longer leads to eve
+    assert service.candidates("me") == []
+
+
+def test_get_suggestions(mock_db_session: Session, access_token, current_user):
+    with patch("api.v1.services.suggestion.suggestion_service.suggestions") as suggestions:
+        suggestions.return_value = [{"id": "dan", "username": "dan", "mutual_count": 3}]
+
+        response = client.get(
+            endpoint,
+            params={"limit": 5},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["data"][0]["mutual_count"] == 3
+    assert suggestions.call_args.kwargs["limit"] == 5
+
+
+def test_get_suggestions_unauthenticated():
+    response = client.get(endpoint)
+
+    assert response.status_code == 401
+
+
+def test_follows_made_while_reloading_are_kept(sqlite_db):
+    service = SuggestionService()
+    sqlite_db.execute(
+        followers_table.insert(),
+        [{"follower_id": "me", "followed_id": "ann"}, {"follower_id": "ann", "followed_id": "bob"}],
+    )
+    sqlite_db.commit()
+
+    def follow_while_reloading(state):
+        # the lock is free while the edges are read, a follow may land meanwhile
+        service.follow("ann", "cat")
+        service.unfollow("ann", "bob")
+
+    event.listen(sqlite_db, "do_orm_execute", follow_while_reloading)
+    service.load_graph(db=sqlite_db)
+    event.remove(sqlite_db, "do_orm_execute", follow_while_reloading)
+
+    assert service.candidates("me") == [("cat", 1)]
+    assert service._pending == []
@@ -45,12 +45,18 @@ def test_update_user_side_effect(
 ):
     body = {"bio": "Update my bio", "social_links": ["http://example.com"]}
 
+    # the access token was committed through the same mock
+    mock_db_session.reset_mock()
+
     response = client.patch(
-        endpoint, headers={"authorization": f"Bearer {access_token}"}, json=body
+        f"api/v1/users/{mock_user_update_effect}",
+        headers={"authorization": f"Bearer {access_token}"},
+        json=body,
     )
 
     data = response.json()
 
     assert response.status_code == 403
     assert data["status_code"] == 403
-    assert data["message"] == "You do not have permission to update this profile"
+    assert data["message"] == "You do not have permission to update this user"
+    assert not mock_db_session.commit.called
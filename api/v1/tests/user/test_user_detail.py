@@ -5,8 +5,10 @@ sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
 )
 
+from unittest.mock import MagicMock
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from api.v1.services.user import USER_SUMMARY_COLUMNS, user_service
 from main import app
 
 client = TestClient(app)
@@ -31,3 +33,23 @@ def test_get_user_detail(
         "username": "test",
         "email": "test@test.com",
     }
+
+
+def test_user_summary_is_one_narrow_query(mock_db_session: Session):
+    row = MagicMock(
+        id="12345", username="test", avatar_url="/avatar", follower_count=100000, following_count=3
+    )
+    mock_db_session.query.return_value.filter.return_value.first.return_value = row
+
+    summary = user_service.get_user_summary(db=mock_db_session, user_id="12345")
+
+    assert mock_db_session.query.call_count == 1
+    # columns of the user row only, no relationship is loaded
+    assert mock_db_session.query.call_args.args == USER_SUMMARY_COLUMNS
+    assert summary.model_dump() == {
+        "id": "12345",
+        "username": "test",
+        "avatar_url": "/avatar",
+        "follower_count": 100000,
+        "following_count": 3,
+    }
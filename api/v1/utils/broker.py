@@ -0,0 +1,285 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from api.v1.utils.database import SQLALCHEMY_DATABASE_URL
+from api.v1.utils.metrics import registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "memory" delivers within one worker, "postgres" across workers and nodes
+NOTIFICATION_BROKER = os.environ.get("NOTIFICATION_BROKER", "memory")
+
+# postgres channel the notifications are sent on
+NOTIFICATION_CHANNEL = os.environ.get("NOTIFICATION_CHANNEL", "notifications")
+
+# messages buffered per subscriber before the overflow policy kicks in
+SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("SUBSCRIBER_QUEUE_SIZE", 100))
+
+# "drop_oldest" or "coalesce", see EventQueue
+SUBSCRIBER_OVERFLOW_POLICY = os.environ.get("SUBSCRIBER_OVERFLOW_POLICY", "drop_oldest")
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce")
+
+# most seconds between two attempts of a broker to get its lost connection
+# back, the delay doubles from half a second
+NOTIFICATION_BROKER_RECONNECT_SECONDS = float(
+    os.environ.get("NOTIFICATION_BROKER_RECONNECT_SECONDS", 30)
+)
+
+
+class EventQueue(asyncio.Queue):
+    """A bounded subscriber queue that never blocks or fails the publisher
+
+    When full, "drop_oldest" discards the oldest pending message and
+    "coalesce" replaces every pending message with `merge(pending)`, e.g. a
+    single "42 new notifications" message.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = SUBSCRIBER_QUEUE_SIZE,
+        overflow: str = SUBSCRIBER_OVERFLOW_POLICY,
+        merge: Optional[Callable[[List[str]], str]] = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+
+        if overflow == "coalesce" and merge is None:
+            raise ValueError("The coalesce policy needs a merge function")
+
+        super().__init__(maxsize=maxsize)
+        self.overflow = overflow
+        self.merge = merge
+        self.dropped = 0
+
+    def offer(self, message: str):
+        if not self.full():
+            return self.put_nowait(message)
+
+        if self.overflow == "drop_oldest":
+            self.get_nowait()
+            self.dropped += 1
+            return self.put_nowait(message)
+
+        pending = [self.get_nowait() for _ in range(self.qsize())]
+        self.dropped += len(pending)
+        self.put_nowait(self.merge(pending + [message]))
+
+
+class Broker(ABC):
+    """Publish/subscribe transport for messages addressed to a channel
+
+    Publishing to a channel nobody subscribed to is a no-op, subscribers get
+    a bounded `EventQueue` receiving the messages published while they are
+    subscribed, and are removed when they leave the `subscribe` block.
+
+    :usage: async with broker.subscribe(user_id) as queue:
+                message = await queue.get()
+            await broker.publish(user_id, "alice liked your post")
+    """
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str, **queue_options):
+        pass
+
+    @abstractmethod
+    def queue_depth(self) -> int:
+        """Messages waiting in this worker's subscriber queues"""
+
+
+class InProcessBroker(Broker):
+    """Delivers messages to the subscribers of the current process only"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[EventQueue]] = {}
+
+    async def publish(self, channel: str, message: str):
+        self.deliver(channel, message)
+
+    def deliver(self, channel: str, message: str):
+        for queue in self.subscribers.get(channel, ()):
+            queue.offer(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str, **queue_options) -> AsyncIterator[EventQueue]:
+        queue = EventQueue(**queue_options)
+        self.subscribers.setdefault(channel, set()).add(queue)
+
+        try:
+            yield queue
+        finally:
+            queues = self.subscribers.get(channel, set())
+            queues.discard(queue)
+
+            if not queues:
+                self.subscribers.pop(channel, None)
+
+    def queue_depth(self) -> int:
+        return sum(
+            queue.qsize() for queues in list(self.subscribers.values()) for queue in queues
+        )
+
+
+class PostgresBroker(Broker):
+    """Relays messages between workers and nodes with LISTEN/NOTIFY
+
+    Every worker keeps one connection listening on `channel` and hands what
+    it receives to its local subscribers, so a message published by any
+    worker reaches the subscriber wherever its stream is held.
+
+    A lost connection is reestablished in the background, messages published
+    meanwhile only reach this worker's subscribers.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str = NOTIFICATION_CHANNEL,
+        reconnect_delay: float = NOTIFICATION_BROKER_RECONNECT_SECONDS,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.local = InProcessBroker()
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._reconnecting: Optional[asyncio.Task] = None
+        self._stopped = True
+
+    async def connect(self):
+        import asyncpg
+
+        return await asyncpg.connect(self.dsn)
+
+    async def start(self):
+        self._stopped = False
+        await self._listen()
+
+    async def stop(self):
+        self._stopped = True
+
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            await asyncio.gather(self._reconnecting, return_exceptions=True)
+            self._reconnecting = None
+
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+
+    async def _listen(self):
+        connection = await self.connect()
+
+        try:
+            await connection.add_listener(self.channel, self._on_notify)
+            connection.add_termination_listener(self._on_terminate)
+        except Exception:
+            await connection.close()
+            raise
+
+        self._connection = connection
+
+    def _on_terminate(self, connection):
+        # closed by stop, or already replaced
+        if self._stopped or connection is not self._connection:
+            return
+
+        logger.warning("Notification broker lost its connection, reconnecting")
+        self._connection = None
+        self._reconnecting = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 0.5
+
+        while True:
+            try:
+                await self._listen()
+                logger.info("Notification broker reconnected")
+                return
+            except Exception:
+                logger.warning("Notification broker reconnection failed, retrying in %ss", delay)
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_delay)
+
+    async def publish(self, channel: str, message: str):
+        connection = self._connection
+
+        if connection is None:
+            logger.warning("Notification broker is not connected, delivering locally")
+            return self.local.deliver(channel, message)
+
+        payload = json.dumps({"channel": channel, "message": message})
+
+        try:
+            # a connection runs one statement at a time
+            async with self._lock:
+                await connection.execute(
+                    "SELECT pg_notify($1, $2)", self.channel, payload
+                )
+        except Exception:
+            if not connection.is_closed():
+                raise
+
+            logger.warning("Notification broker connection dropped, delivering locally")
+            self.local.deliver(channel, message)
+
+    def subscribe(self, channel: str, **queue_options):
+        return self.local.subscribe(channel, **queue_options)
+
+    def queue_depth(self) -> int:
+        return self.local.queue_depth()
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            data = json.loads(payload)
+            self.local.deliver(data["channel"], data["message"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Dropped malformed notification payload %r", payload)
+
+
+def get_postgres_dsn(url: str) -> str:
+    """Strips the SQLAlchemy driver from DATABASE_URL for asyncpg"""
+
+    return make_url(url).set(drivername="postgresql").render_as_string(
+        hide_password=False
+    )
+
+
+def create_broker(backend: str = NOTIFICATION_BROKER) -> Broker:
+    if backend == "memory":
+        return InProcessBroker()
+
+    if backend == "postgres":
+        return PostgresBroker(dsn=get_postgres_dsn(SQLALCHEMY_DATABASE_URL))
+
+    raise ValueError(f"Unknown notification broker {backend!r}")
+
+
+# shared by the notification service and the websocket manager, started and
+# stopped with the app
+broker = create_broker()
+
+registry.gauge(
+    "broker_subscriber_queue_depth",
+    "Messages waiting in the broker's subscriber queues",
+    callback=broker.queue_depth,
+)
@@ -1,13 +1,119 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
+from api.v1.utils.metrics import registry
+from api.v1.utils.query_budget import track_queries
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL")
 
+# asyncio drivers used in place of the sync ones in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Derives the asyncio driver url from a sync DATABASE_URL
+
+    :usage: get_async_database_url("postgresql://user@host/db")
+        -> "postgresql+asyncpg://user@host/db"
+    """
+
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    if backend not in ASYNC_DRIVERS:
+        return url.render_as_string(hide_password=False)
+
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+
+    # asyncpg takes "ssl" rather than libpq's "sslmode"
+    if "sslmode" in url.query:
+        url = url.difference_update_query(["sslmode"]).update_query_dict(
+            {"ssl": url.query["sslmode"]}
+        )
+
+    return url.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.environ.get(
+    "ASYNC_DATABASE_URL", get_async_database_url(SQLALCHEMY_DATABASE_URL)
+)
+
+# sync engine, used by scripts such as seed_data.py and by the tests
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# asyncio engine, used by the api routes
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# per request statement counts, see QueryBudgetMiddleware
+track_queries(engine)
+track_queries(async_engine.sync_engine)
+
+POOL_CHECKOUT_DURATION = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time waited for a pooled database connection",
+    labelnames=("engine",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+def time_pool_checkout(engine, name: str):
+    """Records how long checking a connection out of `engine`'s pool takes
+
+    The pool has no event firing before a checkout, so its `connect` is
+    wrapped; a pool recreated by `engine.dispose()` is no longer timed.
+    """
+
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        with POOL_CHECKOUT_DURATION.time(engine=name):
+            return connect()
+
+    pool.connect = timed_connect
+
+
+time_pool_checkout(engine, "sync")
+time_pool_checkout(async_engine.sync_engine, "async")
+
 Base = declarative_base()
+
+
+# dialect inserts supporting ON CONFLICT DO NOTHING
+CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert_or_ignore(db, model):
+    """INSERT statement skipping rows that violate a unique constraint
+
+    The statement's rowcount tells whether the row was written, so callers
+    can act on the outcome without a prior SELECT. Other backends get a plain
+    INSERT, where the constraint raises instead.
+
+    :usage: added = db.execute(insert_or_ignore(db, Like).values(...)).rowcount
+    """
+
+    dialect = db.get_bind().dialect.name
+
+    if dialect not in CONFLICT_INSERTS:
+        return insert(model)
+
+    return CONFLICT_INSERTS[dialect](model).on_conflict_do_nothing()
@@ -1,4 +1,4 @@
-from api.v1.utils.database import SessionLocal
+from api.v1.utils.database import AsyncSessionLocal, SessionLocal
 
 
 def get_db():
@@ -9,3 +9,13 @@ def get_db():
         raise e
     finally:
         db.close()
+
+
+async def get_async_db():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    except Exception as e:
+        raise e
+    finally:
+        await db.close()
@@ -0,0 +1,62 @@
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Set, Tuple
+
+
+class FollowGraph:
+    """A thread-safe in-memory adjacency list of the follow graph
+
+    Stores, per user, the set of users they follow, which is the sparse row
+    of the adjacency matrix. Counting friends of friends is then the product
+    of a user's row with the matrix, touching only the non-zero entries.
+
+    :usage: graph = FollowGraph()
+            graph.load([(follower_id, followed_id), ...])
+            graph.friends_of_friends(user_id)  # Counter({candidate: mutuals})
+    """
+
+    def __init__(self):
+        self._following: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, edges: Iterable[Tuple[str, str]]):
+        following: Dict[str, Set[str]] = {}
+
+        for follower_id, followed_id in edges:
+            following.setdefault(follower_id, set()).add(followed_id)
+
+        with self._lock:
+            self._following = following
+
+    def follow(self, follower_id: str, followed_id: str):
+        with self._lock:
+            self._following.setdefault(follower_id, set()).add(followed_id)
+
+    def unfollow(self, follower_id: str, followed_id: str):
+        with self._lock:
+            followings = self._following.get(follower_id)
+
+            if followings is None:
+                return
+
+            followings.discard(followed_id)
+
+            if not followings:
+                del self._following[follower_id]
+
+    def followings(self, user_id: str) -> Set[str]:
+        with self._lock:
+            return set(self._following.get(user_id, ()))
+
+    def friends_of_friends(self, user_id: str) -> Counter:
+        """Counts, for every user followed by someone `user_id` follows, how
+        many of those follows lead to them
+        """
+
+        with self._lock:
+            counts: Counter = Counter()
+
+            for followed_id in self._following.get(user_id, ()):
+                counts.update(self._following.get(followed_id, ()))
+
+        return counts
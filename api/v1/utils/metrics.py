@@ -0,0 +1,508 @@
+import asyncio
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# directory the workers of a multiprocess server share their metrics through,
+# unset when running a single worker
+METRICS_MULTIPROCESS_DIR = os.environ.get("METRICS_MULTIPROCESS_DIR", "")
+
+# seconds between two writes of a worker's metrics to METRICS_MULTIPROCESS_DIR
+METRICS_DUMP_INTERVAL_SECONDS = float(os.environ.get("METRICS_DUMP_INTERVAL_SECONDS", 5))
+
+# request latency buckets in seconds, prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# counters and histograms of the workers that are gone, in METRICS_MULTIPROCESS_DIR
+AGGREGATE_FILE = "aggregate.json"
+
+LOCK_FILE = "metrics.lock"
+
+
+class Metric:
+    """A named metric whose samples are split by label values
+
+    Every thread writes to its own shard, so recording never takes a lock nor
+    contends with other threads; a scrape sums the shards. Shards are plain
+    dicts, copied in one step under the GIL while their owner may write.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "values", None)
+
+        if shard is None:
+            shard = self._local.values = {}
+            self._shards.append(shard)
+
+        return shard
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Dict[Tuple[str, ...], object]:
+        merged: Dict[Tuple[str, ...], object] = {}
+
+        for shard in list(self._shards):
+            for key, value in shard.copy().items():
+                merged[key] = merge_values(merged.get(key), value)
+
+        return merged
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value going up and down, or read from `callback` at scrape time
+
+    Increments and decrements may happen on different threads, their shards
+    still sum to the current value.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def inc(self, amount: float = 1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Dict[Tuple[str, ...], object]:
+        if self.callback is None:
+            return super().samples()
+
+        try:
+            return {(): self.callback()}
+        except Exception:
+            logger.exception("Metric callback of %s failed", self.name)
+            return {}
+
+
+class Histogram(Metric):
+    """Counts observations per bucket, plus their sum and count
+
+    A sample is the list of per-bucket counts, the last bucket being +Inf,
+    followed by the sum; buckets are made cumulative when exposed.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        counts = shard.get(key)
+
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 2)
+
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def time(self, **labels):
+        return Timer(self, labels)
+
+
+class Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+def merge_values(left, right):
+    """Sums two samples, numbers or histogram bucket lists"""
+
+    if left is None:
+        return list(right) if isinstance(right, list) else right
+
+    if isinstance(right, list):
+        return [a + b for a, b in zip(left, right)]
+
+    return left + right
+
+
+class Registry:
+    """Holds the metrics of a worker and exposes them to prometheus
+
+    With a `multiprocess_dir`, every worker started with `start` writes a
+    snapshot of its metrics there periodically and a scrape, whichever worker
+    serves it, merges the snapshots of all live workers.
+
+    The counters and histograms of a worker that stops or dies are folded
+    into an aggregate kept in the same directory, prometheus would read them
+    disappearing as a reset; its gauges are dropped.
+
+    :usage: requests = registry.counter("requests_total", "Requests", ["route"])
+            requests.inc(route="/posts")
+            registry.expose()  # prometheus text format
+    """
+
+    def __init__(
+        self,
+        multiprocess_dir: str = METRICS_MULTIPROCESS_DIR,
+        dump_interval: float = METRICS_DUMP_INTERVAL_SECONDS,
+    ):
+        self.multiprocess_dir = multiprocess_dir
+        self.dump_interval = dump_interval
+        self.metrics: Dict[str, Metric] = {}
+        self._dumper: Optional[asyncio.Task] = None
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> dict:
+        """This worker's metrics, in a json serializable form"""
+
+        snapshot = {}
+
+        for metric in list(self.metrics.values()):
+            snapshot[metric.name] = {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": [[list(key), value] for key, value in metric.samples().items()],
+            }
+
+        return snapshot
+
+    async def start(self):
+        if not self.multiprocess_dir or self._dumper is not None:
+            return
+
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        self._dumper = asyncio.create_task(self._dump_every())
+
+    async def stop(self):
+        if self._dumper is None:
+            return
+
+        self._dumper.cancel()
+        await asyncio.gather(self._dumper, return_exceptions=True)
+        self._dumper = None
+
+        with self._lock():
+            self._retire(self._dump_path(), self.snapshot())
+
+    async def _dump_every(self):
+        while True:
+            try:
+                self.dump()
+            except Exception:
+                logger.exception("Writing the metrics snapshot failed")
+
+            await asyncio.sleep(self.dump_interval)
+
+    def _dump_path(self, pid: Optional[int] = None) -> str:
+        return os.path.join(self.multiprocess_dir, f"{pid or os.getpid()}.json")
+
+    def dump(self):
+        write_snapshot(self._dump_path(), self.snapshot())
+
+    @contextmanager
+    def _lock(self):
+        """Keeps scrapes from reading a worker both in its own file and in
+        the aggregate while it is being folded
+        """
+
+        with open(os.path.join(self.multiprocess_dir, LOCK_FILE), "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def _retire(self, path: str, snapshot: dict):
+        """Folds the counters and histograms of a worker that is gone into
+        the aggregate and removes its file, to be called under `_lock`
+        """
+
+        aggregate_path = os.path.join(self.multiprocess_dir, AGGREGATE_FILE)
+        merged = merge_snapshots([read_snapshot(aggregate_path) or {}, without_gauges(snapshot)])
+
+        for metric in merged.values():
+            metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+
+        write_snapshot(aggregate_path, merged)
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def collect(self) -> dict:
+        """This worker's snapshot merged with the other workers' and the
+        aggregate of the workers that are gone
+        """
+
+        snapshots = [self.snapshot()]
+
+        if not self.multiprocess_dir or not os.path.isdir(self.multiprocess_dir):
+            return merge_snapshots(snapshots)
+
+        own = os.path.basename(self._dump_path())
+        # a live worker rewrites its file every interval, an older one is
+        # hung and its gauges can't be trusted anymore
+        oldest = time.time() - 3 * self.dump_interval
+
+        with self._lock():
+            for name in os.listdir(self.multiprocess_dir):
+                if name in (own, AGGREGATE_FILE) or not name.endswith(".json"):
+                    continue
+
+                path = os.path.join(self.multiprocess_dir, name)
+
+                try:
+                    pid = int(name[: -len(".json")])
+                    stale = os.path.getmtime(path) < oldest
+                except (OSError, ValueError):
+                    continue
+
+                snapshot = read_snapshot(path)
+
+                if snapshot is None:
+                    continue
+
+                # died without stopping
+                if not process_alive(pid):
+                    self._retire(path, snapshot)
+                    continue
+
+                snapshots.append(without_gauges(snapshot) if stale else snapshot)
+
+            snapshots.append(read_snapshot(os.path.join(self.multiprocess_dir, AGGREGATE_FILE)) or {})
+
+        return merge_snapshots(snapshots)
+
+    def expose(self) -> str:
+        return render(self.collect())
+
+
+def read_snapshot(path: str) -> Optional[dict]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(path: str, snapshot: dict):
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(snapshot, file)
+
+    os.replace(f"{path}.tmp", path)
+
+
+def without_gauges(snapshot: dict) -> dict:
+    return {name: metric for name, metric in snapshot.items() if metric["type"] != "gauge"}
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # running under another user
+        return True
+
+    return True
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    merged: dict = {}
+
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "samples": {}})
+
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                target["samples"][key] = merge_values(target["samples"].get(key), value)
+
+    return merged
+
+
+def format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    labels = ",".join(
+        f'{name}="{escape(value)}"' for name, value in zip(names, values)
+    )
+
+    return f"{{{labels}}}" if labels else ""
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(metrics: dict) -> str:
+    """Renders merged snapshots in the prometheus text exposition format"""
+
+    lines = []
+
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+
+        for key, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{format_labels(labelnames, key)} {format_value(value)}")
+                continue
+
+            *counts, total = value
+            cumulative = 0
+
+            for bound, count in zip([*metric["buckets"], float("inf")], counts):
+                cumulative += count
+                labels = format_labels([*labelnames, "le"], [*key, format_value(float(bound))])
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+
+            lines.append(f"{name}_sum{format_labels(labelnames, key)} {format_value(total)}")
+            lines.append(f"{name}_count{format_labels(labelnames, key)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Time taken to respond to http requests",
+    labelnames=("method", "route", "status"),
+)
+
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Http requests being handled"
+)
+
+
+class MetricsMiddleware:
+    """Records the latency of every http request by route template and status
+
+    Requests not matching any route share the "unmatched" route, so unknown
+    paths can't create a sample each.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        # a request failing before it responds is answered with a 500
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            )
@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+invalid_cursor = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encodes the sort key of the last row of a page into an opaque cursor
+
+    :usage: cursor = encode_cursor(post.created_at, post.id)
+    """
+
+    payload = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise invalid_cursor
+
+    if not isinstance(values, list):
+        raise invalid_cursor
+
+    return values
+
+
+def decode_created_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decodes a cursor produced by `encode_cursor(created_at, id)`"""
+
+    values = decode_cursor(cursor)
+
+    try:
+        created_at, id = values
+        return datetime.fromisoformat(created_at), str(id)
+    except (ValueError, TypeError):
+        raise invalid_cursor
+
+
+def keyset_before(created_at_column, id_column, cursor: str):
+    """Filter selecting rows that sort after the cursor in a
+    `created_at DESC, id DESC` ordering
+    """
+
+    created_at, id = decode_created_cursor(cursor)
+
+    return or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column < id),
+    )
+
+
+def paginate(
+    rows: List[Any], limit: int, key: Callable[[Any], tuple]
+) -> Tuple[List[Any], Optional[str]]:
+    """Splits `limit + 1` fetched rows into a page and the cursor of the next one
+
+    :param rows: rows fetched with `.limit(limit + 1)`
+    :param limit: requested page size
+    :param key: returns the sort key of a row, e.g. `lambda p: (p.created_at, p.id)`
+    """
+
+    page = rows[:limit]
+    next_cursor = None
+
+    if len(rows) > limit and page:
+        next_cursor = encode_cursor(*key(page[-1]))
+
+    return page, next_cursor
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from api.v1.utils.metrics import registry
+
+load_dotenv()
+
+hash_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", 64))
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a bounded worker pool
+
+    bcrypt releases the GIL while it works, so a thread pool spreads login
+    bursts across cores. When called from service code running inside
+    `AsyncSession.run_sync`, the request is suspended until the worker is done
+    and the event loop keeps serving other connections meanwhile.
+
+    At most `max_workers + queue_limit` calls are accepted at once, further
+    calls are rejected with a 503 instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: int, queue_limit: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.pending = 0
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + queue_limit)
+
+    def hash(self, password: str) -> str:
+        return self._run(hash_context.hash, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run(hash_context.verify, password, hashed_password)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again",
+            )
+
+        self.pending += 1
+
+        try:
+            future = self._executor.submit(fn, *args)
+
+            if in_greenlet():
+                return await_only(asyncio.wrap_future(future))
+
+            return future.result()
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+
+password_hasher = PasswordHasher(
+    max_workers=PASSWORD_HASH_WORKERS, queue_limit=PASSWORD_HASH_QUEUE_LIMIT
+)
+
+registry.gauge(
+    "password_hash_queue_depth",
+    "Password hashes and verifications running or waiting for a worker",
+    callback=lambda: password_hasher.pending,
+)
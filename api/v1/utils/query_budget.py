@@ -0,0 +1,156 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# statements a request may run before it is reported
+QUERY_BUDGET = int(os.environ.get("QUERY_BUDGET", 30))
+
+# runs of one statement shape within a request that flag an N+1
+QUERY_REPEAT_LIMIT = int(os.environ.get("QUERY_REPEAT_LIMIT", 5))
+
+# fail requests over budget instead of logging them, meant for the tests
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT", "False") == "True"
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """Statements, database time and rows of one request"""
+
+    def __init__(self, budget: int = QUERY_BUDGET, repeat_limit: int = QUERY_REPEAT_LIMIT):
+        self.budget = budget
+        self.repeat_limit = repeat_limit
+        self.count = 0
+        self.duration = 0.0
+        # as reported by the driver, sqlite reports none for SELECTs
+        self.rows = 0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float, rowcount: int):
+        self.count += 1
+        self.duration += duration
+        self.rows += max(rowcount, 0)
+        # bound parameters are placeholders, so the text is the shape
+        self.shapes[" ".join(statement.split())] += 1
+
+    def repeated(self):
+        """Returns the most repeated statement shape and its count"""
+
+        if not self.shapes:
+            return None, 0
+
+        return self.shapes.most_common(1)[0]
+
+    def violations(self) -> list[str]:
+        violations = []
+
+        if self.count > self.budget:
+            violations.append(f"{self.count} queries, budget is {self.budget}")
+
+        statement, repeats = self.repeated()
+
+        if repeats > self.repeat_limit:
+            violations.append(f"same statement run {repeats} times: {statement[:200]}")
+
+        return violations
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries, {self.rows} rows"'
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def track_queries(engine: Engine):
+    """Counts the statements run on `engine` towards the current request"""
+
+    # the start lives on the execution context, which is dropped with the
+    # statement, so statements that fail leave nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_start", None)
+        stats = current_stats.get()
+
+        if stats is not None and started is not None:
+            stats.record(statement, time.perf_counter() - started, cursor.rowcount)
+
+
+def query_budget(budget: int):
+    """Dependency raising the query budget of a route that legitimately
+    needs more statements
+
+    :usage: @router.get("/report", dependencies=[Depends(query_budget(100))])
+    """
+
+    def set_budget():
+        stats = current_stats.get()
+
+        if stats is not None:
+            stats.budget = budget
+
+    return set_budget
+
+
+class QueryBudgetMiddleware:
+    """Reports the database work of every HTTP request
+
+    Adds a `Server-Timing` header with the statement count, rows and time
+    spent in the database, and logs requests over their query budget or
+    repeating a statement shape (an N+1), failing them when strict.
+    """
+
+    def __init__(self, app, strict: bool = QUERY_BUDGET_STRICT):
+        self.app = app
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = current_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                self.check(scope, stats)
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", stats.server_timing().encode())
+                ]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+
+    def check(self, scope, stats: QueryStats):
+        violations = stats.violations()
+
+        if not violations:
+            return
+
+        route = f"{scope['method']} {scope['path']}"
+
+        if self.strict:
+            raise QueryBudgetExceeded(f"{route}: {'; '.join(violations)}")
+
+        for violation in violations:
+            logger.warning("Query budget exceeded by %s: %s", route, violation)
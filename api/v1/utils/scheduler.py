@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Callable, List, Tuple
+from sqlalchemy.orm import Session
+from api.v1.utils.database import SessionLocal
+from api.v1.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+JOB_DURATION = registry.histogram(
+    "scheduled_job_duration_seconds",
+    "Time taken by the runs of background jobs",
+    labelnames=("job",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+
+
+class Scheduler:
+    """Runs maintenance jobs periodically while the app is up
+
+    A job is a plain function taking a `Session`. Each run happens in a worker
+    thread with its own session so it never blocks request handling.
+
+    :usage: scheduler.add_job(user_service.purge_expired_tokens, interval=3600)
+    """
+
+    def __init__(self):
+        self.jobs: List[Tuple[Callable[[Session], object], float]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, job: Callable[[Session], object], interval: float):
+        self.jobs.append((job, interval))
+
+    async def start(self):
+        for job, interval in self.jobs:
+            self._tasks.append(asyncio.create_task(self._run_every(job, interval)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run_every(self, job: Callable[[Session], object], interval: float):
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                await asyncio.to_thread(self.run, job)
+            except Exception:
+                logger.exception("Scheduled job %s failed", job.__name__)
+
+    def run(self, job: Callable[[Session], object]):
+        db = SessionLocal()
+        try:
+            with JOB_DURATION.time(job=job.__name__):
+                return job(db)
+        finally:
+            db.close()
+
+
+scheduler = Scheduler()
@@ -0,0 +1,120 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Splits a text into lowercased word tokens"""
+
+    if not text:
+        return []
+
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """A thread-safe in-process inverted index ranking documents with BM25
+
+    Keeps a posting list of term frequencies per term, so a search only
+    scores the documents containing every query term instead of scanning
+    all of them.
+
+    :usage: index = InvertedIndex()
+            index.add("post-1", "Hello world")
+            index.search("hello")  # [(score, "post-1")]
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._documents: Dict[str, Counter] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, doc_id: str, text: Optional[str]):
+        """Indexes a document, replacing its previous version"""
+
+        terms = Counter(tokenize(text))
+
+        with self._lock:
+            self.remove(doc_id)
+
+            if not terms:
+                return
+
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+
+            self._documents[doc_id] = terms
+            self._total_length += sum(terms.values())
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            terms = self._documents.pop(doc_id, None)
+
+            if terms is None:
+                return
+
+            for term in terms:
+                postings = self._postings[term]
+                del postings[doc_id]
+
+                if not postings:
+                    del self._postings[term]
+
+            self._total_length -= sum(terms.values())
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._total_length = 0
+
+    def search(self, query: str) -> List[Tuple[float, str]]:
+        """Returns the documents containing every query term as (score, id),
+        best first
+        """
+
+        terms = set(tokenize(query))
+
+        if not terms:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+
+            if not all(postings):
+                return []
+
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+
+            count = len(self._documents)
+            average_length = self._total_length / count
+
+            scores = []
+            for doc_id in candidates:
+                length = sum(self._documents[doc_id].values())
+                score = 0.0
+
+                for posting in postings:
+                    frequency = posting[doc_id]
+                    idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                    score += idf * frequency * (self.k1 + 1) / (
+                        frequency
+                        + self.k1 * (1 - self.b + self.b * length / average_length)
+                    )
+
+                scores.append((score, doc_id))
+
+        scores.sort(reverse=True)
+
+        return scores
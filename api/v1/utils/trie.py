@@ -0,0 +1,80 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Tuple
+
+
+class TrieNode:
+    __slots__ = ("children", "best")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        # (-score, id, value) of the best entries under this prefix, best first
+        self.best: List[Tuple[float, str, Any]] = []
+
+
+class Trie:
+    """A thread-safe prefix tree answering top-N autocomplete lookups
+
+    Every node keeps the `size` best scored entries whose key starts with its
+    prefix, so a lookup walks the prefix and returns a precomputed list
+    instead of collecting and sorting the whole subtree.
+
+    :usage: trie = Trie(size=10)
+            trie.add("alice", "user-1", score=42, value={"id": "user-1"})
+            trie.top("al", limit=5)
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.root = TrieNode()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, entry_id: str, score: float, value: Any):
+        entry = (-score, entry_id, value)
+
+        with self._lock:
+            node = self.root
+            self._offer(node, entry)
+
+            for char in key:
+                node = node.children.setdefault(char, TrieNode())
+                self._offer(node, entry)
+
+    def remove(self, key: str, entry_id: str):
+        """Drops an entry, the prefixes it ranked under keep fewer entries
+        until the trie is rebuilt
+        """
+
+        with self._lock:
+            node = self.root
+            self._discard(node, entry_id)
+
+            for char in key:
+                node = node.children.get(char)
+
+                if node is None:
+                    return
+
+                self._discard(node, entry_id)
+
+    def top(self, prefix: str, limit: int) -> List[Any]:
+        with self._lock:
+            node = self.root
+
+            for char in prefix:
+                node = node.children.get(char)
+
+                if node is None:
+                    return []
+
+            return [value for _, _, value in node.best[:limit]]
+
+    def _offer(self, node: TrieNode, entry: Tuple[float, str, Any]):
+        position = bisect.bisect(node.best, entry[:2], key=lambda best: best[:2])
+
+        if position < self.size:
+            node.best.insert(position, entry)
+            del node.best[self.size :]
+
+    def _discard(self, node: TrieNode, entry_id: str):
+        node.best = [best for best in node.best if best[1] != entry_id]
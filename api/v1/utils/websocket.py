@@ -1,20 +1,268 @@
-from fastapi import WebSocket, WebSocketDisconnect
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, Iterable, Optional, Set
+from dotenv import load_dotenv
+from fastapi import WebSocket
+from fastapi.encoders import jsonable_encoder
+from api.v1.utils.broker import Broker, broker
+from api.v1.utils.metrics import registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# messages waiting for a socket before it is evicted as a slow consumer
+WEBSOCKET_SEND_QUEUE_SIZE = int(os.environ.get("WEBSOCKET_SEND_QUEUE_SIZE", 64))
+
+# seconds a single send may take before the socket is evicted
+WEBSOCKET_SEND_TIMEOUT_SECONDS = float(os.environ.get("WEBSOCKET_SEND_TIMEOUT_SECONDS", 5))
+
+# broker channel broadcasts are relayed on between workers
+WEBSOCKET_BACKPLANE_CHANNEL = os.environ.get("WEBSOCKET_BACKPLANE_CHANNEL", "__websocket__")
+
+# broadcasts buffered by a worker's backplane listener
+WEBSOCKET_BACKPLANE_QUEUE_SIZE = int(os.environ.get("WEBSOCKET_BACKPLANE_QUEUE_SIZE", 1000))
+
+# every post, what connections without explicit topics receive
+POSTS_TOPIC = "posts"
+
+
+def user_topic(user_id: str) -> str:
+    """Posts by one author, followers subscribe to build a live timeline"""
+
+    return f"user:{user_id}"
+
+
+def post_topic(post_id: str) -> str:
+    """Comments on one post"""
+
+    return f"post:{post_id}"
+
+
+class Connection:
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.topics: Set[str] = set()
+        self.writer: Optional[asyncio.Task] = None
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
+    """Fans messages out to the websockets subscribed to a topic
+
+    A message is serialized once, then queued on every matching connection.
+    Each connection has its own writer task, so sends run concurrently and a
+    slow client only delays itself. A socket whose queue is full, whose send
+    times out or fails is evicted and closed.
 
-    async def connect(self, websocket: WebSocket):
+    With a `backplane`, broadcasts are published on the broker and every
+    worker started with `start` delivers them to its own sockets, so clients
+    get them whichever worker or node they are attached to.
+
+    :usage: await manager.connect(websocket, topics=[user_topic(author_id)])
+            await manager.broadcast(post, topics=[POSTS_TOPIC])
+    """
+
+    def __init__(
+        self,
+        send_queue_size: int = WEBSOCKET_SEND_QUEUE_SIZE,
+        send_timeout: float = WEBSOCKET_SEND_TIMEOUT_SECONDS,
+        backplane: Optional[Broker] = None,
+    ):
+        self.send_queue_size = send_queue_size
+        self.send_timeout = send_timeout
+        self.backplane = backplane
+        self.connections: Dict[WebSocket, Connection] = {}
+        self.topics: Dict[str, Set[Connection]] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Starts relaying the backplane's broadcasts to this worker's sockets"""
+
+        if self.backplane is None or self._listener is not None:
+            return
+
+        subscribed = asyncio.Event()
+        self._listener = asyncio.create_task(self._listen(subscribed))
+        await subscribed.wait()
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self, subscribed: asyncio.Event):
+        async with self.backplane.subscribe(
+            WEBSOCKET_BACKPLANE_CHANNEL,
+            maxsize=WEBSOCKET_BACKPLANE_QUEUE_SIZE,
+            overflow="drop_oldest",
+        ) as queue:
+            subscribed.set()
+
+            while True:
+                payload = await queue.get()
+
+                try:
+                    data = json.loads(payload)
+                    self.deliver(data["message"], data["topics"])
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Dropped malformed websocket broadcast %r", payload)
+
+    @property
+    def active_connections(self) -> list[WebSocket]:
+        return list(self.connections)
+
+    def queue_depth(self) -> int:
+        """Messages waiting to be sent on this worker's sockets"""
+
+        return sum(connection.queue.qsize() for connection in list(self.connections.values()))
+
+    async def connect(self, websocket: WebSocket, topics: Optional[Iterable[str]] = None):
         await websocket.accept()
-        self.active_connections.append(websocket)
+
+        connection = Connection(websocket, self.send_queue_size)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self.connections[websocket] = connection
+
+        for topic in topics or [POSTS_TOPIC]:
+            self.subscribe(websocket, topic)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        connection = self.connections.pop(websocket, None)
+
+        if connection is None:
+            return
+
+        for topic in connection.topics:
+            subscribers = self.topics.get(topic, set())
+            subscribers.discard(connection)
+
+            if not subscribers:
+                self.topics.pop(topic, None)
+
+        if connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def subscribe(self, websocket: WebSocket, topic: str):
+        connection = self.connections.get(websocket)
+
+        if connection is not None:
+            connection.topics.add(topic)
+            self.topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        connection = self.connections.get(websocket)
+
+        if connection is None or topic not in connection.topics:
+            return
+
+        connection.topics.discard(topic)
+        self.topics[topic].discard(connection)
+
+        if not self.topics[topic]:
+            del self.topics[topic]
+
+    def send(self, websocket: WebSocket, message) -> bool:
+        """Queues a message for a single socket"""
+
+        connection = self.connections.get(websocket)
+
+        if connection is None:
+            return False
+
+        return self._enqueue(connection, self.encode(message))
+
+    async def broadcast(self, message, topics: Iterable[str] = (POSTS_TOPIC,)) -> Optional[int]:
+        """Sends a message to every connection subscribed to one of `topics`
+
+        Returns the number of connections it was queued on, or None when it
+        was handed to the backplane for every worker to deliver. Delivery is
+        best effort: callers broadcast what they already committed, so a
+        failing backplane is logged and the message only reaches this
+        worker's sockets.
+        """
+
+        text = self.encode(message)
+        topics = list(topics)
+
+        if self.backplane is not None:
+            try:
+                await self.backplane.publish(
+                    WEBSOCKET_BACKPLANE_CHANNEL,
+                    json.dumps({"topics": topics, "message": text}),
+                )
+                return None
+            except Exception:
+                logger.exception("Websocket backplane publish failed, delivering locally")
+
+        return self.deliver(text, topics)
+
+    def deliver(self, text: str, topics: Iterable[str]) -> int:
+        """Queues a serialized message on this worker's matching connections"""
+
+        recipients = set()
+        for topic in topics:
+            recipients.update(self.topics.get(topic, ()))
+
+        return sum(self._enqueue(connection, text) for connection in recipients)
+
+    def encode(self, message) -> str:
+        if isinstance(message, str):
+            return message
+
+        return json.dumps(jsonable_encoder(message))
+
+    def _enqueue(self, connection: Connection, text: str) -> bool:
+        try:
+            connection.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            logger.info("Evicting slow websocket consumer")
+            self._evict(connection)
+            return False
+
+    async def _write(self, connection: Connection):
+        while True:
+            text = await connection.queue.get()
+
+            try:
+                await asyncio.wait_for(
+                    connection.websocket.send_text(text), timeout=self.send_timeout
+                )
+            except Exception:
+                # timed out, or the client is gone
+                self._evict(connection)
+                return
+
+    def _evict(self, connection: Connection):
+        self.disconnect(connection.websocket)
+
+        task = asyncio.create_task(self._close(connection.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            # 1013: try again later
+            await asyncio.wait_for(websocket.close(code=1013), timeout=self.send_timeout)
+        except Exception:
+            pass
+
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+manager = ConnectionManager(backplane=broker)
 
+registry.gauge(
+    "websocket_connections",
+    "Open websocket connections",
+    callback=lambda: len(manager.connections),
+)
 
-manager = ConnectionManager()
+registry.gauge(
+    "websocket_send_queue_depth",
+    "Messages waiting to be sent on websockets",
+    callback=manager.queue_depth,
+)
@@ -0,0 +1,144 @@
+"""
+Like storm benchmark
+
+Has many users tap like on the same post at once (in process, over ASGI),
+each user tapping several times to mimic double taps, then reports like
+throughput and latency and checks that the post's like_count matches the like
+rows and that no user holds two likes. Uses DATABASE_URL when set, a temporary
+sqlite database otherwise:
+
+    python benchmarks/bench_likes.py --users 200 --taps 2 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+if "DATABASE_URL" not in os.environ:
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("DEBUG", "False")
+
+import httpx
+from sqlalchemy import func
+from main import app
+from api.v1.models.post import Like, Post
+from api.v1.models.user import User
+from api.v1.services.user import user_service
+from api.v1.utils.database import SessionLocal
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def setup(users: int):
+    """Creates the post and the likers directly, skipping bcrypt and the api"""
+
+    db = SessionLocal()
+
+    try:
+        author = User(username="author", email="author@example.com", password="-")
+        likers = [
+            User(username=f"liker{i}", email=f"liker{i}@example.com", password="-")
+            for i in range(users)
+        ]
+        db.add_all([author, *likers])
+        db.commit()
+
+        post = Post(user_id=author.id, content="going viral")
+        db.add(post)
+        db.commit()
+
+        tokens = [
+            user_service.generate_access_token(db, liker)["token"] for liker in likers
+        ]
+
+        return post.id, tokens
+    finally:
+        db.close()
+
+
+def check(post_id: str):
+    db = SessionLocal()
+
+    try:
+        like_count = db.query(Post.like_count).filter(Post.id == post_id).scalar()
+        rows = db.query(func.count(Like.id)).filter(Like.post_id == post_id).scalar()
+        duplicates = (
+            db.query(Like.user_id)
+            .filter(Like.post_id == post_id)
+            .group_by(Like.user_id)
+            .having(func.count(Like.id) > 1)
+            .count()
+        )
+
+        return like_count, rows, duplicates
+    finally:
+        db.close()
+
+
+async def tap(client, post_id, token, latencies, failures):
+    start = time.perf_counter()
+
+    try:
+        response = await client.patch(
+            f"/api/v1/posts/{post_id}/like",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
+    except Exception as exc:
+        failures.append(exc)
+        return
+
+    latencies.append(time.perf_counter() - start)
+
+
+async def main(users: int, taps: int, concurrency: int):
+    post_id, tokens = setup(users)
+
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies, failures = [], []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded_tap(token):
+            async with semaphore:
+                await tap(client, post_id, token, latencies, failures)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(bounded_tap(token) for token in tokens for _ in range(taps))
+        )
+        elapsed = time.perf_counter() - start
+
+    like_count, rows, duplicates = check(post_id)
+
+    print(f"taps:             {users * taps} ({users} users x {taps}) at concurrency {concurrency}")
+    print(f"failed taps:      {len(failures)}")
+    print(f"throughput:       {len(latencies) / elapsed:.1f} taps/s")
+    print(f"tap p50 / p95:    {percentile(latencies, 50) * 1000:.0f} ms"
+          f" / {percentile(latencies, 95) * 1000:.0f} ms")
+    print(f"like_count:       {like_count}")
+    print(f"like rows:        {rows}")
+    print(f"duplicate likes:  {duplicates}")
+    print(f"consistent:       {like_count == rows and not duplicates}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--taps", type=int, default=2, help="likes sent by every user")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.users, args.taps, args.concurrency))
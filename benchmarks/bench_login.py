@@ -0,0 +1,121 @@
+"""
+Login throughput benchmark
+
+Fires concurrent logins at the app (in process, over ASGI) while a second
+client keeps requesting the feed, and reports login throughput, login latency
+and feed latency. Run it once with the worker pool and once with bcrypt inline
+on the event loop to compare. Uses DATABASE_URL when set, a temporary sqlite
+database otherwise:
+
+    python benchmarks/bench_login.py --logins 200 --concurrency 32
+    python benchmarks/bench_login.py --logins 200 --concurrency 32 --inline
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+if "DATABASE_URL" not in os.environ:
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("DEBUG", "False")
+
+import httpx
+from main import app
+from api.v1.utils.password import password_hasher
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def login(client, latencies, failures):
+    start = time.perf_counter()
+
+    try:
+        response = await client.post(
+            "/api/v1/auth/login",
+            json={"email": "bench@example.com", "password": "bench-password"},
+        )
+        response.raise_for_status()
+    except Exception as exc:
+        failures.append(exc)
+        return
+
+    latencies.append(time.perf_counter() - start)
+
+
+async def poll_feed(client, headers, latencies, done):
+    while not done.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/v1/posts", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def main(logins: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post(
+            "/api/v1/auth/register",
+            json={
+                "username": "bench",
+                "email": "bench@example.com",
+                "password": "bench-password",
+            },
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+        login_latencies, feed_latencies, failures = [], [], []
+        semaphore = asyncio.Semaphore(concurrency)
+        done = asyncio.Event()
+
+        async def bounded_login():
+            async with semaphore:
+                await login(client, login_latencies, failures)
+
+        feed = asyncio.create_task(poll_feed(client, headers, feed_latencies, done))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded_login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        await feed
+
+    print(f"logins:           {logins} at concurrency {concurrency}")
+    print(f"failed logins:    {len(failures)}")
+    print(f"throughput:       {len(login_latencies) / elapsed:.1f} logins/s")
+    print(f"login p50 / p95:  {percentile(login_latencies, 50) * 1000:.0f} ms"
+          f" / {percentile(login_latencies, 95) * 1000:.0f} ms")
+    print(f"feed requests:    {len(feed_latencies)}")
+    print(f"feed p50 / max:   {statistics.median(feed_latencies) * 1000:.0f} ms"
+          f" / {max(feed_latencies) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--inline", action="store_true", help="hash on the event loop (no worker pool)"
+    )
+    args = parser.parse_args()
+
+    if args.inline:
+        password_hasher._run = lambda fn, *fn_args: fn(*fn_args)
+
+    print(f"mode:             {'inline' if args.inline else f'pool ({password_hasher.max_workers} workers)'}")
+    asyncio.run(main(args.logins, args.concurrency))
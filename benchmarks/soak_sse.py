@@ -0,0 +1,101 @@
+"""
+SSE queue soak test
+
+Opens many simulated SSE connections in process, floods them with more
+notifications than their queues hold while the clients read nothing, then
+disconnects them all, for several rounds. Reports traced memory after every
+flood and every disconnect, both should stay flat from round to round, and
+checks that no subscriber is left behind:
+
+    python benchmarks/soak_sse.py --connections 10000 --events 150 --rounds 3
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+if "DATABASE_URL" not in os.environ:
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from api.v1.services.notification import NotificationService
+from api.v1.utils.broker import InProcessBroker, SUBSCRIBER_QUEUE_SIZE
+
+
+def traced_mib() -> float:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 2**20
+
+
+async def connect(service: NotificationService, user_id: str, ready: asyncio.Event):
+    events = service.event_generator(user_id)
+    # a stalled client: subscribes, then never reads
+    reading = asyncio.ensure_future(events.__anext__())
+    await asyncio.sleep(0)
+    ready.set()
+
+    try:
+        await asyncio.Future()
+    finally:
+        reading.cancel()
+        await asyncio.gather(reading, return_exceptions=True)
+        await events.aclose()
+
+
+async def soak_round(service, broker, connections: int, events: int):
+    ready = [asyncio.Event() for _ in range(connections)]
+    clients = [
+        asyncio.create_task(connect(service, f"user-{i}", ready[i]))
+        for i in range(connections)
+    ]
+    await asyncio.gather(*(event.wait() for event in ready))
+
+    for n in range(events):
+        for i in range(connections):
+            await service.publish(f"user-{i}", "someone liked your post", event_id=f"n{n}")
+
+    flooded = traced_mib()
+    pending = sum(queue.qsize() for queues in broker.subscribers.values() for queue in queues)
+
+    for client in clients:
+        client.cancel()
+
+    await asyncio.gather(*clients, return_exceptions=True)
+
+    return flooded, traced_mib(), pending
+
+
+async def main(connections: int, events: int, rounds: int):
+    broker = InProcessBroker()
+    service = NotificationService(broker=broker)
+
+    tracemalloc.start()
+    baseline = traced_mib()
+
+    print(f"connections:      {connections}, {events} events each, queue size {SUBSCRIBER_QUEUE_SIZE}")
+    print(f"baseline:         {baseline:.1f} MiB")
+
+    for n in range(rounds):
+        flooded, disconnected, pending = await soak_round(service, broker, connections, events)
+        print(f"round {n + 1}:          flooded {flooded:.1f} MiB ({pending} queued),"
+              f" disconnected {disconnected:.1f} MiB")
+
+    print(f"subscribers left: {len(broker.subscribers)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=150)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.connections, args.events, args.rounds))
@@ -41,8 +41,8 @@ const Feed: React.FC = () => {
     const fetchPosts = async () => {
         try {
             const response = await api.get('/posts');
-            // Backend returns {status_code, message, data: [...]}
-            setPosts(response.data.data || response.data);
+            // Backend returns {status_code, message, data: {items: [...], next_cursor}}
+            setPosts(response.data.data?.items || []);
         } catch (error) {
             console.error('Error fetching posts:', error);
         }
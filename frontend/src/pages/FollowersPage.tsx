@@ -6,13 +6,16 @@ import { useAuth } from '../context/AuthContext';
 interface SimpleUser {
     id: string;
     username: string;
-    email: string;
+    avatar_url?: string | null;
+    follower_count: number;
 }
 
 const FollowersPage: React.FC = () => {
     const { user: currentUser } = useAuth();
     const [followers, setFollowers] = useState<SimpleUser[]>([]);
     const [following, setFollowing] = useState<SimpleUser[]>([]);
+    const [followerCount, setFollowerCount] = useState(0);
+    const [followingCount, setFollowingCount] = useState(0);
     const [activeTab, setActiveTab] = useState<'followers' | 'following'>('followers');
 
     useEffect(() => {
@@ -25,7 +28,9 @@ const FollowersPage: React.FC = () => {
     const fetchFollowers = async () => {
         try {
             const response = await api.get(`/users/${currentUser?.id}/followers`);
-            setFollowers(response.data.data || []);
+            // Backend returns {status_code, message, data: {items: [...], next_cursor, count}}
+            setFollowers(response.data.data?.items || []);
+            setFollowerCount(response.data.data?.count || 0);
         } catch (error) {
             console.error('Error fetching followers:', error);
         }
@@ -34,7 +39,8 @@ const FollowersPage: React.FC = () => {
     const fetchFollowing = async () => {
         try {
             const response = await api.get(`/users/${currentUser?.id}/followings`);
-            setFollowing(response.data.data || []);
+            setFollowing(response.data.data?.items || []);
+            setFollowingCount(response.data.data?.count || 0);
         } catch (error) {
             console.error('Error fetching following:', error);
         }
@@ -54,7 +60,7 @@ const FollowersPage: React.FC = () => {
                                 : 'text-gray-600 hover:text-gray-800'
                             }`}
                     >
-                        Followers ({followers.length})
+                        Followers ({followerCount})
                     </button>
                     <button
                         onClick={() => setActiveTab('following')}
@@ -63,7 +69,7 @@ const FollowersPage: React.FC = () => {
                                 : 'text-gray-600 hover:text-gray-800'
                             }`}
                     >
-                        Following ({following.length})
+                        Following ({followingCount})
                     </button>
                 </div>
                 <div className="p-4">
@@ -78,7 +84,7 @@ const FollowersPage: React.FC = () => {
                                     </div>
                                     <div>
                                         <p className="font-medium text-gray-800">{u.username}</p>
-                                        <p className="text-sm text-gray-500">{u.email}</p>
+                                        <p className="text-sm text-gray-500">{u.follower_count} followers</p>
                                     </div>
                                 </li>
                             ))}
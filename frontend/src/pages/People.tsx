@@ -6,8 +6,8 @@ import { useAuth } from '../context/AuthContext';
 interface User {
     id: string;
     username: string;
-    email: string;
-    profile_picture?: { image: string };
+    avatar_url?: string | null;
+    follower_count: number;
 }
 
 const People: React.FC = () => {
@@ -23,8 +23,9 @@ const People: React.FC = () => {
     const fetchUsers = async () => {
         try {
             const response = await api.get('/users');
+            // Backend returns {status_code, message, data: {items: [...], next_cursor}}
             // Filter out current user
-            const otherUsers = response.data.data.filter((u: User) => u.id !== currentUser?.id);
+            const otherUsers = (response.data.data?.items || []).filter((u: User) => u.id !== currentUser?.id);
             setUsers(otherUsers);
         } catch (error) {
             console.error('Error fetching users:', error);
@@ -33,8 +34,17 @@ const People: React.FC = () => {
 
     const fetchFollowing = async () => {
         try {
-            const response = await api.get(`/users/${currentUser?.id}/followings`);
-            const followingSet = new Set<string>(response.data.data.map((u: User) => u.id));
+            // Backend returns {status_code, message, data: {items: [...], next_cursor, count}}
+            const followingSet = new Set<string>();
+            let cursor: string | null = null;
+            do {
+                const response = await api.get(`/users/${currentUser?.id}/followings`, {
+                    params: { limit: 100, cursor },
+                });
+                const page = response.data.data;
+                (page?.items || []).forEach((u: User) => followingSet.add(u.id));
+                cursor = page?.next_cursor || null;
+            } while (cursor);
             setFollowingIds(followingSet);
         } catch (error) {
             console.error('Error fetching following:', error);
@@ -70,15 +80,15 @@ const People: React.FC = () => {
                     <div key={user.id} className="bg-white rounded-lg shadow p-6 flex items-center justify-between">
                         <div className="flex items-center">
                             <div className="h-12 w-12 rounded-full bg-gray-200 flex items-center justify-center overflow-hidden">
-                                {user.profile_picture ? (
-                                    <img src={user.profile_picture.image} alt="Profile" className="h-full w-full object-cover" />
+                                {user.avatar_url ? (
+                                    <img src={user.avatar_url} alt="Profile" className="h-full w-full object-cover" />
                                 ) : (
                                     <UserIcon className="h-6 w-6 text-gray-400" />
                                 )}
                             </div>
                             <div className="ml-4">
                                 <p className="font-semibold text-gray-800">{user.username}</p>
-                                <p className="text-sm text-gray-500">{user.email}</p>
+                                <p className="text-sm text-gray-500">{user.follower_count} followers</p>
                             </div>
                         </div>
 
@@ -6,13 +6,15 @@ import { useAuth } from '../context/AuthContext';
 interface User {
     id: string;
     username: string;
-    email: string;
-    profile_picture?: { image: string };
+    avatar_url?: string | null;
+    follower_count: number;
 }
 
 const Profile: React.FC = () => {
     const [followers, setFollowers] = useState<User[]>([]);
     const [following, setFollowing] = useState<User[]>([]);
+    const [followerCount, setFollowerCount] = useState(0);
+    const [followingCount, setFollowingCount] = useState(0);
     const [activeTab, setActiveTab] = useState<'followers' | 'following'>('followers');
     const { user: currentUser } = useAuth();
 
@@ -24,7 +26,9 @@ const Profile: React.FC = () => {
     const fetchFollowers = async () => {
         try {
             const response = await api.get(`/users/${currentUser?.id}/followers`);
-            setFollowers(response.data.data || []);
+            // Backend returns {status_code, message, data: {items: [...], next_cursor, count}}
+            setFollowers(response.data.data?.items || []);
+            setFollowerCount(response.data.data?.count || 0);
         } catch (error) {
             console.error('Error fetching followers:', error);
         }
@@ -33,7 +37,8 @@ const Profile: React.FC = () => {
     const fetchFollowing = async () => {
         try {
             const response = await api.get(`/users/${currentUser?.id}/followings`);
-            setFollowing(response.data.data || []);
+            setFollowing(response.data.data?.items || []);
+            setFollowingCount(response.data.data?.count || 0);
         } catch (error) {
             console.error('Error fetching following:', error);
         }
@@ -56,11 +61,11 @@ const Profile: React.FC = () => {
                         <p className="text-gray-600">{currentUser?.email}</p>
                         <div className="flex gap-6 mt-2">
                             <div className="text-center">
-                                <p className="text-2xl font-bold text-blue-600">{followers.length}</p>
+                                <p className="text-2xl font-bold text-blue-600">{followerCount}</p>
                                 <p className="text-sm text-gray-600">Followers</p>
                             </div>
                             <div className="text-center">
-                                <p className="text-2xl font-bold text-blue-600">{following.length}</p>
+                                <p className="text-2xl font-bold text-blue-600">{followingCount}</p>
                                 <p className="text-sm text-gray-600">Following</p>
                             </div>
                         </div>
@@ -79,7 +84,7 @@ const Profile: React.FC = () => {
                             }`}
                     >
                         <Users className="inline-block mr-2 h-5 w-5" />
-                        Followers ({followers.length})
+                        Followers ({followerCount})
                     </button>
                     <button
                         onClick={() => setActiveTab('following')}
@@ -89,7 +94,7 @@ const Profile: React.FC = () => {
                             }`}
                     >
                         <UserPlus className="inline-block mr-2 h-5 w-5" />
-                        Following ({following.length})
+                        Following ({followingCount})
                     </button>
                 </div>
 
@@ -109,7 +114,7 @@ const Profile: React.FC = () => {
                                     </div>
                                     <div className="ml-4">
                                         <p className="font-semibold text-gray-800">{user.username}</p>
-                                        <p className="text-sm text-gray-500">{user.email}</p>
+                                        <p className="text-sm text-gray-500">{user.follower_count} followers</p>
                                     </div>
                                 </div>
                             ))}
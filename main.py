@@ -1,15 +1,25 @@
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError, FastAPIError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from starlette.exceptions import HTTPException as StarletteHttpException
 from sqlalchemy.exc import InvalidRequestError
 
-from api.v1.utils.database import Base, engine
+from api.v1.utils.database import Base, engine, async_engine
+from api.v1.utils.query_budget import QueryBudgetMiddleware
+from api.v1.utils.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from api.v1.utils.scheduler import scheduler
 from api.v1.routes import version_one
+from api.v1.services.user import user_service, TOKEN_REAPER_INTERVAL_SECONDS, USER_TYPEAHEAD_REFRESH_SECONDS
+from api.v1.services.post import post_service, POST_COUNTER_RECONCILE_INTERVAL_SECONDS
+from api.v1.services.hashtag import hashtag_service, HASHTAG_FLUSH_INTERVAL_SECONDS
+from api.v1.services.suggestion import suggestion_service, SUGGESTION_GRAPH_REFRESH_SECONDS
+from api.v1.utils.broker import broker
+from api.v1.utils.websocket import manager
 
 load_dotenv()
 
@@ -23,11 +33,35 @@ from api.v1.responses.success_response import success_response
 
 Base.metadata.create_all(bind=engine)
 
+# background jobs
+
+scheduler.add_job(user_service.purge_expired_tokens, interval=TOKEN_REAPER_INTERVAL_SECONDS)
+scheduler.add_job(post_service.reconcile_counters, interval=POST_COUNTER_RECONCILE_INTERVAL_SECONDS)
+scheduler.add_job(hashtag_service.flush, interval=HASHTAG_FLUSH_INTERVAL_SECONDS)
+scheduler.add_job(user_service.rebuild_typeahead, interval=USER_TYPEAHEAD_REFRESH_SECONDS)
+scheduler.add_job(suggestion_service.load_graph, interval=SUGGESTION_GRAPH_REFRESH_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.start()
+    await manager.start()
+    await scheduler.start()
+    await registry.start()
+    yield
+    await registry.stop()
+    await scheduler.stop()
+    await manager.stop()
+    await broker.stop()
+    await async_engine.dispose()
+
+
 app: FastAPI = FastAPI(
     debug=os.environ.get("DEBUG") != "False",
     docs_url="/docs",
     redoc_url=None,
     title="Fastapi Social Media API",
+    lifespan=lifespan,
 )
 
 # cors handler - MUST be added before routes
@@ -39,6 +73,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# statement counts and Server-Timing header of every request
+app.add_middleware(QueryBudgetMiddleware)
+
+# latency of every request, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
 # routes
 app.include_router(version_one)  # api version one
 
@@ -119,6 +159,15 @@ async def test_cors():
     return success_response(message="CORS is working!")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint, merging every worker's metrics in
+    multiprocess mode
+    """
+
+    return PlainTextResponse(registry.expose(), media_type=CONTENT_TYPE)
+
+
 # start server
 
 if __name__ == "__main__":